@@ -0,0 +1,68 @@
+"""Builds the FastAPI apps: the full backend (server.py) and the public read app (public_app.py)"""
+from fastapi import FastAPI, APIRouter, Request
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from pymongo.errors import ConnectionFailure
+from contextlib import asynccontextmanager
+from typing import Callable, List, Sequence
+import asyncio
+import logging
+import threading
+
+from config import GZIP_MINIMUM_SIZE, GZIP_LEVEL, LOOP_WATCHDOG_ENABLED
+from database import db, connect_database, close_database, startup_state
+from observability import loop_watchdog, rolling_profiler, record_request_metrics
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# ============== LIFECYCLE ==============
+# Importing a module only defines the app. The Mongo client is created when
+# the app starts, and one-time database work (indexes, backfills, default
+# admin) runs in the background after the API already serves requests.
+
+async def run_startup_tasks(tasks: Sequence[Callable]):
+    """Run the one-time startup work in order, retrying while Mongo is unreachable"""
+    for task in tasks:
+        delay = 1
+        while True:
+            try:
+                await task()
+                break
+            except ConnectionFailure as e:
+                logging.warning(f"Startaufgabe {task.__name__} wartet auf die Datenbank: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+    startup_state["done"] = True
+    logging.info("Startaufgaben abgeschlossen")
+
+def create_lifespan(startup_tasks: Sequence[Callable]):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if db.target is None:
+            connect_database()
+        if LOOP_WATCHDOG_ENABLED:
+            loop_watchdog.start()
+        if rolling_profiler.handlers:
+            rolling_profiler.start(threading.get_ident())
+            logging.info(f"Rolling-Profiler aktiv für: {', '.join(sorted(rolling_profiler.handlers))}")
+        startup = asyncio.get_running_loop().create_task(run_startup_tasks(startup_tasks))
+        yield
+        startup.cancel()
+        close_database()
+    return lifespan
+
+async def database_unavailable(request: Request, exc: ConnectionFailure):
+    logging.error(f"Datenbank nicht erreichbar: {exc}")
+    return ORJSONResponse({"detail": "Datenbank nicht erreichbar"}, status_code=503, headers={"Retry-After": "5"})
+
+def create_app(routers: List[APIRouter], startup_tasks: Sequence[Callable]) -> FastAPI:
+    app = FastAPI(lifespan=create_lifespan(startup_tasks))
+    for router in routers:
+        app.include_router(router)
+    app.add_exception_handler(ConnectionFailure, database_unavailable)
+    app.add_middleware(CORSMiddleware, allow_credentials=True, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+                       expose_headers=["ETag", "X-Server-Time", "X-Timer-Remaining-Seconds"])
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+    app.middleware("http")(record_request_metrics)
+    return app
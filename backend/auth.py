@@ -0,0 +1,67 @@
+"""Admin authentication: password hashing, JWT tokens and the default admin"""
+from fastapi import HTTPException, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pymongo.errors import DuplicateKeyError
+import logging
+import uuid
+from datetime import datetime, timezone
+import jwt
+import asyncio
+
+from config import JWT_ALGORITHM, JWT_SECRET
+from database import db
+
+security = HTTPBearer(auto_error=False)
+
+
+# bcrypt is deliberately slow, keep it off the event loop
+async def hash_password(password: str) -> str:
+    import bcrypt
+    return await asyncio.to_thread(lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8'))
+
+async def check_password(password: str, password_hash: str) -> bool:
+    import bcrypt
+    return await asyncio.to_thread(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def create_token(username: str) -> str:
+    return jwt.encode({"username": username, "exp": datetime.now(timezone.utc).timestamp() + 86400}, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+def verify_token(token: str) -> dict:
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return verify_token(credentials.credentials)
+
+# ============== STARTUP TASKS ==============
+
+async def create_default_admin():
+    """Erstellt Standard-Admin wenn keiner existiert"""
+    # Every worker runs this hook, the unique index lets only one of them insert
+    await db.admins.create_index("username", unique=True)
+    existing = await db.admins.find_one({}, {"_id": 0})
+    if not existing:
+        password_hash = await hash_password('admin')
+        admin_doc = {
+            'id': str(uuid.uuid4()),
+            'username': 'admin',
+            'email': None,
+            'password_hash': password_hash,
+            'notifications_enabled': False,
+            'must_change_password': True,
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }
+        try:
+            await db.admins.insert_one(admin_doc)
+        except DuplicateKeyError:
+            logging.info("ℹ️ Admin wurde von einem anderen Worker erstellt")
+            return
+        logging.info("✅ Standard-Admin erstellt: admin / admin")
+    else:
+        logging.info("ℹ️ Admin existiert bereits")
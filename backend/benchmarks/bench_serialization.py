@@ -0,0 +1,122 @@
+"""
+F1 Fast Lap Challenge - Serialization Benchmark
+Compares the default FastAPI response path for /api/laps (response_model
+validation + jsonable encoding + json.dumps) with the orjson path, and the
+transfer size with and without gzip.
+
+USAGE:
+    python backend/benchmarks/bench_serialization.py [--sizes 100 1000 10000]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+import server  # noqa: E402
+from config import GZIP_LEVEL  # noqa: E402
+from leaderboard import format_gap, format_lap_time  # noqa: E402
+
+REPORT_DIR = BACKEND_DIR.parent / "test_reports" / "benchmarks"
+
+
+def make_entries(count: int) -> list:
+    """Lap documents as stored in lap_entries (rank/gap materialized)"""
+    entries = []
+    leader = 80000
+    for idx in range(count):
+        lap_ms = leader + idx * 37
+        entries.append({
+            "id": str(uuid.uuid4()),
+            "driver_name": f"Fahrer {idx:05d}",
+            "team": f"Team {idx % 12}",
+            "email": f"fahrer{idx}@example.com" if idx % 3 else None,
+            "lap_time_ms": lap_ms,
+            "lap_time_display": format_lap_time(lap_ms),
+            "track_id": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "rank": idx + 1,
+            "gap": format_gap(leader, lap_ms),
+        })
+    return entries
+
+
+def laps_route():
+    return next(r for r in server.app.routes if getattr(r, "path", None) == "/api/laps")
+
+
+async def default_path(entries: list, field) -> bytes:
+    content = await serialize_response(field=field, response_content=entries, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def orjson_path(entries: list, field) -> bytes:
+    return ORJSONResponse(entries).body
+
+
+async def measure(func, entries: list, field, repeat: int) -> tuple:
+    body = await func(entries, field)
+    start = time.process_time()
+    for _ in range(repeat):
+        await func(entries, field)
+    return (time.process_time() - start) / repeat * 1000, body
+
+
+async def run(sizes: list) -> dict:
+    field = laps_route().response_field
+    results = []
+    for size in sizes:
+        entries = make_entries(size)
+        repeat = max(3, 20000 // size)
+        default_ms, default_body = await measure(default_path, entries, field, repeat)
+        orjson_ms, orjson_body = await measure(orjson_path, entries, field, repeat)
+        assert json.loads(default_body) == json.loads(orjson_body)
+
+        start = time.process_time()
+        gzipped = gzip.compress(orjson_body, compresslevel=GZIP_LEVEL)
+        gzip_ms = (time.process_time() - start) * 1000
+
+        results.append({
+            "entries": size,
+            "default_cpu_ms": round(default_ms, 3),
+            "orjson_cpu_ms": round(orjson_ms, 3),
+            "cpu_speedup": round(default_ms / orjson_ms, 1),
+            "bytes_raw": len(orjson_body),
+            "bytes_gzip": len(gzipped),
+            "gzip_cpu_ms": round(gzip_ms, 3),
+            "size_reduction": round(1 - len(gzipped) / len(orjson_body), 3),
+        })
+    return {"benchmark": "serialization", "run_at": datetime.now(timezone.utc).isoformat(),
+            "gzip_level": GZIP_LEVEL, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.sizes))
+
+    print(f"{'Einträge':>9} {'default ms':>11} {'orjson ms':>10} {'Faktor':>7} {'Bytes':>9} {'gzip':>8} {'gzip ms':>8}")
+    for r in report["results"]:
+        print(f"{r['entries']:>9} {r['default_cpu_ms']:>11} {r['orjson_cpu_ms']:>10} {r['cpu_speedup']:>6}x "
+              f"{r['bytes_raw']:>9} {r['bytes_gzip']:>8} {r['gzip_cpu_ms']:>8}")
+
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    out = REPORT_DIR / "serialization.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nErgebnis gespeichert: {out}")
+
+
+if __name__ == "__main__":
+    main()
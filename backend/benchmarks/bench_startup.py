@@ -0,0 +1,205 @@
+"""
+F1 Fast Lap Challenge - Startup Benchmark
+Measures how quickly a fresh backend process serves requests again, e.g. after
+a container restart during an event:
+
+- import time of the app module (median over fresh interpreters)
+- spawn of uvicorn until /api/health/live answers
+- spawn of uvicorn until /api/health/ready reports the startup tasks as done
+  (DATABASE_BACKEND, in-memory by default so no MongoDB is needed)
+
+--baseline REV measures a git revision the same way from a temporary worktree,
+e.g. the commit before the lazy startup. Trees without the health endpoints
+count as live with their first HTTP answer and as ready at the same time,
+since their startup hooks finish before uvicorn serves.
+
+Lazy modules are reported for the app's own imports only. Modules already
+loaded by the interpreter (e.g. shutil from a .pth file in site-packages) or by
+fastapi, pydantic and motor (csv through importlib.metadata) are listed
+separately, the app cannot avoid those.
+
+USAGE:
+    python backend/benchmarks/bench_startup.py [--runs 5] [--app server:app] [--baseline 23e7b04]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPORT_DIR = BACKEND_DIR.parent / "test_reports" / "benchmarks"
+
+# Modules that are only needed for mail, export, upload and lap traces
+LAZY_MODULES = ["smtplib", "email.mime.multipart", "csv", "shutil", "bcrypt", "numpy"]
+# Imported by every request path; what they load is not the app's doing
+DEPENDENCIES = ["fastapi", "starlette.middleware.cors", "pydantic", "motor.motor_asyncio"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"import_ms": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+ATTRIBUTION_SNIPPET = """
+import json, sys
+import {dependencies}
+preloaded = [m for m in {lazy!r} if m in sys.modules]
+import {module}
+print(json.dumps({{"preloaded": preloaded, "app": [m for m in {lazy!r} if m in sys.modules and m not in preloaded]}}))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_snippet(snippet: str, backend_dir: Path) -> dict:
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=backend_dir, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str, backend_dir: Path) -> dict:
+    return run_snippet(IMPORT_SNIPPET.format(module=module, lazy=LAZY_MODULES), backend_dir)
+
+
+def attribute_lazy_modules(module: str, backend_dir: Path) -> dict:
+    return run_snippet(ATTRIBUTION_SNIPPET.format(module=module, lazy=LAZY_MODULES, dependencies=", ".join(DEPENDENCIES)),
+        backend_dir)
+
+
+def fetch(url: str):
+    """(status, JSON body or None) of a GET, None while the server does not answer"""
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except Exception:
+        return None
+
+
+def poll(url: str, deadline: float, accept) -> bool:
+    while time.perf_counter() < deadline:
+        answer = fetch(url)
+        if answer and accept(*answer):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def startup_done(status: int, body) -> bool:
+    # Without a ready endpoint the startup hooks already ran before the first answer
+    return status == 404 or (status == 200 and body.get("startup") == "done")
+
+
+def measure_serve(app: str, timeout: float, backend_dir: Path, database_backend: str) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}/api/health"
+    env = {**os.environ, "WEB_CONCURRENCY": "1", "DATABASE_BACKEND": database_backend, "TELEMETRY_UDP_PORT": "0"}
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+        "--log-level", "warning"], cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        live = poll(f"{base}/live", deadline, lambda status, body: True)
+        live_ms = (time.perf_counter() - start) * 1000 if live else None
+        ready = live and poll(f"{base}/ready", deadline, startup_done)
+        ready_ms = (time.perf_counter() - start) * 1000 if ready else None
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            # Blocked in its startup hooks
+            proc.kill()
+            proc.wait()
+    return {"live_ms": live_ms, "ready_ms": ready_ms}
+
+
+def median(values: list):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+def measure(app: str, runs: int, timeout: float, backend_dir: Path, database_backend: str) -> dict:
+    module = app.split(":")[0]
+    imports = [measure_import(module, backend_dir) for _ in range(runs)]
+    lazy = attribute_lazy_modules(module, backend_dir)
+    serves = [measure_serve(app, timeout, backend_dir, database_backend) for _ in range(runs)]
+    return {
+        "import_ms": median([r["import_ms"] for r in imports]),
+        "lazy_modules_loaded_at_import": lazy["app"],
+        "lazy_modules_loaded_by_dependencies": lazy["preloaded"],
+        "live_ms": median([r["live_ms"] for r in serves]),
+        "ready_ms": median([r["ready_ms"] for r in serves]),
+    }
+
+
+def measure_revision(revision: str, args) -> dict:
+    """Measure another revision of the backend from a temporary git worktree"""
+    worktree = Path(tempfile.mkdtemp(prefix="f1-startup-")) / "tree"
+    subprocess.run(["git", "worktree", "add", "--detach", str(worktree), revision], cwd=BACKEND_DIR,
+        check=True, capture_output=True)
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=worktree, capture_output=True,
+            text=True, check=True).stdout.strip()
+        return {"revision": commit, **measure(args.app, args.runs, args.timeout, worktree / "backend", args.database_backend)}
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", str(worktree)], cwd=BACKEND_DIR, check=True)
+
+
+def print_result(title: str, result: dict):
+    print(title)
+    print(f"  Import:                    {result['import_ms']} ms")
+    print(f"  Bis /health/live:          {result['live_ms'] if result['live_ms'] is not None else '-'} ms")
+    ready = f"{result['ready_ms']} ms" if result['ready_ms'] is not None else "nicht erreicht"
+    print(f"  Bis Startaufgaben fertig:  {ready}")
+    print(f"  Beim Import geladen:       {', '.join(result['lazy_modules_loaded_at_import']) or '-'}")
+    print(f"  Von Abhängigkeiten:        {', '.join(result['lazy_modules_loaded_by_dependencies']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app", default="server:app", help="uvicorn app path (module:attribute)")
+    parser.add_argument("--timeout", type=float, default=15, help="seconds to wait for each probe")
+    parser.add_argument("--database-backend", default=os.environ.get("DATABASE_BACKEND", "memory"),
+        help="DATABASE_BACKEND of the spawned servers")
+    parser.add_argument("--baseline", help="git revision to measure for comparison")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "startup",
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "app": args.app,
+        "runs": args.runs,
+        "database_backend": args.database_backend,
+        "mongo_url": os.environ.get("MONGO_URL", "mongodb://localhost:27017"),
+    }
+    if args.baseline:
+        report["baseline"] = measure_revision(args.baseline, args)
+        print_result(f"Baseline {report['baseline']['revision']}:", report["baseline"])
+    report["current"] = measure(args.app, args.runs, args.timeout, BACKEND_DIR, args.database_backend)
+    print_result("Aktueller Stand:", report["current"])
+
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    out = REPORT_DIR / "startup.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nErgebnis gespeichert: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+F1 Fast Lap Challenge - Storage Backend Benchmark
+Compares the storage backends (DATABASE_BACKEND) for an event on one laptop.
+Each backend runs in its own fresh process with the complete app in-process:
+
+- seed laps, then alternately enter a lap (POST /api/admin/laps) and read the
+  leaderboard right after it (GET /api/laps, so the response cache is cold)
+- p50/p95 latency of both requests
+- resident memory of the backend process, and for MongoDB also of the server
+
+MongoDB is only measured if MONGO_URL points at a reachable database; the
+benchmark uses its own database (f1_storage_bench) and drops it afterwards.
+The report is only saved when every requested backend was measured, so it
+always holds a comparison; otherwise the results are printed and the run fails.
+
+USAGE:
+    python backend/benchmarks/bench_storage.py [--seed-laps 500] [--requests 200] [--backends sqlite,mongo]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPORT_DIR = BACKEND_DIR.parent / "test_reports" / "benchmarks"
+BENCH_DB_NAME = "f1_storage_bench"
+
+
+def rss_mb() -> float:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 2)
+
+
+def lap_time() -> str:
+    return f"1:{random.randint(20, 40)}.{random.randint(0, 999):03d}"
+
+
+async def measure(backend: str, seed_laps: int, requests: int) -> dict:
+    """Runs inside the worker process for one backend"""
+    import httpx
+    import server
+    from application import run_startup_tasks
+    from database import close_database, connect_database, db
+
+    connect_database(backend)
+    try:
+        await asyncio.wait_for(db.command("ping"), 5)
+    except Exception as e:
+        return {"backend": backend, "error": str(e) or type(e).__name__}
+
+    rss_before = rss_mb()
+    await run_startup_tasks(server.STARTUP_TASKS)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench", timeout=60) as client:
+        login = await client.post("/api/auth/login", json={"username": "admin", "password": "admin"})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['token']}"}
+        seed_started = time.perf_counter()
+        for n in range(seed_laps):
+            await client.post("/api/admin/laps", headers=headers, json={
+                "driver_name": f"Seed Fahrer {n}", "team": f"Team {n % 8}", "lap_time_display": lap_time()})
+        seed_s = time.perf_counter() - seed_started
+
+        writes, reads = [], []
+        for n in range(requests):
+            start = time.perf_counter()
+            response = await client.post("/api/admin/laps", headers=headers, json={
+                "driver_name": f"Bench Fahrer {n}", "team": f"Team {n % 8}", "lap_time_display": lap_time()})
+            writes.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            start = time.perf_counter()
+            response = await client.get("/api/laps")
+            reads.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    result = {
+        "backend": backend,
+        "laps": seed_laps + requests,
+        "seed_laps_per_s": round(seed_laps / seed_s, 1) if seed_s else None,
+        "read_p50_ms": percentile(reads, 50), "read_p95_ms": percentile(reads, 95),
+        "write_p50_ms": percentile(writes, 50), "write_p95_ms": percentile(writes, 95),
+        "process_rss_mb": rss_mb(), "process_rss_growth_mb": round(rss_mb() - rss_before, 1),
+    }
+    if backend == "mongo":
+        status = await db.command("serverStatus")
+        result["server_rss_mb"] = status.get("mem", {}).get("resident")
+        await db.client.drop_database(BENCH_DB_NAME)
+    else:
+        result["file_mb"] = round(sum(path.stat().st_size for path in Path(os.environ["SQLITE_PATH"]).parent.iterdir()) / 2**20, 2)
+    close_database()
+    return result
+
+
+def run_backend(backend: str, seed_laps: int, requests: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "WEB_CONCURRENCY": "1", "CACHE_BUS_ENABLED": "0", "DB_NAME": BENCH_DB_NAME,
+               "SQLITE_PATH": str(Path(tmp) / "bench.sqlite3"), "TELEMETRY_UDP_PORT": "0"}
+        out = subprocess.run([sys.executable, __file__, "--worker", backend, "--seed-laps", str(seed_laps),
+            "--requests", str(requests)], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"backend": backend, "error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "Abbruch"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed-laps", type=int, default=500, help="Runden vor der Messung anlegen")
+    parser.add_argument("--requests", type=int, default=200, help="Gemessene Eintrag/Abruf-Paare")
+    parser.add_argument("--backends", default="sqlite,mongo")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, str(BACKEND_DIR))
+        print(json.dumps(asyncio.run(measure(args.worker, args.seed_laps, args.requests))))
+        return
+
+    results = [run_backend(backend, args.seed_laps, args.requests) for backend in args.backends.split(",")]
+    report = {
+        "benchmark": "storage",
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "config": {"seed_laps": args.seed_laps, "requests": args.requests},
+        "backends": results,
+    }
+
+    for result in results:
+        print(f"\n{result['backend']}:")
+        if "error" in result:
+            print(f"  Nicht gemessen: {result['error']}")
+            continue
+        print(f"  Rangliste lesen:      p50 {result['read_p50_ms']} ms, p95 {result['read_p95_ms']} ms ({result['laps']} Runden)")
+        print(f"  Runde eintragen:      p50 {result['write_p50_ms']} ms, p95 {result['write_p95_ms']} ms")
+        print(f"  Speicher Backend:     {result['process_rss_mb']} MB (+{result['process_rss_growth_mb']} MB im Test)")
+        if "server_rss_mb" in result:
+            print(f"  Speicher MongoDB:     {result['server_rss_mb']} MB")
+        if "file_mb" in result:
+            print(f"  Datenbankdatei:       {result['file_mb']} MB")
+
+    missing = [result['backend'] for result in results if "error" in result]
+    if missing:
+        print(f"\nErgebnis nicht gespeichert, ohne Messung von {', '.join(missing)} fehlt der Vergleich")
+        sys.exit(1)
+
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    out = REPORT_DIR / "storage.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nErgebnis gespeichert: {out}")
+
+
+if __name__ == "__main__":
+    main()
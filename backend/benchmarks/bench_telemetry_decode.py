@@ -0,0 +1,110 @@
+"""
+F1 Fast Lap Challenge - Telemetry Decode Benchmark
+Decoding throughput (packets per second on one core) for the recorded capture
+fixture: the telemetry decoder (precompiled structs, player car only, read
+from a memoryview) against a naive decoder that unpacks field by field into
+dicts for all 22 cars.
+
+USAGE:
+    python backend/benchmarks/bench_telemetry_decode.py [--capture backend/tests/fixtures/lap_capture.f1cap.gz]
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from telemetry.packets import (  # noqa: E402
+    CAR_TELEMETRY, CAR_TELEMETRY_INPUTS, CAR_TELEMETRY_SIZE, HEADER_FORMAT, HEADER_SIZE, LAP_DATA, LAP_DATA_FORMAT,
+    LAP_DATA_SIZE, MOTION, MOTION_FORMAT, MOTION_SIZE, NUM_CARS, SESSION, SESSION_FORMAT, CarInputs, CarMotion,
+    LapData, PacketHeader, SessionInfo, decode_packet
+)
+from telemetry.recording import iter_records, read_capture  # noqa: E402
+
+REPORT_DIR = BACKEND_DIR.parent / "test_reports" / "benchmarks"
+DEFAULT_CAPTURE = BACKEND_DIR / "tests" / "fixtures" / "lap_capture.f1cap.gz"
+
+# packet id -> (car format, car size, field names, cars in packet)
+NAIVE_LAYOUTS = {
+    MOTION: (MOTION_FORMAT, MOTION_SIZE, CarMotion._fields, NUM_CARS),
+    LAP_DATA: (LAP_DATA_FORMAT, LAP_DATA_SIZE, LapData._fields, NUM_CARS),
+    CAR_TELEMETRY: (CAR_TELEMETRY_INPUTS.format, CAR_TELEMETRY_SIZE, CarInputs._fields, NUM_CARS),
+    SESSION: (SESSION_FORMAT, 0, SessionInfo._fields, 1),
+}
+
+
+def unpack_fields(fmt: str, names: tuple, data: bytes, offset: int) -> dict:
+    """One struct.unpack per field on a sliced copy, as a first version would do it"""
+    result = {}
+    for name, code in zip(names, fmt.lstrip("<")):
+        size = struct.calcsize("<" + code)
+        result[name] = struct.unpack("<" + code, data[offset:offset + size])[0]
+        offset += size
+    return result
+
+
+def naive_decode(data: bytes):
+    header = unpack_fields(HEADER_FORMAT, PacketHeader._fields, data, 0)
+    layout = NAIVE_LAYOUTS.get(header["packet_id"])
+    if layout is None:
+        return None
+    fmt, size, names, cars = layout
+    return header, [unpack_fields(fmt, names, data, HEADER_SIZE + idx * size) for idx in range(cars)]
+
+
+def throughput(decode, packets: list, min_seconds: float) -> float:
+    """Packets per CPU second, repeating the capture until min_seconds have passed"""
+    decoded = 0
+    start = time.process_time()
+    while True:
+        for packet in packets:
+            decode(packet)
+        decoded += len(packets)
+        elapsed = time.process_time() - start
+        if elapsed >= min_seconds:
+            return decoded / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capture", type=Path, default=DEFAULT_CAPTURE)
+    parser.add_argument("--seconds", type=float, default=2.0, help="CPU time per decoder")
+    args = parser.parse_args()
+
+    views = [datagram for _, _, datagram in iter_records(read_capture(args.capture))]
+    copies = [bytes(view) for view in views]
+    assert all(decode_packet(view) for view in views)
+
+    naive = throughput(naive_decode, copies, args.seconds)
+    decoder = throughput(decode_packet, views, args.seconds)
+
+    report = {
+        "benchmark": "telemetry_decode",
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "capture": args.capture.name,
+        "packets": len(views),
+        "naive_packets_per_sec": round(naive),
+        "decoder_packets_per_sec": round(decoder),
+        "speedup": round(decoder / naive, 1),
+        # Packets per second a rig sends at 60 Hz (motion, lap data, car telemetry)
+        "rigs_per_core_at_60hz": int(decoder // 180),
+    }
+
+    print(f"Pakete in Aufnahme:      {report['packets']}")
+    print(f"Naiv (alle Autos, dict): {report['naive_packets_per_sec']:>10} Pakete/s")
+    print(f"Decoder (Spielerauto):   {report['decoder_packets_per_sec']:>10} Pakete/s  ({report['speedup']}x)")
+    print(f"Rigs pro Kern bei 60 Hz: {report['rigs_per_core_at_60hz']}")
+
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    out = REPORT_DIR / "telemetry_decode.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nErgebnis gespeichert: {out}")
+
+
+if __name__ == "__main__":
+    main()
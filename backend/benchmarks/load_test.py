@@ -0,0 +1,185 @@
+"""
+F1 Fast Lap Challenge - Load Test
+Simulates spectators polling the leaderboard while an admin enters laps.
+
+Every spectator requests /api/laps, /api/event/status and /api/design once per
+poll interval (like the public page). The admin posts a new lap every
+--admin-interval seconds. By default the app runs in-process on the in-memory
+storage backend (storage/memory.py), so no server or database is needed.
+
+USAGE:
+    pip install -r backend/benchmarks/requirements.txt
+    python backend/benchmarks/load_test.py --clients 200 --duration 60
+    python backend/benchmarks/load_test.py --url http://localhost:8001   # running server
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+REPORT_DIR = BACKEND_DIR.parent / "test_reports" / "benchmarks"
+SPECTATOR_PATHS = ["/api/laps", "/api/event/status", "/api/design"]
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def random_lap_time() -> str:
+    lap_ms = random.randint(78000, 95000)
+    return f"{lap_ms // 60000}:{str(lap_ms % 60000 // 1000).zfill(2)}.{str(lap_ms % 1000).zfill(3)}"
+
+
+class Recorder:
+    """Collects latencies per route"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, route: str, seconds: float, ok: bool):
+        self.latencies.setdefault(route, []).append(seconds * 1000)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        total = 0
+        for route, values in sorted(self.latencies.items()):
+            values.sort()
+            total += len(values)
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors.get(route, 0),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2),
+                "throughput_rps": round(len(values) / elapsed, 1),
+            }
+        return {"total_requests": total, "throughput_rps": round(total / elapsed, 1), "routes": routes}
+
+
+async def spectator(client: httpx.AsyncClient, recorder: Recorder, interval: float, deadline: float):
+    # Spread the clients over the poll interval like real browsers
+    await asyncio.sleep(random.uniform(0, interval))
+    while time.perf_counter() < deadline:
+        tick = time.perf_counter()
+        for path in SPECTATOR_PATHS:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            recorder.add(path, time.perf_counter() - start, ok)
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+
+
+async def admin(client: httpx.AsyncClient, recorder: Recorder, token: str, interval: float, deadline: float):
+    headers = {"Authorization": f"Bearer {token}"}
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+        start = time.perf_counter()
+        response = await client.post("/api/admin/laps", headers=headers, json={
+            "driver_name": f"Load Fahrer {n}", "team": f"Team {n % 8}", "lap_time_display": random_lap_time()})
+        recorder.add("POST /api/admin/laps", time.perf_counter() - start, response.status_code == 200)
+        await asyncio.sleep(interval)
+
+
+async def seed(client: httpx.AsyncClient, token: str, laps: int):
+    headers = {"Authorization": f"Bearer {token}"}
+    for n in range(laps):
+        await client.post("/api/admin/laps", headers=headers, json={
+            "driver_name": f"Seed Fahrer {n}", "team": f"Team {n % 8}", "lap_time_display": random_lap_time()})
+
+
+async def in_process_client() -> httpx.AsyncClient:
+    import server
+    from application import run_startup_tasks
+    from database import use_database
+    from storage.memory import MemoryDatabase
+
+    use_database(MemoryDatabase())
+    await run_startup_tasks(server.STARTUP_TASKS)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://loadtest", timeout=60)
+
+
+async def run(args) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url.rstrip("/"), timeout=60,
+            limits=httpx.Limits(max_connections=args.clients + 1))
+    else:
+        client = await in_process_client()
+
+    async with client:
+        login = await client.post("/api/auth/login", json={"username": args.username, "password": args.password})
+        login.raise_for_status()
+        token = login.json()["token"]
+        await seed(client, token, args.seed_laps)
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        tasks = [spectator(client, recorder, args.interval, deadline) for _ in range(args.clients)]
+        tasks.append(admin(client, recorder, token, args.admin_interval, deadline))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "benchmark": "load_test",
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "target": args.url or "in-process (memory)",
+        "config": {"clients": args.clients, "interval_s": args.interval, "duration_s": args.duration,
+                   "admin_interval_s": args.admin_interval, "seed_laps": args.seed_laps},
+        "elapsed_s": round(elapsed, 2),
+        **recorder.summary(elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100, help="Anzahl Zuschauer")
+    parser.add_argument("--interval", type=float, default=5.0, help="Abfrageintervall pro Zuschauer (s)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Testdauer (s)")
+    parser.add_argument("--admin-interval", type=float, default=2.0, help="Abstand zwischen Rundeneinträgen (s)")
+    parser.add_argument("--seed-laps", type=int, default=200, help="Runden vor dem Test anlegen")
+    parser.add_argument("--url", help="Laufenden Server testen statt In-Process")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--output", help="Pfad der JSON-Ergebnisdatei")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+
+    print(f"{'Route':<24} {'Anfragen':>9} {'Fehler':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>7}")
+    for route, r in report["routes"].items():
+        print(f"{route:<24} {r['requests']:>9} {r['errors']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['throughput_rps']:>7}")
+    print(f"\nGesamt: {report['total_requests']} Anfragen, {report['throughput_rps']} req/s")
+
+    if args.output:
+        out = Path(args.output)
+    else:
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        out = REPORT_DIR / f"load_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Ergebnis gespeichert: {out}")
+
+
+if __name__ == "__main__":
+    main()
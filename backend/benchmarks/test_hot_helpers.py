@@ -0,0 +1,192 @@
+"""
+F1 Fast Lap Challenge - Micro-Benchmarks for hot helpers
+parse_lap_time, format_gap, the email template rendering, the telemetry
+packet decoder, the lap trace comparison, the track limit check and the live
+position frame run per row, per request, per lap, per packet or per tick. Each case is timed and compared
+against the limit stored in thresholds.json; a slower rewrite fails the suite.
+
+USAGE:
+    python -m pytest backend/benchmarks/test_hot_helpers.py -q
+    BENCH_UPDATE_THRESHOLDS=1 python -m pytest backend/benchmarks/test_hot_helpers.py   # neue Grenzwerte schreiben
+"""
+import json
+import os
+import sys
+import timeit
+from pathlib import Path
+
+import pytest
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from leaderboard import format_gap, format_lap_time, parse_lap_time  # noqa: E402
+from mailer import render_results_rows, render_template  # noqa: E402
+from models import EmailTemplate  # noqa: E402
+import lap_rules  # noqa: E402
+import traces  # noqa: E402
+from telemetry.live import LiveFeed, Subscriber  # noqa: E402
+from telemetry.packets import CarMotion, decode_packet  # noqa: E402
+from telemetry.recording import iter_records, read_capture  # noqa: E402
+
+THRESHOLDS_FILE = BENCH_DIR / "thresholds.json"
+CAPTURE_FILE = BENCH_DIR.parent / "tests" / "fixtures" / "lap_capture.f1cap.gz"
+# Written limits leave this much headroom over the measured time
+THRESHOLD_HEADROOM = 3.0
+
+THRESHOLDS = json.loads(THRESHOLDS_FILE.read_text()) if THRESHOLDS_FILE.exists() else {}
+MEASURED = {}
+
+
+def bench(func, repeat: int = 3) -> float:
+    """Best time of `repeat` runs in milliseconds (best-of filters scheduler noise)"""
+    number, _ = timeit.Timer(func).autorange()
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1000
+
+
+def check(name: str, elapsed_ms: float):
+    MEASURED[name] = elapsed_ms
+    limit = THRESHOLDS.get(name)
+    assert limit is not None, f"Kein Grenzwert für '{name}' in {THRESHOLDS_FILE.name}"
+    assert elapsed_ms <= limit, f"{name}: {elapsed_ms:.3f} ms > Grenzwert {limit} ms"
+    print(f"✅ {name}: {elapsed_ms:.3f} ms (Grenzwert {limit} ms)")
+
+
+def make_times(count: int) -> list:
+    return [80000 + idx * 37 for idx in range(count)]
+
+
+def make_entries(count: int) -> list:
+    leader = 80000
+    return [{
+        "rank": idx + 1,
+        "driver_name": f"Fahrer {idx:05d}",
+        "lap_time_display": format_lap_time(lap_ms),
+        "gap": format_gap(leader, lap_ms),
+    } for idx, lap_ms in enumerate(make_times(count))]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def update_thresholds():
+    yield
+    if os.environ.get("BENCH_UPDATE_THRESHOLDS") and MEASURED:
+        limits = {name: round(ms * THRESHOLD_HEADROOM, 3) for name, ms in sorted(MEASURED.items())}
+        THRESHOLDS_FILE.write_text(json.dumps(limits, indent=2) + "\n")
+
+
+@pytest.fixture(autouse=True)
+def record_only(monkeypatch):
+    # While writing new thresholds every case only measures
+    if os.environ.get("BENCH_UPDATE_THRESHOLDS"):
+        monkeypatch.setattr(sys.modules[__name__], "check", lambda name, ms: MEASURED.__setitem__(name, ms))
+
+
+class TestParseLapTime:
+    """parse_lap_time runs once per entered lap"""
+
+    @pytest.mark.parametrize("count", [1000, 10000])
+    def test_parse_lap_time(self, count):
+        displays = [format_lap_time(ms) for ms in make_times(count)]
+        check(f"parse_lap_time_{count}", bench(lambda: [parse_lap_time(d) for d in displays]))
+
+
+class TestFormatGap:
+    """format_gap runs for every re-ranked lap"""
+
+    @pytest.mark.parametrize("count", [1000, 10000])
+    def test_format_gap(self, count):
+        times = make_times(count)
+        leader = times[0]
+        check(f"format_gap_{count}", bench(lambda: [format_gap(leader, ms) for ms in times]))
+
+
+class TestTemplateRendering:
+    """Results email: table rows plus the full HTML template"""
+
+    @pytest.mark.parametrize("count", [1000, 10000])
+    def test_results_rows(self, count):
+        entries = make_entries(count)
+        check(f"render_results_rows_{count}", bench(lambda: render_results_rows(entries)))
+
+    @pytest.mark.parametrize("count", [1000, 10000])
+    def test_full_template(self, count):
+        template = EmailTemplate().body_html
+        values = {
+            "event_title": "F1 FAST LAP CHALLENGE", "title_color": "#FF1E1E", "track_name": "Monza, Italien",
+            "custom_footer": "Danke fürs Mitmachen!", "first_place": "Fahrer 00000", "first_time": "1:20.000",
+            "second_place": "Fahrer 00001", "third_place": "Fahrer 00002", "date": "01.01.2026", "time": "12:00",
+        }
+        entries = make_entries(count)
+
+        def render():
+            return render_template(template, {**values, "results_table": render_results_rows(entries)})
+
+        assert "{results_table}" not in render()
+        check(f"render_template_{count}", bench(render))
+
+
+class TestTelemetryDecode:
+    """decode_packet runs for every UDP datagram of every rig"""
+
+    @pytest.mark.parametrize("count", [1000])
+    def test_decode_packet(self, count):
+        datagrams = [datagram for _, _, datagram in iter_records(read_capture(CAPTURE_FILE))][:count]
+        assert len(datagrams) == count
+        check(f"decode_packet_{count}", bench(lambda: [decode_packet(d) for d in datagrams]))
+
+
+class TestTraceComparison:
+    """compare_traces runs per uncached /api/laps/{id}/compare request"""
+
+    @pytest.mark.parametrize("count", [10000])
+    def test_compare_traces(self, count, tmp_path, monkeypatch):
+        monkeypatch.setattr(traces, "TRACE_DIR", tmp_path)
+        distance = [5000 * idx / count for idx in range(count)]
+        lap_ids = ["11111111-1111-4111-8111-111111111111", "22222222-2222-4222-8222-222222222222"]
+        for lap_id, speed in zip(lap_ids, (50.0, 50.5)):
+            columns = [distance, [d / speed * 1000 for d in distance], [speed * 3.6] * count]
+            columns += [[0.0] * count] * (len(traces.CHANNELS) - len(columns))
+            traces.save_trace(lap_id, columns)
+
+        def compare():
+            traces.compare_cache.clear()
+            return traces.compare_traces(*lap_ids, points=1000)
+
+        assert compare()["final_delta_ms"] > 0
+        check(f"compare_traces_{count}", bench(compare))
+
+
+class TestCutZones:
+    """find_cut checks every captured lap against the cut zones of the event track"""
+
+    @pytest.mark.parametrize("samples,zones", [(6000, 20)])
+    def test_find_cut(self, samples, zones):
+        import numpy as np
+        angle = np.linspace(0, 2 * np.pi, samples)
+        x, z, distance = 500 * np.cos(angle), 300 * np.sin(angle), angle * 640
+        # Hexagons just outside an oval lap, so every zone is near the line but never touched
+        compiled = lap_rules.compile_zones([{"name": f"Zone {idx}", "points": [
+            [550 * np.cos(a) + dx, 350 * np.sin(a) + dz] for dx, dz in [(0, 0), (20, 0), (30, 10), (20, 20), (0, 20), (-10, 10)]
+        ]} for idx, a in enumerate(np.linspace(0, 6, zones))])
+        assert lap_rules.find_cut(compiled, x, z, distance) is None
+        check(f"find_cut_{samples}_samples_{zones}_zones", bench(lambda: lap_rules.find_cut(compiled, x, z, distance)))
+
+
+class TestLivePositions:
+    """LiveFeed.tick encodes and hands out one frame per tick of /api/live/positions"""
+
+    @pytest.mark.parametrize("subscribers", [1000])
+    def test_tick(self, subscribers):
+        feed = LiveFeed(hz=10)
+        feed.active = True
+        for idx in range(8):
+            feed.on_motion(f"10.0.0.{idx + 10}", CarMotion(*([100.0 + idx] * 6 + [0] * 6 + [0.5] * 6)))
+        for _ in range(subscribers):
+            feed.subscribers.add(Subscriber())
+
+        def tick():
+            feed.dirty = True
+            return feed.tick()
+
+        assert len(tick()) == 4 + 8 * 7
+        check(f"live_tick_{subscribers}_subscribers", bench(tick))
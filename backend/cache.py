@@ -0,0 +1,94 @@
+"""Versioned response cache and the cross-process invalidation bus"""
+from fastapi import Request
+from fastapi.responses import Response
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+import logging
+from typing import Dict
+from datetime import datetime, timezone
+import asyncio
+import gzip
+import orjson
+
+from config import CACHE_BUS_ENABLED, CACHE_BUS_SIZE_BYTES, GZIP_LEVEL, GZIP_MINIMUM_SIZE, PROCESS_ID
+from database import db
+
+# ============== CACHE ==============
+# Public read results are cached per data version. Writes bump the version of
+# what they touched, so stale entries are never looked up again.
+
+cache_versions = {"leaderboard": 0, "settings": 0}
+response_cache: Dict[str, tuple] = {}
+
+async def bump_version(name: str):
+    cache_versions[name] += 1
+    if CACHE_BUS_ENABLED:
+        await db.cache_events.insert_one({"name": name, "origin": PROCESS_ID, "at": datetime.now(timezone.utc)})
+
+async def cached(key: str, depends_on: tuple, producer):
+    """Return the cached result for key unless one of the versions it depends on changed"""
+    versions = tuple(cache_versions[name] for name in depends_on)
+    hit = response_cache.get(key)
+    if hit and hit[0] == versions:
+        return hit[1]
+    value = await producer()
+    response_cache[key] = (versions, value)
+    return value
+
+async def prepare_cache_bus():
+    try:
+        await db.create_collection("cache_events", capped=True, size=CACHE_BUS_SIZE_BYTES)
+    except CollectionInvalid:
+        pass
+
+async def follow_cache_bus():
+    """Tail cache_events and bump local versions for writes made by other workers.
+
+    A tailable cursor on an empty capped collection dies immediately, and a
+    dropped cursor may have missed events, so every (re)connect invalidates
+    everything once before following from the newest event.
+    """
+    last_id = None
+    while True:
+        try:
+            if last_id is None:
+                newest = await db.cache_events.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+                for name in cache_versions:
+                    cache_versions[name] += 1
+                if newest is None:
+                    await asyncio.sleep(1)
+                    continue
+                last_id = newest['_id']
+            cursor = db.cache_events.find({"_id": {"$gt": last_id}}, cursor_type=CursorType.TAILABLE_AWAIT)
+            while cursor.alive:
+                async for event in cursor:
+                    last_id = event['_id']
+                    if event['origin'] != PROCESS_ID and event['name'] in cache_versions:
+                        cache_versions[event['name']] += 1
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Cache-Bus unterbrochen: {e}")
+            last_id = None
+            await asyncio.sleep(1)
+
+def encode_json(data) -> tuple:
+    """Serialize once and keep a gzip copy for clients that accept it"""
+    body = orjson.dumps(data, default=str)
+    gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL) if len(body) >= GZIP_MINIMUM_SIZE else None
+    return body, gzipped
+
+def encoded_json_response(request: Request, encoded: tuple) -> Response:
+    body, gzipped = encoded
+    if gzipped and "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(gzipped, media_type="application/json", headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return Response(body, media_type="application/json")
+
+# ============== STARTUP TASKS ==============
+
+async def start_cache_bus():
+    if CACHE_BUS_ENABLED:
+        await prepare_cache_bus()
+        asyncio.get_running_loop().create_task(follow_cache_bus())
+        logging.info(f"Cache-Bus aktiv (Worker {PROCESS_ID})")
@@ -0,0 +1,76 @@
+"""Settings read from the environment (and backend/.env)"""
+from dotenv import load_dotenv
+import os
+from pathlib import Path
+import uuid
+
+ROOT_DIR = Path(__file__).parent
+UPLOAD_DIR = ROOT_DIR / "uploads"
+load_dotenv(ROOT_DIR / '.env')
+# One <lap id>.npy file per captured lap with its telemetry trace
+TRACE_DIR = Path(os.environ.get('TRACE_DIR', str(ROOT_DIR / "traces")))
+
+JWT_SECRET = os.environ.get('JWT_SECRET', 'f1-fast-lap-challenge-secret-key-2024')
+JWT_ALGORITHM = "HS256"
+
+# Responses smaller than this are sent uncompressed
+GZIP_MINIMUM_SIZE = int(os.environ.get('GZIP_MINIMUM_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+
+# Mongo commands slower than this are logged and counted
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+
+# Comma separated handler names (e.g. "get_all_laps,get_event_status") to profile continuously
+ROLLING_PROFILE_HANDLERS = [h.strip() for h in os.environ.get('ROLLING_PROFILE_HANDLERS', '').split(',') if h.strip()]
+ROLLING_PROFILE_WINDOW_SECONDS = int(os.environ.get('ROLLING_PROFILE_WINDOW_SECONDS', '300'))
+ROLLING_PROFILE_INTERVAL_MS = float(os.environ.get('ROLLING_PROFILE_INTERVAL_MS', '10'))
+
+# Callbacks that keep the event loop busy longer than this are reported with their call site
+LOOP_WATCHDOG_ENABLED = os.environ.get('LOOP_WATCHDOG_ENABLED', '1') == '1'
+LOOP_BLOCK_THRESHOLD_MS = float(os.environ.get('LOOP_BLOCK_THRESHOLD_MS', '100'))
+
+# Worker processes started by uvicorn (it reads WEB_CONCURRENCY itself). With more
+# than one, caches are invalidated across processes through a capped collection.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+# "auto" switches it on as soon as uvicorn runs more than one worker. Set it to
+# "1" when public_app.py runs next to server.py.
+CACHE_BUS_MODE = os.environ.get('CACHE_BUS_ENABLED', 'auto')
+CACHE_BUS_ENABLED = WEB_CONCURRENCY > 1 if CACHE_BUS_MODE == 'auto' else CACHE_BUS_MODE == '1'
+CACHE_BUS_SIZE_BYTES = 1024 * 1024
+PROCESS_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# "mongo" (default), "sqlite" (one local file, no database server, for an event
+# run from a single laptop) or "memory" (nothing stored, for tests and demos).
+# Both embedded backends only work with a single worker.
+DATABASE_BACKEND = os.environ.get('DATABASE_BACKEND', 'mongo')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', str(ROOT_DIR / "data" / "f1_fast_lap.sqlite3"))
+
+# Mongo connection pool. A bounded wait queue makes requests fail fast with 503
+# instead of piling up while the database is unreachable.
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '20000'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+
+# Settings updates arriving within this window are written together
+SETTINGS_COALESCE_MS = float(os.environ.get('SETTINGS_COALESCE_MS', '250'))
+
+# /api/health/ready pings Mongo at most once per interval
+READY_CHECK_INTERVAL_SECONDS = float(os.environ.get('READY_CHECK_INTERVAL_SECONDS', '2'))
+READY_PING_TIMEOUT_SECONDS = 2
+
+# UDP telemetry of the F1 game (Settings > Telemetry, UDP format 2024). Unset
+# means no automatic lap capture. Binding the port needs a single worker; with
+# more, run "python -m telemetry" separately.
+TELEMETRY_UDP_PORT = int(os.environ.get('TELEMETRY_UDP_PORT', '0'))
+TELEMETRY_BIND_ADDRESS = os.environ.get('TELEMETRY_BIND_ADDRESS', '0.0.0.0')
+# Packets waiting for the decoder; further packets are dropped while it is full
+TELEMETRY_QUEUE_SIZE = int(os.environ.get('TELEMETRY_QUEUE_SIZE', '2000'))
+# Also append every received datagram to this capture file (replay with python -m telemetry.replay)
+TELEMETRY_RECORD_FILE = os.environ.get('TELEMETRY_RECORD_FILE', '')
+# Points /api/laps/{id}/trace returns at most per channel
+TRACE_MAX_POINTS = int(os.environ.get('TRACE_MAX_POINTS', '2000'))
+# Position frames per second on /api/live/positions (track map)
+LIVE_POSITION_HZ = float(os.environ.get('LIVE_POSITION_HZ', '10'))
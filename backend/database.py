@@ -0,0 +1,65 @@
+"""Database connection (MongoDB or embedded SQLite) and readiness check"""
+from typing import Optional
+import asyncio
+import time
+
+from config import (
+    CACHE_BUS_ENABLED, DATABASE_BACKEND, READY_CHECK_INTERVAL_SECONDS, READY_PING_TIMEOUT_SECONDS, SQLITE_PATH,
+    WEB_CONCURRENCY
+)
+from storage import open_storage
+
+class Database:
+    """Stands in for the storage backend's database so every module can import db once.
+
+    The client is only created when an app starts (connect_database), or a
+    benchmark/test plugs in its own database object (use_database).
+    """
+
+    def __init__(self):
+        self.client = None
+        self.target = None
+
+    def __getattr__(self, name):
+        if self.target is None:
+            raise RuntimeError("Datenbank nicht verbunden")
+        return getattr(self.target, name)
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+db = Database()
+
+def connect_database(backend: Optional[str] = None):
+    backend = backend or DATABASE_BACKEND
+    if backend != "mongo" and (WEB_CONCURRENCY > 1 or CACHE_BUS_ENABLED):
+        raise RuntimeError(f"DATABASE_BACKEND={backend} geht nur mit einem Worker (WEB_CONCURRENCY=1, ohne CACHE_BUS_ENABLED)")
+    db.client, db.target = open_storage(backend, SQLITE_PATH)
+
+def use_database(database):
+    """Run against an existing database object instead of the configured backend (benchmarks, tests)"""
+    db.target = database
+
+def close_database():
+    if db.client is not None:
+        db.client.close()
+        db.client = None
+
+# ============== HEALTH ==============
+# Liveness only says the process answers. Readiness also needs the database; its ping
+# result is shared for a short interval so probes and restarts do not add load.
+
+ready_lock = asyncio.Lock()
+ready_state = {"checked_at": 0.0, "ok": False, "error": None}
+startup_state = {"done": False}
+
+async def check_ready() -> dict:
+    async with ready_lock:
+        if time.monotonic() - ready_state["checked_at"] >= READY_CHECK_INTERVAL_SECONDS:
+            try:
+                await asyncio.wait_for(db.command("ping"), READY_PING_TIMEOUT_SECONDS)
+                ready_state.update(ok=True, error=None)
+            except Exception as e:
+                ready_state.update(ok=False, error=str(e) or type(e).__name__)
+            ready_state["checked_at"] = time.monotonic()
+        return dict(ready_state)
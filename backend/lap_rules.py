@@ -0,0 +1,80 @@
+"""Track limit rules for captured laps, checked against the lap trace before it is entered"""
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from cache import cached
+from database import db
+from traces import CHANNEL_INDEX
+
+# ============== CUT ZONES ==============
+# Each track can carry polygons (game world x/z) beside the track. They are
+# compiled once per track version into (zones, edges) numpy arrays, padded to
+# the largest zone. Checking a lap is then a bounding box test of every sample
+# against every zone, followed by ray casting only for the few sample/zone
+# pairs inside a box - array operations instead of a Python loop per sample.
+
+class CompiledZones(NamedTuple):
+    names: List[str]
+    # numpy arrays (zones, edges) of edge start/end points; padding edges are
+    # horizontal at z=0 and never cross a ray
+    x1: Any
+    z1: Any
+    x2: Any
+    z2: Any
+    # numpy arrays (zones,) of the bounding boxes
+    min_x: Any
+    min_z: Any
+    max_x: Any
+    max_z: Any
+
+def compile_zones(zones: Sequence[dict]) -> Optional[CompiledZones]:
+    if not zones:
+        return None
+    import numpy as np
+    polygons = [np.asarray(zone['points'], dtype=np.float64) for zone in zones]
+    width = max(len(points) for points in polygons)
+    x1, z1, x2, z2 = (np.zeros((len(polygons), width)) for _ in range(4))
+    for idx, points in enumerate(polygons):
+        following = np.roll(points, -1, axis=0)
+        x1[idx, :len(points)], z1[idx, :len(points)] = points[:, 0], points[:, 1]
+        x2[idx, :len(points)], z2[idx, :len(points)] = following[:, 0], following[:, 1]
+    lows = np.array([points.min(axis=0) for points in polygons])
+    highs = np.array([points.max(axis=0) for points in polygons])
+    return CompiledZones([zone['name'] for zone in zones], x1, z1, x2, z2, lows[:, 0], lows[:, 1], highs[:, 0], highs[:, 1])
+
+def find_cut(zones: CompiledZones, x, z, distance) -> Optional[str]:
+    """Reason for the first sample inside a zone (even-odd ray casting), None if the lap is clean"""
+    import numpy as np
+    x, z = np.asarray(x, dtype=np.float64)[:, None], np.asarray(z, dtype=np.float64)[:, None]
+    in_box = (x >= zones.min_x) & (x <= zones.max_x) & (z >= zones.min_z) & (z <= zones.max_z)
+    # Pairs come out in sample order, so the first hit is the first cut of the lap
+    sample, zone = np.nonzero(in_box)
+    if not sample.size:
+        return None
+    px, pz = x[sample], z[sample]
+    x1, z1, x2, z2 = zones.x1[zone], zones.z1[zone], zones.x2[zone], zones.z2[zone]
+    straddles = (z1 > pz) != (z2 > pz)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_x = x1 + (pz - z1) * (x2 - x1) / (z2 - z1)
+    inside = np.count_nonzero(straddles & (px < crossing_x), axis=1) % 2 == 1
+    hits = np.flatnonzero(inside)
+    if not hits.size:
+        return None
+    first = hits[0]
+    return f"Streckenbegrenzung verletzt: {zones.names[zone[first]]} bei {float(distance[sample[first]]):.0f} m"
+
+def check_trace(zones: Optional[CompiledZones], columns: Optional[Sequence]) -> Optional[str]:
+    """Reason a captured lap breaks the track's rules, None if it may be entered"""
+    if zones is None:
+        return None
+    if not columns or not len(columns[CHANNEL_INDEX["x"]]):
+        return "Keine Telemetrie-Spur zur Prüfung der Streckenbegrenzung"
+    return find_cut(zones, columns[CHANNEL_INDEX["x"]], columns[CHANNEL_INDEX["z"]], columns[CHANNEL_INDEX["distance"]])
+
+async def load_cut_zones(track_id: Optional[str]) -> Optional[CompiledZones]:
+    """Compiled zones of a track, rebuilt whenever track settings change"""
+    if not track_id:
+        return None
+    async def produce():
+        track = await db.tracks.find_one({"id": track_id}, {"_id": 0, "cut_zones": 1})
+        return compile_zones((track or {}).get('cut_zones') or [])
+    return await cached(f"cut_zones:{track_id}", ("settings",), produce)
@@ -0,0 +1,611 @@
+"""Lap times, rankings, statistics, team standings and event status"""
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+import logging
+from typing import List, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+import asyncio
+import hashlib
+import orjson
+import time
+
+from config import CACHE_BUS_ENABLED, PROCESS_ID
+from database import db
+from models import DesignSettings, LapEntry
+from cache import bump_version, cached
+from settings import load_settings
+
+# ============== HELPER FUNCTIONS ==============
+
+def parse_lap_time(time_str: str) -> int:
+    try:
+        parts = time_str.split(':')
+        if len(parts) != 2:
+            raise ValueError("Invalid format")
+        minutes = int(parts[0])
+        seconds_parts = parts[1].split('.')
+        if len(seconds_parts) != 2:
+            raise ValueError("Invalid format")
+        seconds = int(seconds_parts[0])
+        milliseconds = int(seconds_parts[1].ljust(3, '0')[:3])
+        return (minutes * 60 * 1000) + (seconds * 1000) + milliseconds
+    except Exception:
+        raise ValueError("Invalid time format. Use MM:SS.mmm (e.g., 1:23.456)")
+
+def format_lap_time(lap_time_ms: int) -> str:
+    minutes, rest = divmod(lap_time_ms, 60000)
+    return f"{minutes}:{str(rest // 1000).zfill(2)}.{str(rest % 1000).zfill(3)}"
+
+def format_gap(leader_ms: int, current_ms: int) -> str:
+    if leader_ms == current_ms:
+        return "-"
+    gap_ms = current_ms - leader_ms
+    if gap_ms < 1000:
+        return f"+0.{str(gap_ms).zfill(3)}"
+    elif gap_ms < 60000:
+        return f"+{gap_ms // 1000}.{str(gap_ms % 1000).zfill(3)}"
+    else:
+        minutes = gap_ms // 60000
+        remaining = gap_ms % 60000
+        return f"+{minutes}:{str(remaining // 1000).zfill(2)}.{str(remaining % 1000).zfill(3)}"
+
+# ============== RANKINGS ==============
+# rank and gap are stored on every lap document so that read paths are plain
+# projections. Writes recompute them for the affected lap time range only.
+
+class RankingsLock:
+    """Serializes ranking updates. In multi-worker mode a lease document in
+    Mongo extends the lock across processes; it expires if a worker dies while
+    holding it."""
+
+    LEASE_SECONDS = 10
+
+    def __init__(self):
+        self.local = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.local.acquire()
+        if CACHE_BUS_ENABLED:
+            try:
+                await self.acquire_lease()
+            except BaseException:
+                self.local.release()
+                raise
+
+    async def __aexit__(self, *exc):
+        try:
+            if CACHE_BUS_ENABLED:
+                await db.locks.delete_one({"_id": "rankings", "owner": PROCESS_ID})
+        finally:
+            self.local.release()
+
+    async def acquire_lease(self):
+        while True:
+            now = time.time()
+            try:
+                # Matches a free or expired lease; otherwise the upsert collides on _id
+                await db.locks.update_one(
+                    {"_id": "rankings", "$or": [{"expires": {"$lt": now}}, {"owner": PROCESS_ID}]},
+                    {"$set": {"owner": PROCESS_ID, "expires": now + self.LEASE_SECONDS}},
+                    upsert=True
+                )
+                return
+            except DuplicateKeyError:
+                await asyncio.sleep(0.02)
+
+rankings_lock = RankingsLock()
+
+async def get_leader_time() -> Optional[int]:
+    leader = await db.lap_entries.find_one({}, {"_id": 0, "lap_time_ms": 1}, sort=[("lap_time_ms", 1)])
+    return leader['lap_time_ms'] if leader else None
+
+async def update_rankings(leader_before: Optional[int], start_ms: int = 0, end_ms: Optional[int] = None):
+    """Recompute rank/gap for laps with start_ms <= lap_time_ms <= end_ms in one bulk write.
+
+    If the leader changed every gap is affected, so the whole leaderboard is rewritten.
+    """
+    leader_time = await get_leader_time()
+    if leader_time is None:
+        return
+    if leader_time != leader_before:
+        start_ms, end_ms = 0, None
+
+    time_range = {"$gte": start_ms}
+    if end_ms is not None:
+        time_range["$lte"] = end_ms
+    offset = await db.lap_entries.count_documents({"lap_time_ms": {"$lt": start_ms}}) if start_ms > 0 else 0
+    entries = await db.lap_entries.find(
+        {"lap_time_ms": time_range}, {"_id": 0, "id": 1, "lap_time_ms": 1, "rank": 1, "gap": 1}
+    ).sort([("lap_time_ms", 1), ("created_at", 1)]).to_list(None)
+
+    ops = []
+    for idx, entry in enumerate(entries):
+        rank = offset + idx + 1
+        gap = format_gap(leader_time, entry['lap_time_ms'])
+        if entry.get('rank') != rank or entry.get('gap') != gap:
+            ops.append(UpdateOne({"id": entry['id']}, {"$set": {"rank": rank, "gap": gap}}))
+    if ops:
+        await db.lap_entries.bulk_write(ops, ordered=False)
+
+# ============== STATISTICS ==============
+# One lap_stats document per scope ("global", "track:<id>") holds counters that
+# are updated with $inc/$min on every lap write, so /api/stats never scans laps.
+
+STATS_BUCKET_MS = 100
+STATS_PERCENTILES = (10, 25, 50, 75, 90, 95)
+
+def stats_scopes(entry: dict) -> List[str]:
+    scopes = ["global"]
+    if entry.get('track_id'):
+        scopes.append(f"track:{entry['track_id']}")
+    return scopes
+
+def stats_scope_query(scope: str) -> dict:
+    return {} if scope == "global" else {"track_id": scope.split(":", 1)[1]}
+
+def stats_key(value: str) -> str:
+    """Escape characters Mongo does not allow in field names"""
+    return value.replace('.', '\uff0e').replace('$', '\uff04')
+
+async def record_lap_stats(entry: dict, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) one lap from the aggregates of its scopes"""
+    lap_ms = entry['lap_time_ms']
+    inc = {
+        "count": sign,
+        "sum_ms": sign * lap_ms,
+        f"histogram.{lap_ms // STATS_BUCKET_MS}": sign,
+        f"hours.{entry['created_at'][:13]}": sign,
+    }
+    update = {"$inc": inc}
+    if sign > 0:
+        update["$min"] = {"best_ms": lap_ms}
+    team = entry.get('team')
+    if team:
+        key = stats_key(team)
+        inc[f"teams.{key}.count"] = sign
+        inc[f"teams.{key}.sum_ms"] = sign * lap_ms
+        update["$set"] = {f"teams.{key}.name": team}
+        if sign > 0:
+            update["$min"][f"teams.{key}.best_ms"] = lap_ms
+
+    for scope in stats_scopes(entry):
+        await db.lap_stats.update_one({"id": scope}, update, upsert=True)
+        if sign < 0:
+            await refresh_stats_best(scope, entry)
+
+async def refresh_stats_best(scope: str, removed: dict):
+    """Re-read best times that may have left with a removed lap (indexed lookups only)"""
+    stats = await db.lap_stats.find_one({"id": scope}, {"_id": 0, "best_ms": 1, "teams": 1})
+    if not stats:
+        return
+    query = stats_scope_query(scope)
+    update = {"$set": {}, "$unset": {}}
+
+    if stats.get('best_ms') == removed['lap_time_ms']:
+        best = await db.lap_entries.find_one(query, {"_id": 0, "lap_time_ms": 1}, sort=[("lap_time_ms", 1)])
+        if best:
+            update["$set"]["best_ms"] = best['lap_time_ms']
+        else:
+            update["$unset"]["best_ms"] = ""
+
+    team = removed.get('team')
+    if team:
+        key = stats_key(team)
+        team_stats = stats.get('teams', {}).get(key, {})
+        if team_stats.get('count', 0) <= 0:
+            update["$unset"][f"teams.{key}"] = ""
+        elif team_stats.get('best_ms') == removed['lap_time_ms']:
+            best = await db.lap_entries.find_one({**query, "team": team}, {"_id": 0, "lap_time_ms": 1}, sort=[("lap_time_ms", 1)])
+            if best:
+                update["$set"][f"teams.{key}.best_ms"] = best['lap_time_ms']
+            else:
+                update["$unset"][f"teams.{key}"] = ""
+
+    update = {op: fields for op, fields in update.items() if fields}
+    if update:
+        await db.lap_stats.update_one({"id": scope}, update)
+
+async def rebuild_lap_stats():
+    """Recompute all aggregates from lap_entries (one-time migration)"""
+    docs = {}
+    async for entry in db.lap_entries.find({}, {"_id": 0, "lap_time_ms": 1, "created_at": 1, "team": 1, "track_id": 1}):
+        lap_ms = entry['lap_time_ms']
+        for scope in stats_scopes(entry):
+            doc = docs.setdefault(scope, {"id": scope, "count": 0, "sum_ms": 0, "histogram": {}, "hours": {}, "teams": {}})
+            doc['count'] += 1
+            doc['sum_ms'] += lap_ms
+            doc['best_ms'] = min(doc.get('best_ms', lap_ms), lap_ms)
+            bucket = str(lap_ms // STATS_BUCKET_MS)
+            doc['histogram'][bucket] = doc['histogram'].get(bucket, 0) + 1
+            hour = entry['created_at'][:13]
+            doc['hours'][hour] = doc['hours'].get(hour, 0) + 1
+            if entry.get('team'):
+                team = doc['teams'].setdefault(stats_key(entry['team']), {"name": entry['team'], "count": 0, "sum_ms": 0, "best_ms": lap_ms})
+                team['count'] += 1
+                team['sum_ms'] += lap_ms
+                team['best_ms'] = min(team['best_ms'], lap_ms)
+    await db.lap_stats.delete_many({})
+    if docs:
+        await db.lap_stats.insert_many(list(docs.values()))
+
+def histogram_percentile(buckets: List[tuple], total: int, percentile: float, bucket_ms: int) -> int:
+    """Interpolate a percentile from sorted (bucket_start_ms, count) pairs"""
+    target = total * percentile / 100
+    seen = 0
+    for start, count in buckets:
+        if seen + count >= target:
+            return int(start + (target - seen) / count * bucket_ms)
+        seen += count
+    return buckets[-1][0] + bucket_ms if buckets else 0
+
+def build_stats_response(stats: dict, bucket_ms: int) -> dict:
+    count = stats.get('count', 0)
+    bucket_ms = max(STATS_BUCKET_MS, bucket_ms // STATS_BUCKET_MS * STATS_BUCKET_MS)
+
+    # Stored buckets are STATS_BUCKET_MS wide, merge them into the requested width
+    merged = {}
+    for bucket, bucket_count in stats.get('histogram', {}).items():
+        if bucket_count > 0:
+            start = int(bucket) * STATS_BUCKET_MS // bucket_ms * bucket_ms
+            merged[start] = merged.get(start, 0) + bucket_count
+    buckets = sorted(merged.items())
+
+    best_ms = stats.get('best_ms') if count else None
+    percentiles = {}
+    if count:
+        for p in STATS_PERCENTILES:
+            percentiles[f"p{p}"] = max(best_ms, histogram_percentile(buckets, count, p, bucket_ms))
+
+    teams = []
+    for team in stats.get('teams', {}).values():
+        if team.get('count', 0) > 0:
+            teams.append({"team": team['name'], "count": team['count'], "best_ms": team.get('best_ms'),
+                "best_display": format_lap_time(team['best_ms']) if team.get('best_ms') else None,
+                "mean_ms": team['sum_ms'] // team['count']})
+    teams.sort(key=lambda t: t['best_ms'] or 0)
+
+    return {
+        "count": count,
+        "best_ms": best_ms,
+        "best_display": format_lap_time(best_ms) if best_ms else None,
+        "mean_ms": stats['sum_ms'] // count if count else None,
+        "median_ms": percentiles.get("p50"),
+        "percentiles": percentiles,
+        "histogram": [{"from_ms": start, "to_ms": start + bucket_ms, "count": c} for start, c in buckets],
+        "teams": teams,
+        "laps_per_hour": [{"hour": f"{hour}:00", "count": c} for hour, c in sorted(stats.get('hours', {}).items()) if c > 0],
+    }
+
+# ============== SECTORS ==============
+# Sector times are stored packed into one integer per lap (21 bits per sector,
+# up to 34:57.151 each, 63 bits in total so it stays a BSON int64). One
+# sector_bests document per scope holds the fastest time of every sector, so
+# deltas and the theoretical best never scan the laps. driver_sector_bests
+# holds each driver's fastest sectors per scope for the personal best flags.
+
+SECTOR_COUNT = 3
+SECTOR_BITS = 21
+SECTOR_MASK = (1 << SECTOR_BITS) - 1
+
+def pack_sectors(sectors: Sequence[int]) -> int:
+    if len(sectors) != SECTOR_COUNT or any(not 0 < ms <= SECTOR_MASK for ms in sectors):
+        raise ValueError("Ungültige Sektorzeiten")
+    return sectors[0] | sectors[1] << SECTOR_BITS | sectors[2] << 2 * SECTOR_BITS
+
+def unpack_sectors(packed: int) -> Tuple[int, int, int]:
+    return packed & SECTOR_MASK, packed >> SECTOR_BITS & SECTOR_MASK, packed >> 2 * SECTOR_BITS & SECTOR_MASK
+
+def format_sector_time(ms: int) -> str:
+    return format_lap_time(ms) if ms >= 60000 else f"{ms // 1000}.{str(ms % 1000).zfill(3)}"
+
+def parse_sector_times(displays: Sequence[str], lap_time_ms: int) -> int:
+    """Packed sectors from SS.mmm or M:SS.mmm strings that add up to the lap time"""
+    if len(displays) != SECTOR_COUNT:
+        raise ValueError("Es werden genau 3 Sektorzeiten benötigt")
+    sectors = [parse_lap_time(d if ':' in d else f"0:{d}") for d in displays]
+    if sum(sectors) != lap_time_ms:
+        raise ValueError("Sektorzeiten ergeben nicht die Rundenzeit")
+    return pack_sectors(sectors)
+
+def sector_scope(entry: dict) -> str:
+    """Scope a lap's sector deltas refer to: its track, or all laps without one"""
+    return f"track:{entry['track_id']}" if entry.get('track_id') else "global"
+
+async def record_sector_bests(entry: dict, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) one lap's sectors in the bests of its scopes"""
+    if not entry.get('sectors'):
+        return
+    sectors = unpack_sectors(entry['sectors'])
+    for scope in stats_scopes(entry):
+        await record_driver_sector_bests(scope, entry['driver_name'], sectors, sign)
+        bests = await db.sector_bests.find_one({"id": scope}, {"_id": 0}) or {}
+        if sign < 0:
+            if any(bests.get(f"s{idx}", {}).get('lap_id') == entry['id'] for idx in range(1, SECTOR_COUNT + 1)):
+                await rebuild_sector_bests(scope)
+            continue
+        update = {}
+        for idx, ms in enumerate(sectors, 1):
+            if ms < bests.get(f"s{idx}", {}).get('ms', SECTOR_MASK + 1):
+                update[f"s{idx}"] = {"ms": ms, "lap_id": entry['id'], "driver_name": entry['driver_name']}
+        if update:
+            await db.sector_bests.update_one({"id": scope}, {"$set": update}, upsert=True)
+
+async def rebuild_sector_bests(scope: str):
+    """Recompute one scope after a record-holding lap left it (admin edits only)"""
+    doc = {"id": scope}
+    query = {**stats_scope_query(scope), "sectors": {"$gt": 0}}
+    async for entry in db.lap_entries.find(query, {"_id": 0, "id": 1, "driver_name": 1, "sectors": 1}):
+        for idx, ms in enumerate(unpack_sectors(entry['sectors']), 1):
+            if ms < doc.get(f"s{idx}", {}).get('ms', SECTOR_MASK + 1):
+                doc[f"s{idx}"] = {"ms": ms, "lap_id": entry['id'], "driver_name": entry['driver_name']}
+    await db.sector_bests.replace_one({"id": scope}, doc, upsert=True)
+
+async def record_driver_sector_bests(scope: str, driver_name: str, sectors: Sequence[int], sign: int):
+    key = {"scope": scope, "driver_name": driver_name}
+    if sign > 0:
+        await db.driver_sector_bests.update_one(key, {"$min": {f"s{idx}": ms for idx, ms in enumerate(sectors, 1)}}, upsert=True)
+        return
+    own = await db.driver_sector_bests.find_one(key, {"_id": 0}) or {}
+    if not any(own.get(f"s{idx}") == ms for idx, ms in enumerate(sectors, 1)):
+        return
+    # The lap held one of the driver's bests, recompute them from the remaining laps
+    bests = {}
+    query = {**stats_scope_query(scope), "driver_name": driver_name, "sectors": {"$gt": 0}}
+    async for other in db.lap_entries.find(query, {"_id": 0, "sectors": 1}):
+        for idx, ms in enumerate(unpack_sectors(other['sectors']), 1):
+            bests[f"s{idx}"] = min(bests.get(f"s{idx}", ms), ms)
+    if bests:
+        await db.driver_sector_bests.replace_one(key, {**key, **bests})
+    else:
+        await db.driver_sector_bests.delete_one(key)
+
+def build_sector_response(bests: dict) -> dict:
+    sectors = []
+    for idx in range(1, SECTOR_COUNT + 1):
+        best = bests.get(f"s{idx}")
+        sectors.append({"sector": idx, "best_ms": best['ms'] if best else None,
+            "best_display": format_sector_time(best['ms']) if best else None,
+            "lap_id": best['lap_id'] if best else None, "driver_name": best['driver_name'] if best else None})
+    complete = all(s['best_ms'] for s in sectors)
+    theoretical = sum(s['best_ms'] for s in sectors) if complete else None
+    return {"sectors": sectors, "theoretical_best_ms": theoretical,
+        "theoretical_best_display": format_lap_time(theoretical) if theoretical else None}
+
+def annotate_sectors(entries: List[dict], bests_by_scope: dict, personal_bests: dict) -> List[dict]:
+    """Replace the packed sectors with sector_ms, deltas to the scope's best sectors
+    and flags: "purple" for the holder of the best sector, "green" for the
+    driver's personal best from driver_sector_bests."""
+    for entry in entries:
+        packed = entry.pop('sectors', None)
+        if not packed:
+            entry['sector_ms'] = entry['sector_deltas_ms'] = entry['sector_flags'] = None
+            continue
+        sectors = unpack_sectors(packed)
+        scope = sector_scope(entry)
+        bests = bests_by_scope.get(scope, {})
+        own = personal_bests.get((scope, entry['driver_name']), {})
+        entry['sector_ms'] = list(sectors)
+        entry['sector_deltas_ms'] = []
+        entry['sector_flags'] = []
+        for idx, ms in enumerate(sectors, 1):
+            best = bests.get(f"s{idx}", {})
+            entry['sector_deltas_ms'].append(ms - best.get('ms', ms))
+            entry['sector_flags'].append("purple" if best.get('lap_id') == entry['id'] else "green" if ms == own.get(f"s{idx}") else None)
+    return entries
+
+async def load_sector_bests() -> dict:
+    return {doc['id']: doc for doc in await db.sector_bests.find({}, {"_id": 0}).to_list(None)}
+
+async def load_personal_sector_bests(entries: List[dict]) -> dict:
+    """Stored personal bests of the drivers in entries, by (scope, driver_name)"""
+    drivers = list({entry['driver_name'] for entry in entries if entry.get('sectors')})
+    if not drivers:
+        return {}
+    docs = await db.driver_sector_bests.find({"driver_name": {"$in": drivers}}, {"_id": 0}).to_list(None)
+    return {(doc['scope'], doc['driver_name']): doc for doc in docs}
+
+# ============== TEAMS ==============
+
+TEAM_TOP_N = 3
+
+async def get_team_standings(top_n: int = TEAM_TOP_N) -> List[dict]:
+    """Team leaderboard ranked by the average of each team's top_n laps.
+
+    Teams with fewer than top_n laps are listed after the complete ones.
+    """
+    pipeline = [
+        {"$match": {"team": {"$nin": [None, ""]}}},
+        {"$sort": {"team": 1, "lap_time_ms": 1}},
+        {"$group": {
+            "_id": "$team",
+            "best_ms": {"$first": "$lap_time_ms"},
+            "best_driver": {"$first": "$driver_name"},
+            "times": {"$push": "$lap_time_ms"},
+            "members": {"$addToSet": "$driver_name"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "team": "$_id",
+            "best_ms": 1,
+            "best_driver": 1,
+            "lap_count": {"$size": "$times"},
+            "member_count": {"$size": "$members"},
+            "top_times": {"$slice": ["$times", top_n]},
+        }},
+    ]
+    teams = await db.lap_entries.aggregate(pipeline).to_list(None)
+
+    for team in teams:
+        top_times = team.pop('top_times')
+        team['top_avg_ms'] = round(sum(top_times) / len(top_times))
+        team['complete'] = team['lap_count'] >= top_n
+    teams.sort(key=lambda t: (not t['complete'], t['top_avg_ms'], t['best_ms']))
+
+    leader_avg = teams[0]['top_avg_ms'] if teams else 0
+    for idx, team in enumerate(teams):
+        team['rank'] = idx + 1
+        team['best_display'] = format_lap_time(team['best_ms'])
+        team['top_avg_display'] = format_lap_time(team['top_avg_ms'])
+        team['gap'] = format_gap(leader_avg, team['top_avg_ms'])
+    return teams
+
+async def get_cached_team_standings(top_n: int = TEAM_TOP_N) -> List[dict]:
+    return await cached(f"teams:{top_n}", ("leaderboard",), lambda: get_team_standings(top_n))
+
+# ============== EVENT STATUS ==============
+
+async def load_design_settings() -> dict:
+    return await load_settings("design_settings", "design_settings", DesignSettings)
+
+async def load_event_settings() -> tuple:
+    """Current event settings and the document of its track"""
+    settings = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0})
+    track = None
+    if settings and settings.get('track_id'):
+        track = await db.tracks.find_one({"id": settings['track_id']}, {"_id": 0})
+    return settings, track
+
+def event_timer(settings: Optional[dict]) -> tuple:
+    """Remaining seconds and end time of the event timer, if running"""
+    timer_remaining = None
+    timer_end = None
+    if settings and settings.get('timer_enabled') and settings.get('timer_end_time'):
+        try:
+            end_time = datetime.fromisoformat(settings['timer_end_time'].replace('Z', '+00:00'))
+            now = datetime.now(timezone.utc)
+            if end_time > now:
+                timer_remaining = int((end_time - now).total_seconds())
+                timer_end = settings['timer_end_time']
+            elif settings.get('status') == 'active':
+                # Timer expired, should close
+                timer_remaining = 0
+        except:
+            pass
+    return timer_remaining, timer_end
+
+def build_event_status(settings: Optional[dict], track: Optional[dict]) -> dict:
+    track_info = None
+    if track:
+        track_info = {
+            "id": track['id'],
+            "name": track['name'],
+            "country": track['country'],
+            "image_url": track.get('image_url'),
+            "full_name": f"{track['name']}, {track['country']}"
+        }
+    
+    status = settings.get('status', 'inactive') if settings else 'inactive'
+    message = ""
+    
+    timer_remaining, timer_end = event_timer(settings)
+    
+    if status == "inactive":
+        message = "Momentan kein Rennen"
+    elif status == "scheduled":
+        date = settings.get('scheduled_date', '') if settings else ''
+        time = settings.get('scheduled_time', '') if settings else ''
+        track_text = f" auf {track_info['full_name']}" if track_info else ""
+        message = f"Fast Lap Challenge beginnt am {date} um {time}{track_text}"
+    elif status == "active":
+        message = f"Fast Lap Challenge läuft{' auf ' + track_info['full_name'] if track_info else ''}"
+    elif status == "finished":
+        message = "Fast Lap Challenge abgeschlossen - Endergebnis"
+    
+    return {
+        "status": status,
+        "scheduled_time": settings.get('scheduled_time') if settings else None,
+        "scheduled_date": settings.get('scheduled_date') if settings else None,
+        "track": track_info,
+        "message": message,
+        "timer_enabled": settings.get('timer_enabled', False) if settings else False,
+        "timer_duration_minutes": settings.get('timer_duration_minutes', 60) if settings else 60,
+        "timer_remaining_seconds": timer_remaining,
+        "timer_end_time": timer_end
+    }
+
+# ============== KIOSK ==============
+
+KIOSK_DEFAULT_LIMIT = 20
+
+async def build_kiosk_payload(limit: int) -> tuple:
+    """Serialize the kiosk payload once per data version; returns (body, etag, event settings)"""
+    design = await load_design_settings()
+    settings, track = await load_event_settings()
+    status = build_event_status(settings, track)
+    for key in ("timer_remaining_seconds", "timer_end_time"):
+        status.pop(key)
+    entries = await db.lap_entries.find({}, {"_id": 0, "email": 0}).sort("rank", 1).limit(limit).to_list(limit)
+    annotate_sectors(entries, await load_sector_bests(), await load_personal_sector_bests(entries))
+    total = await db.lap_entries.count_documents({})
+    
+    # The end time only changes with the event settings; what is left of it is sent per response
+    timer_end = settings.get('timer_end_time') if settings and settings.get('timer_enabled') else None
+    payload = {"design": design, "status": status, "track": status['track'], "entries": entries, "total_entries": total,
+               "timer_end_time": timer_end}
+    body = orjson.dumps(payload, default=str)
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    return body, etag, settings
+
+# ============== LAP WRITES ==============
+# Shared by the admin routes and automatic capture from telemetry
+
+async def current_track_id() -> Optional[str]:
+    event = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0, "track_id": 1})
+    return event.get('track_id') if event else None
+
+async def insert_lap(lap_entry: LapEntry) -> dict:
+    doc = lap_entry.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    
+    async with rankings_lock:
+        leader_before = await get_leader_time()
+        await db.lap_entries.insert_one(doc)
+        # Every lap at or behind the new time moves down one place
+        await update_rankings(leader_before, start_ms=lap_entry.lap_time_ms)
+        await record_lap_stats(doc)
+        await record_sector_bests(doc)
+    await bump_version("leaderboard")
+    
+    return await db.lap_entries.find_one({"id": lap_entry.id}, {"_id": 0})
+
+async def update_lap(entry: dict, update_data: dict):
+    """Apply update_data to the stored lap entry and re-rank the affected range"""
+    async with rankings_lock:
+        leader_before = await get_leader_time()
+        await db.lap_entries.update_one({"id": entry['id']}, {"$set": update_data})
+        if 'lap_time_ms' in update_data:
+            # Only laps between the old and the new time change places
+            old_ms, new_ms = entry['lap_time_ms'], update_data['lap_time_ms']
+            await update_rankings(leader_before, start_ms=min(old_ms, new_ms), end_ms=max(old_ms, new_ms))
+        if 'lap_time_ms' in update_data or 'team' in update_data:
+            await record_lap_stats(entry, -1)
+            await record_lap_stats({**entry, **update_data})
+        if 'sectors' in update_data or 'driver_name' in update_data:
+            await record_sector_bests(entry, -1)
+            await record_sector_bests({**entry, **update_data})
+    await bump_version("leaderboard")
+
+# ============== STARTUP TASKS ==============
+
+async def prepare_lap_rankings():
+    """Index lap times and backfill rank/gap for laps stored before they were materialized"""
+    await db.lap_entries.create_index("lap_time_ms")
+    await db.lap_entries.create_index("rank")
+    # Rank/gap updates and the admin routes address laps by id
+    await db.lap_entries.create_index("id")
+    if await db.lap_entries.find_one({"rank": {"$exists": False}}, {"_id": 0, "id": 1}):
+        async with rankings_lock:
+            await update_rankings(None)
+        await bump_version("leaderboard")
+        logging.info("Ranglisten-Positionen neu berechnet")
+
+async def prepare_lap_stats():
+    """Build the statistics aggregates once for laps stored before they existed"""
+    await db.lap_entries.create_index("track_id")
+    await db.lap_entries.create_index([("team", 1), ("lap_time_ms", 1)])
+    await db.driver_sector_bests.create_index([("driver_name", 1), ("scope", 1)], unique=True)
+    if not await db.lap_stats.find_one({"id": "global"}, {"_id": 0, "id": 1}) and await db.lap_entries.find_one({}, {"_id": 0, "id": 1}):
+        async with rankings_lock:
+            await rebuild_lap_stats()
+        await bump_version("leaderboard")
+        logging.info("Statistiken neu berechnet")
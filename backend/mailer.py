@@ -0,0 +1,158 @@
+"""Results email rendering and SMTP delivery"""
+import logging
+from typing import List, Optional, Dict
+from datetime import datetime
+import asyncio
+import re
+
+from database import db
+from models import DesignSettings, EmailTemplate
+
+RANK_COLORS = {1: "#FFD700", 2: "#C0C0C0", 3: "#CD7F32"}
+TEMPLATE_VARIABLE = re.compile(r"\{(\w+)\}")
+
+def render_results_rows(entries: List[dict]) -> str:
+    """HTML table rows for the results email"""
+    if not entries:
+        return "<tr><td colspan='3' style='padding: 10px; color: #666;'>Keine Ergebnisse</td></tr>"
+    
+    return "\n".join(
+        f'<tr><td style="padding: 10px; color: {RANK_COLORS.get(entry["rank"], "#FFFFFF")}; font-weight: bold;">{entry["rank"]}</td><td style="padding: 10px; color: #FFF;">{entry["driver_name"]}</td><td style="padding: 10px; color: #00F0FF; font-family: monospace;">{entry["lap_time_display"]} <span style="color: #666;">{entry["gap"]}</span></td></tr>'
+        for entry in entries
+    )
+
+def render_template(template: str, values: Dict[str, str]) -> str:
+    """Substitute {name} placeholders in one pass; unknown ones (e.g. {participant_name}) are kept"""
+    return TEMPLATE_VARIABLE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+
+async def get_results_table_html() -> str:
+    """Generate HTML table rows for results"""
+    entries = await db.lap_entries.find({}, {"_id": 0}).sort("rank", 1).to_list(1000)
+    return render_results_rows(entries)
+
+async def replace_template_variables(template: str, subject: bool = False) -> str:
+    """Replace template variables with actual values"""
+    design = await db.design_settings.find_one({"id": "design_settings"}, {"_id": 0})
+    if not design:
+        design = DesignSettings().model_dump()
+    
+    event = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0})
+    track_name = "Unbekannt"
+    if event and event.get('track_id'):
+        track = await db.tracks.find_one({"id": event['track_id']}, {"_id": 0})
+        if track:
+            track_name = f"{track['name']}, {track['country']}"
+    
+    email_tpl = await db.email_template.find_one({"id": "email_template"}, {"_id": 0})
+    custom_footer = email_tpl.get('custom_footer', '') if email_tpl else ''
+    
+    event_title = f"{design.get('title_line1', 'F1')} {design.get('title_line2', 'FAST LAP')} {design.get('title_line3', 'CHALLENGE')}"
+    
+    # Get top 3 for quick reference
+    entries = await db.lap_entries.find({}, {"_id": 0}).sort("rank", 1).to_list(3)
+    
+    values = {
+        "event_title": event_title,
+        "title_color": design.get('primary_color', '#FF1E1E'),
+        "track_name": track_name,
+        "first_place": entries[0]['driver_name'] if len(entries) > 0 else "-",
+        "first_time": entries[0]['lap_time_display'] if len(entries) > 0 else "-",
+        "second_place": entries[1]['driver_name'] if len(entries) > 1 else "-",
+        "third_place": entries[2]['driver_name'] if len(entries) > 2 else "-",
+        "date": datetime.now().strftime("%d.%m.%Y"),
+        "time": datetime.now().strftime("%H:%M"),
+    }
+    # The footer may use the other variables itself
+    values["custom_footer"] = render_template(custom_footer, values)
+    values["results_table"] = await get_results_table_html() if not subject else ""
+    
+    return render_template(template, values)
+
+# smtplib and email.mime are only needed when mail is actually sent, so they
+# are imported in the delivery helpers instead of at startup.
+def deliver_results_emails(smtp_settings: dict, recipients: List[dict], subject: str, body: str):
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    from_name = smtp_settings.get('from_name', 'F1 Fast Lap Challenge')
+    from_email = smtp_settings['from_email']
+    
+    with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
+        server.starttls()
+        server.login(smtp_settings['username'], smtp_settings['password'])
+        
+        for recipient in recipients:
+            try:
+                msg = MIMEMultipart('alternative')
+                msg['Subject'] = subject
+                msg['From'] = f"{from_name} <{from_email}>"
+                msg['To'] = recipient['email']
+                
+                # Personalize body
+                personalized_body = body.replace("{participant_name}", recipient['name'])
+                msg.attach(MIMEText(personalized_body, 'html'))
+                
+                server.send_message(msg)
+                logging.info(f"Email sent to {recipient['email']}")
+            except Exception as e:
+                logging.error(f"Failed to send to {recipient['email']}: {e}")
+
+def deliver_test_email(smtp_settings: dict, recipient_email: str):
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = "🏎️ Test E-Mail - F1 Fast Lap Challenge"
+    msg['From'] = f"{smtp_settings.get('from_name', 'F1 Challenge')} <{smtp_settings['from_email']}>"
+    msg['To'] = recipient_email
+    msg.attach(MIMEText("<h1 style='color: #FF1E1E;'>✅ Test erfolgreich!</h1><p>SMTP funktioniert korrekt.</p>", 'html'))
+    
+    with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
+        server.starttls()
+        server.login(smtp_settings['username'], smtp_settings['password'])
+        server.send_message(msg)
+
+async def send_results_email(participant_ids: Optional[List[str]] = None):
+    """Send results email to participants and lap entry emails"""
+    try:
+        smtp_settings = await db.smtp_settings.find_one({"id": "smtp_settings"}, {"_id": 0})
+        if not smtp_settings or not smtp_settings.get('enabled'):
+            logging.info("SMTP not enabled, skipping email")
+            return
+        
+        email_tpl = await db.email_template.find_one({"id": "email_template"}, {"_id": 0})
+        if not email_tpl:
+            email_tpl = EmailTemplate().model_dump()
+        
+        # Collect all email recipients from both participants and lap_entries
+        recipients = []
+        
+        # Get participants (legacy system)
+        query = {"id": {"$in": participant_ids}} if participant_ids else {}
+        participants = await db.participants.find(query, {"_id": 0}).to_list(1000)
+        for p in participants:
+            if p.get('email'):
+                recipients.append({"name": p.get('name', 'Teilnehmer'), "email": p['email']})
+        
+        # Get emails from lap_entries (new system)
+        lap_entries = await db.lap_entries.find({"email": {"$exists": True, "$ne": None, "$ne": ""}}, {"_id": 0}).to_list(1000)
+        for entry in lap_entries:
+            if entry.get('email') and entry['email'] not in [r['email'] for r in recipients]:
+                recipients.append({"name": entry.get('driver_name', 'Fahrer'), "email": entry['email']})
+        
+        if not recipients:
+            logging.info("No recipients with email addresses found")
+            return
+        
+        logging.info(f"Sending results to {len(recipients)} recipients")
+        
+        subject = await replace_template_variables(email_tpl['subject'], subject=True)
+        body = await replace_template_variables(email_tpl['body_html'])
+        
+        # smtplib blocks on the network, run the whole session in a worker thread
+        await asyncio.to_thread(deliver_results_emails, smtp_settings, recipients, subject, body)
+        
+    except Exception as e:
+        logging.error(f"Failed to send results emails: {e}")
@@ -0,0 +1,297 @@
+"""Pydantic request and response models"""
+from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional, Tuple
+import uuid
+from datetime import datetime, timezone
+
+# ============== MODELS ==============
+
+class AdminUser(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    username: str
+    email: Optional[str] = None
+    password_hash: str
+    notifications_enabled: bool = False
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class AdminSetup(BaseModel):
+    username: str
+    email: Optional[str] = None
+    password: str
+
+class AdminLogin(BaseModel):
+    username: str
+    password: str
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
+class AdminUpdate(BaseModel):
+    email: Optional[str] = None
+    notifications_enabled: Optional[bool] = None
+
+class SmtpSettings(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = "smtp_settings"
+    host: str = ""
+    port: int = 587
+    username: str = ""
+    password: str = ""
+    from_email: str = ""
+    from_name: str = "F1 Fast Lap Challenge"
+    enabled: bool = False
+
+class SmtpSettingsUpdate(BaseModel):
+    host: Optional[str] = None
+    port: Optional[int] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+    from_email: Optional[str] = None
+    from_name: Optional[str] = None
+    enabled: Optional[bool] = None
+
+class EmailTemplate(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = "email_template"
+    subject: str = "🏎️ {event_title} - Ergebnisse"
+    body_html: str = """<html>
+<body style="font-family: Arial, sans-serif; background-color: #0A0A0A; color: #FFFFFF; padding: 20px;">
+<div style="max-width: 600px; margin: 0 auto; background-color: #1A1A1A; border-radius: 12px; padding: 30px; border: 1px solid #333;">
+<h1 style="color: {title_color}; margin: 0 0 20px 0;">{event_title}</h1>
+<p style="color: #A0A0A0;">Die Challenge ist beendet! Hier sind die Ergebnisse:</p>
+
+<h2 style="color: #FFD700;">🏆 Endergebnis</h2>
+<table style="width: 100%; border-collapse: collapse; margin: 20px 0;">
+<tr style="background: #333;"><th style="padding: 10px; text-align: left; color: #A0A0A0;">Platz</th><th style="padding: 10px; text-align: left; color: #A0A0A0;">Fahrer</th><th style="padding: 10px; text-align: left; color: #A0A0A0;">Zeit</th></tr>
+{results_table}
+</table>
+
+<p style="color: #A0A0A0; margin-top: 30px;">Strecke: {track_name}</p>
+<p style="color: #666; font-size: 12px; margin-top: 20px;">{custom_footer}</p>
+</div>
+</body>
+</html>"""
+    custom_footer: str = "Danke fürs Mitmachen! Bis zum nächsten Mal."
+    send_on_finish: bool = True
+
+class EmailTemplateUpdate(BaseModel):
+    subject: Optional[str] = None
+    body_html: Optional[str] = None
+    custom_footer: Optional[str] = None
+    send_on_finish: Optional[bool] = None
+
+class Participant(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    email: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class ParticipantCreate(BaseModel):
+    name: str
+    email: str
+
+class DesignSettings(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = "design_settings"
+    # Title
+    title_line1: str = "F1"
+    title_line2: str = "FAST LAP"
+    title_line3: str = "CHALLENGE"
+    title_color1: str = "#FFFFFF"
+    title_color2: str = "#FF1E1E"
+    title_color3: str = "#FFFFFF"
+    title_font: str = "Russo One"
+    # Colors
+    bg_color: str = "#0A0A0A"
+    surface_color: str = "#1A1A1A"
+    primary_color: str = "#FF1E1E"
+    accent_color: str = "#00F0FF"
+    text_color: str = "#FFFFFF"
+    text_secondary: str = "#A0A0A0"
+    # Fonts
+    heading_font: str = "Russo One"
+    body_font: str = "Barlow"
+    time_font: str = "JetBrains Mono"
+    # Rank colors
+    gold_color: str = "#FFD700"
+    silver_color: str = "#C0C0C0"
+    bronze_color: str = "#CD7F32"
+    # Background
+    bg_image_url: str = ""
+    bg_overlay_opacity: float = 0.85
+    # Status colors
+    status_inactive_color: str = "#525252"
+    status_scheduled_color: str = "#FFA500"
+    status_active_color: str = "#00FF00"
+    status_finished_color: str = "#FF1E1E"
+    # Browser/Site settings
+    site_title: str = "F1 Fast Lap Challenge"
+    favicon_url: str = ""
+    show_badge: bool = False
+
+class DesignSettingsUpdate(BaseModel):
+    title_line1: Optional[str] = None
+    title_line2: Optional[str] = None
+    title_line3: Optional[str] = None
+    title_color1: Optional[str] = None
+    title_color2: Optional[str] = None
+    title_color3: Optional[str] = None
+    title_font: Optional[str] = None
+    bg_color: Optional[str] = None
+    surface_color: Optional[str] = None
+    primary_color: Optional[str] = None
+    accent_color: Optional[str] = None
+    text_color: Optional[str] = None
+    text_secondary: Optional[str] = None
+    heading_font: Optional[str] = None
+    body_font: Optional[str] = None
+    time_font: Optional[str] = None
+    gold_color: Optional[str] = None
+    silver_color: Optional[str] = None
+    bronze_color: Optional[str] = None
+    bg_image_url: Optional[str] = None
+    bg_overlay_opacity: Optional[float] = None
+    status_inactive_color: Optional[str] = None
+    status_scheduled_color: Optional[str] = None
+    status_active_color: Optional[str] = None
+    status_finished_color: Optional[str] = None
+    site_title: Optional[str] = None
+    favicon_url: Optional[str] = None
+    show_badge: Optional[bool] = None
+
+class CutZone(BaseModel):
+    """Area beside the track (game world x/z in metres); a captured lap driving into it is rejected"""
+    name: str
+    points: List[Tuple[float, float]] = Field(min_length=3)
+
+class Track(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    country: str
+    image_url: Optional[str] = None
+    length_km: Optional[float] = None
+    cut_zones: List[CutZone] = []
+
+class TrackCreate(BaseModel):
+    name: str
+    country: str
+    image_url: Optional[str] = None
+    length_km: Optional[float] = None
+
+class EventSettings(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = "current_event"
+    status: str = "inactive"
+    scheduled_time: Optional[str] = None
+    scheduled_date: Optional[str] = None
+    track_id: Optional[str] = None
+    # Timer
+    timer_enabled: bool = False
+    timer_duration_minutes: int = 60
+    timer_start_time: Optional[str] = None
+    timer_end_time: Optional[str] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class EventUpdate(BaseModel):
+    status: str
+    scheduled_time: Optional[str] = None
+    scheduled_date: Optional[str] = None
+    track_id: Optional[str] = None
+    timer_enabled: Optional[bool] = None
+    timer_duration_minutes: Optional[int] = None
+
+class LapEntry(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    driver_name: str
+    team: Optional[str] = None
+    email: Optional[str] = None
+    lap_time_ms: int
+    lap_time_display: str
+    track_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Materialized leaderboard position, maintained by update_rankings()
+    rank: int = 0
+    gap: str = ""
+    # Sector 1/2/3 in ms packed into one integer, see pack_sectors()
+    sectors: Optional[int] = None
+    # Samples in the lap's trace file (traces.py), None without a trace
+    trace_samples: Optional[int] = None
+
+class LapEntryCreate(BaseModel):
+    driver_name: str
+    team: Optional[str] = None
+    email: Optional[str] = None
+    lap_time_display: str
+    sector_times: Optional[List[str]] = None  # ["28.123", "31.456", "25.000"]
+
+class LapEntryUpdate(BaseModel):
+    driver_name: Optional[str] = None
+    team: Optional[str] = None
+    email: Optional[str] = None
+    lap_time_display: Optional[str] = None
+    sector_times: Optional[List[str]] = None  # [] removes the sectors
+
+class LapEntryResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    driver_name: str
+    team: Optional[str]
+    email: Optional[str] = None
+    lap_time_ms: int
+    lap_time_display: str
+    track_id: Optional[str] = None
+    created_at: str
+    rank: int = 0
+    gap: str = ""
+    sector_ms: Optional[List[int]] = None
+    sector_deltas_ms: Optional[List[int]] = None
+    sector_flags: Optional[List[Optional[str]]] = None
+    trace_samples: Optional[int] = None
+
+class Rig(BaseModel):
+    """Simulator sending game telemetry, registered automatically by its IP address"""
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    address: str
+    name: str
+    # Driver currently seated; captured laps are entered under this name
+    driver_name: Optional[str] = None
+    team: Optional[str] = None
+    email: Optional[str] = None
+    # Leaderboard entry holding the driver's best captured lap
+    lap_id: Optional[str] = None
+    last_seen: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class RigUpdate(BaseModel):
+    name: Optional[str] = None
+    driver_name: Optional[str] = None
+    team: Optional[str] = None
+    email: Optional[str] = None
+
+class RejectedLap(BaseModel):
+    """Captured lap held back by a track limit rule until an admin approves or deletes it"""
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    rig_id: str
+    rig_name: str
+    driver_name: str
+    team: Optional[str] = None
+    email: Optional[str] = None
+    lap_time_ms: int
+    lap_time_display: str
+    sectors: Optional[int] = None
+    track_id: Optional[str] = None
+    reason: str
+    # Leaderboard entry of the driver at the time, improved on approval
+    lap_entry_id: Optional[str] = None
+    trace_samples: Optional[int] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class SendEmailRequest(BaseModel):
+    participant_ids: Optional[List[str]] = None  # None = send to all
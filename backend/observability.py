@@ -0,0 +1,293 @@
+"""Prometheus metrics, sampling profiler and event loop watchdog"""
+from fastapi import Request
+from pymongo import monitoring
+import logging
+from pathlib import Path
+from typing import List, Optional, Dict
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+import sys
+from collections import Counter
+
+from config import (
+    LOOP_BLOCK_THRESHOLD_MS, LOOP_WATCHDOG_ENABLED, ROLLING_PROFILE_HANDLERS,
+    ROLLING_PROFILE_INTERVAL_MS, ROLLING_PROFILE_WINDOW_SECONDS, ROOT_DIR, SLOW_QUERY_MS
+)
+
+# ============== METRICS ==============
+# In-process counters exposed in Prometheus text format on /api/admin/metrics.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+metrics_lock = threading.Lock()
+http_latency: Dict[tuple, Histogram] = {}
+http_requests: Dict[tuple, int] = {}
+request_mongo_commands: Dict[tuple, Histogram] = {}
+request_mongo_seconds: Dict[tuple, Histogram] = {}
+mongo_commands: Dict[tuple, list] = {}  # (command, collection) -> [count, seconds, documents, slow]
+
+# Mongo usage of the request being handled; Motor copies the context into its executor threads
+request_mongo = contextvars.ContextVar("request_mongo", default=None)
+
+def observe(histograms: Dict[tuple, Histogram], key: tuple, value: float, buckets: tuple):
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = Histogram(buckets)
+    histogram.observe(value)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts Mongo commands per collection and per request, and flags slow ones"""
+
+    def __init__(self):
+        self.pending = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self.pending[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event):
+        documents = 0
+        cursor = event.reply.get("cursor") if isinstance(event.reply, dict) else None
+        if cursor:
+            documents = len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+        self.record(event, documents)
+
+    def failed(self, event):
+        self.record(event, 0)
+
+    def record(self, event, documents: int):
+        collection = self.pending.pop(event.request_id, "")
+        seconds = event.duration_micros / 1e6
+        slow = seconds * 1000 >= SLOW_QUERY_MS
+        with metrics_lock:
+            totals = mongo_commands.setdefault((event.command_name, collection), [0, 0.0, 0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += documents
+            totals[3] += slow
+            usage = request_mongo.get()
+            if usage is not None:
+                usage[0] += 1
+                usage[1] += seconds
+        if slow:
+            logging.warning(f"Langsame Mongo-Abfrage: {event.command_name} {collection} {seconds * 1000:.0f} ms")
+
+def render_metrics() -> str:
+    lines = []
+    with metrics_lock:
+        lines += ["# HELP f1_http_requests_total HTTP requests by route and status", "# TYPE f1_http_requests_total counter"]
+        for (method, route, status), count in sorted(http_requests.items()):
+            lines.append(f'f1_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+        for name, histograms, help_text in (
+            ("f1_http_request_duration_seconds", http_latency, "Request latency by route"),
+            ("f1_mongo_commands_per_request", request_mongo_commands, "Mongo commands issued per request"),
+            ("f1_mongo_seconds_per_request", request_mongo_seconds, "Time spent in Mongo per request"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), histogram in sorted(histograms.items()):
+                lines += histogram.render(name, f'method="{method}",route="{route}"')
+        for name, idx, help_text in (
+            ("f1_mongo_commands_total", 0, "Mongo commands by collection"),
+            ("f1_mongo_command_seconds_total", 1, "Time spent in Mongo commands"),
+            ("f1_mongo_documents_returned_total", 2, "Documents returned by find/aggregate"),
+            ("f1_mongo_slow_commands_total", 3, f"Mongo commands slower than {SLOW_QUERY_MS:g} ms"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (command, collection), totals in sorted(mongo_commands.items()):
+                value = f"{totals[idx]:.6f}" if idx == 1 else totals[idx]
+                lines.append(f'{name}{{command="{command}",collection="{collection}"}} {value}')
+        if LOOP_WATCHDOG_ENABLED:
+            lines += loop_watchdog.render()
+    return "\n".join(lines) + "\n"
+
+mongo_listener = MongoCommandListener()
+
+# ============== PROFILER ==============
+# Sampling profiler: a helper thread reads the event loop thread's current stack
+# via sys._current_frames() and counts collapsed stacks (flamegraph.pl /
+# speedscope input format). The sampled thread is never interrupted.
+
+PROFILE_MAX_SECONDS = 60
+
+def collapse_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def is_idle(frame) -> bool:
+    """The loop waiting in select() for I/O"""
+    return frame.f_code.co_name == "select" and frame.f_code.co_filename.endswith("selectors.py")
+
+def sample_thread(thread_id: int, seconds: float, interval: float, include_idle: bool = False) -> Counter:
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None and (include_idle or not is_idle(frame)):
+            stacks[collapse_stack(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+def render_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+class RollingProfiler:
+    """Continuously samples the loop thread and keeps per-handler stacks of the last two windows"""
+
+    def __init__(self, handlers: List[str], window_seconds: int, interval_ms: float):
+        self.handlers = set(handlers)
+        self.window_seconds = window_seconds
+        self.interval = interval_ms / 1000
+        self.lock = threading.Lock()
+        self.current = {h: Counter() for h in self.handlers}
+        self.previous = {h: Counter() for h in self.handlers}
+        self.thread = None
+
+    def start(self, thread_id: int):
+        self.thread = threading.Thread(target=self.run, args=(thread_id,), name="rolling-profiler", daemon=True)
+        self.thread.start()
+
+    def run(self, thread_id: int):
+        window_end = time.monotonic() + self.window_seconds
+        while True:
+            frame = sys._current_frames().get(thread_id)
+            handler = self.handler_of(frame)
+            if handler:
+                stack = collapse_stack(frame)
+                with self.lock:
+                    self.current[handler][stack] += 1
+            if time.monotonic() >= window_end:
+                with self.lock:
+                    self.previous = self.current
+                    self.current = {h: Counter() for h in self.handlers}
+                window_end = time.monotonic() + self.window_seconds
+            time.sleep(self.interval)
+
+    def handler_of(self, frame) -> Optional[str]:
+        while frame is not None:
+            if frame.f_code.co_name in self.handlers:
+                return frame.f_code.co_name
+            frame = frame.f_back
+        return None
+
+    def snapshot(self, handler: str) -> Counter:
+        with self.lock:
+            return self.previous.get(handler, Counter()) + self.current.get(handler, Counter())
+
+rolling_profiler = RollingProfiler(ROLLING_PROFILE_HANDLERS, ROLLING_PROFILE_WINDOW_SECONDS, ROLLING_PROFILE_INTERVAL_MS)
+
+# ============== EVENT LOOP WATCHDOG ==============
+
+class LoopWatchdog:
+    """Measures event loop lag and captures the stack of callbacks that block it.
+
+    A heartbeat task on the loop refreshes a timestamp every interval. A helper
+    thread notices when the timestamp gets older than the threshold, i.e. the
+    loop is stuck in one callback, and records the blocking call site while it
+    is still running.
+    """
+
+    def __init__(self, threshold_ms: float, interval: float = 0.05):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self.heartbeat = time.monotonic()
+        self.lag = Histogram(LATENCY_BUCKETS)
+        self.blocked = Counter()
+
+    async def beat(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.heartbeat = time.monotonic()
+            with metrics_lock:
+                self.lag.observe(max(0.0, self.heartbeat - start - self.interval))
+
+    def watch(self, thread_id: int):
+        reported = None
+        while True:
+            time.sleep(self.interval)
+            heartbeat = self.heartbeat
+            if heartbeat == reported or time.monotonic() - heartbeat < self.interval + self.threshold:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(thread_id)
+            if frame is None or is_idle(frame):
+                continue
+            site = self.call_site(frame)
+            with metrics_lock:
+                self.blocked[site] += 1
+            logging.warning(f"Event-Loop blockiert (> {self.threshold * 1000:.0f} ms) in {site}: {collapse_stack(frame)}")
+
+    @staticmethod
+    def call_site(frame) -> str:
+        """Innermost frame in our own code, otherwise the innermost frame"""
+        leaf = frame
+        while frame is not None:
+            if frame.f_code.co_filename.startswith(str(ROOT_DIR)):
+                return f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})"
+            frame = frame.f_back
+        return f"{leaf.f_code.co_name} ({Path(leaf.f_code.co_filename).name}:{leaf.f_lineno})"
+
+    def start(self):
+        asyncio.get_running_loop().create_task(self.beat())
+        threading.Thread(target=self.watch, args=(threading.get_ident(),), name="loop-watchdog", daemon=True).start()
+
+    def render(self) -> List[str]:
+        lines = ["# HELP f1_event_loop_lag_seconds Delay of the event loop heartbeat", "# TYPE f1_event_loop_lag_seconds histogram"]
+        lines += self.lag.render("f1_event_loop_lag_seconds", 'loop="main"')
+        lines += [f"# HELP f1_event_loop_blocked_total Loop stalls over {self.threshold * 1000:g} ms by call site", "# TYPE f1_event_loop_blocked_total counter"]
+        for site, count in sorted(self.blocked.items()):
+            lines.append(f'f1_event_loop_blocked_total{{site="{site}"}} {count}')
+        return lines
+
+loop_watchdog = LoopWatchdog(LOOP_BLOCK_THRESHOLD_MS)
+
+# ============== REQUEST METRICS ==============
+
+async def record_request_metrics(request: Request, call_next):
+    usage = [0, 0.0]
+    request_mongo.set(usage)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        key = (request.method, route.path if route else "unmatched")
+        with metrics_lock:
+            observe(http_latency, key, time.perf_counter() - start, LATENCY_BUCKETS)
+            observe(request_mongo_commands, key, usage[0], COUNT_BUCKETS)
+            observe(request_mongo_seconds, key, usage[1], LATENCY_BUCKETS)
+            http_requests[(*key, status)] = http_requests.get((*key, status), 0) + 1
@@ -0,0 +1,16 @@
+"""
+F1 Fast Lap Challenge - Public Read App
+Only the endpoints spectators and kiosk displays poll (leaderboard, design,
+event status, tracks, ...). It never imports the mail, export or upload code,
+so it can run in its own worker pool next to server.py:
+
+    uvicorn public_app:app --port 8002
+
+Caches stay consistent with the admin app through the cache bus, so
+CACHE_BUS_ENABLED=1 must be set on both.
+"""
+from application import create_app
+from cache import start_cache_bus
+from routes_public import public_router
+
+app = create_app([public_router], startup_tasks=(start_cache_bus,))
@@ -0,0 +1,528 @@
+"""Admin endpoints: auth, settings, laps, participants, exports, uploads"""
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, UploadFile, File, Query
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from pathlib import Path
+from pydantic import BaseModel
+from typing import List, Optional
+import uuid
+from datetime import datetime, timezone, timedelta
+import io
+import asyncio
+import threading
+
+from config import UPLOAD_DIR
+from observability import (
+    PROFILE_MAX_SECONDS, render_collapsed, render_metrics, rolling_profiler, sample_thread
+)
+from database import db
+from models import (
+    AdminLogin, AdminSetup, AdminUpdate, AdminUser, CutZone, DesignSettingsUpdate, EmailTemplate,
+    EmailTemplateUpdate, EventUpdate, LapEntry, LapEntryCreate, LapEntryResponse, LapEntryUpdate,
+    Participant, ParticipantCreate, PasswordChange, RigUpdate, SendEmailRequest, SmtpSettings,
+    SmtpSettingsUpdate, Track, TrackCreate
+)
+from auth import check_password, create_token, get_current_admin, hash_password
+from cache import bump_version
+from leaderboard import (
+    TEAM_TOP_N, annotate_sectors, current_track_id, get_cached_team_standings, get_leader_time, insert_lap,
+    load_personal_sector_bests, load_sector_bests, parse_lap_time, parse_sector_times, rankings_lock, record_lap_stats,
+    record_sector_bests, unpack_sectors, update_lap, update_rankings
+)
+from mailer import deliver_test_email, replace_template_variables, send_results_email
+from settings import design_writer, email_template_writer, load_settings, smtp_writer
+from telemetry.ingest import enter_lap
+from traces import delete_all_traces, delete_trace, open_trace
+
+admin_router = APIRouter(prefix="/api")
+
+# ============== AUTH ROUTES ==============
+
+@admin_router.get("/auth/has-admin")
+async def has_admin():
+    existing = await db.admins.find_one({}, {"_id": 0})
+    return {"has_admin": existing is not None}
+
+@admin_router.post("/auth/setup")
+async def setup_admin(admin: AdminSetup):
+    existing = await db.admins.find_one({}, {"_id": 0})
+    if existing:
+        raise HTTPException(status_code=400, detail="Admin existiert bereits")
+    
+    if len(admin.password) < 4:
+        raise HTTPException(status_code=400, detail="Passwort muss mindestens 4 Zeichen haben")
+    
+    password_hash = await hash_password(admin.password)
+    admin_user = AdminUser(username=admin.username, email=admin.email, password_hash=password_hash, notifications_enabled=bool(admin.email))
+    doc = admin_user.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    await db.admins.insert_one(doc)
+    
+    return {"token": create_token(admin.username), "username": admin.username, "email": admin.email}
+
+@admin_router.post("/auth/login")
+async def login(credentials: AdminLogin):
+    admin = await db.admins.find_one({"username": credentials.username}, {"_id": 0})
+    if not admin or not await check_password(credentials.password, admin['password_hash']):
+        raise HTTPException(status_code=401, detail="Ungültige Anmeldedaten")
+    return {
+        "token": create_token(credentials.username), 
+        "username": admin['username'], 
+        "email": admin.get('email'),
+        "must_change_password": admin.get('must_change_password', False)
+    }
+
+@admin_router.get("/auth/check")
+async def check_auth(admin = Depends(get_current_admin)):
+    admin_doc = await db.admins.find_one({"username": admin['username']}, {"_id": 0})
+    return {
+        "authenticated": True, 
+        "username": admin['username'],
+        "email": admin_doc.get('email') if admin_doc else None,
+        "notifications_enabled": admin_doc.get('notifications_enabled', False) if admin_doc else False,
+        "must_change_password": admin_doc.get('must_change_password', False) if admin_doc else False
+    }
+
+# ============== ADMIN ROUTES ==============
+
+@admin_router.put("/admin/password")
+async def change_password(data: PasswordChange, admin = Depends(get_current_admin)):
+    admin_doc = await db.admins.find_one({"username": admin['username']}, {"_id": 0})
+    if not admin_doc or not await check_password(data.current_password, admin_doc['password_hash']):
+        raise HTTPException(status_code=400, detail="Aktuelles Passwort falsch")
+    
+    new_hash = await hash_password(data.new_password)
+    await db.admins.update_one(
+        {"username": admin['username']}, 
+        {"$set": {"password_hash": new_hash, "must_change_password": False}}
+    )
+    return {"message": "Passwort geändert"}
+
+@admin_router.put("/admin/profile")
+async def update_profile(data: AdminUpdate, admin = Depends(get_current_admin)):
+    update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+    if update_data:
+        await db.admins.update_one({"username": admin['username']}, {"$set": update_data})
+    return {"message": "Profil aktualisiert"}
+
+@admin_router.get("/admin/smtp")
+async def get_smtp_settings(admin = Depends(get_current_admin)):
+    settings = await load_settings("smtp_settings", "smtp_settings", SmtpSettings)
+    settings['password'] = '********' if settings.get('password') else ''
+    return settings
+
+@admin_router.put("/admin/smtp")
+async def update_smtp_settings(settings: SmtpSettingsUpdate, admin = Depends(get_current_admin)):
+    # The masked password from GET comes back unchanged and must not overwrite the real one
+    changes = {k: v for k, v in settings.model_dump(exclude_none=True).items() if v != '********'}
+    await smtp_writer.update(changes)
+    return {"message": "SMTP Einstellungen gespeichert"}
+
+class SmtpTestRequest(BaseModel):
+    test_email: Optional[str] = None
+
+@admin_router.post("/admin/smtp/test")
+async def test_smtp(request: SmtpTestRequest = SmtpTestRequest(), admin = Depends(get_current_admin)):
+    smtp_settings = await db.smtp_settings.find_one({"id": "smtp_settings"}, {"_id": 0})
+    if not smtp_settings:
+        raise HTTPException(status_code=400, detail="SMTP nicht konfiguriert. Bitte erst SMTP-Einstellungen speichern.")
+    
+    # Validate SMTP settings
+    if not smtp_settings.get('host'):
+        raise HTTPException(status_code=400, detail="SMTP Host nicht konfiguriert")
+    if not smtp_settings.get('from_email'):
+        raise HTTPException(status_code=400, detail="Absender E-Mail nicht konfiguriert")
+    if not smtp_settings.get('username'):
+        raise HTTPException(status_code=400, detail="SMTP Benutzername nicht konfiguriert")
+    if not smtp_settings.get('password'):
+        raise HTTPException(status_code=400, detail="SMTP Passwort nicht konfiguriert")
+    
+    # Get recipient email - either from request or from admin profile
+    recipient_email = request.test_email
+    if not recipient_email:
+        admin_doc = await db.admins.find_one({"username": admin['username']}, {"_id": 0})
+        if admin_doc:
+            recipient_email = admin_doc.get('email')
+    
+    if not recipient_email:
+        raise HTTPException(status_code=400, detail="Keine Test-E-Mail-Adresse angegeben und keine E-Mail im Admin-Profil hinterlegt")
+    
+    import smtplib
+    try:
+        await asyncio.to_thread(deliver_test_email, smtp_settings, recipient_email)
+        
+        return {"message": f"Test-E-Mail erfolgreich an {recipient_email} gesendet!"}
+    except smtplib.SMTPAuthenticationError as e:
+        raise HTTPException(status_code=500, detail=f"SMTP Authentifizierung fehlgeschlagen: Benutzername oder Passwort falsch")
+    except smtplib.SMTPConnectError as e:
+        raise HTTPException(status_code=500, detail=f"Verbindung zum SMTP-Server fehlgeschlagen: {smtp_settings['host']}:{smtp_settings['port']}")
+    except smtplib.SMTPRecipientsRefused as e:
+        raise HTTPException(status_code=500, detail=f"Empfänger abgelehnt: {recipient_email}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"SMTP Fehler: {str(e)}")
+
+@admin_router.get("/admin/email-template")
+async def get_email_template(admin = Depends(get_current_admin)):
+    return await load_settings("email_template", "email_template", EmailTemplate)
+
+@admin_router.put("/admin/email-template")
+async def update_email_template(data: EmailTemplateUpdate, admin = Depends(get_current_admin)):
+    await email_template_writer.update(data.model_dump(exclude_none=True))
+    return {"message": "E-Mail Template gespeichert"}
+
+@admin_router.get("/admin/email-template/preview")
+async def preview_email_template(admin = Depends(get_current_admin)):
+    """Preview email with variables replaced"""
+    tpl = await db.email_template.find_one({"id": "email_template"}, {"_id": 0})
+    if not tpl:
+        tpl = EmailTemplate().model_dump()
+    
+    subject = await replace_template_variables(tpl['subject'], subject=True)
+    body = await replace_template_variables(tpl['body_html'])
+    
+    return {"subject": subject, "body_html": body}
+
+@admin_router.get("/admin/participants")
+async def get_participants(admin = Depends(get_current_admin)):
+    return await db.participants.find({}, {"_id": 0}).to_list(1000)
+
+@admin_router.post("/admin/participants")
+async def add_participant(data: ParticipantCreate, admin = Depends(get_current_admin)):
+    participant = Participant(name=data.name, email=data.email)
+    doc = participant.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    await db.participants.insert_one(doc)
+    return {"id": participant.id, "name": participant.name, "email": participant.email}
+
+@admin_router.delete("/admin/participants/{participant_id}")
+async def delete_participant(participant_id: str, admin = Depends(get_current_admin)):
+    await db.participants.delete_one({"id": participant_id})
+    return {"message": "Teilnehmer gelöscht"}
+
+@admin_router.post("/admin/send-results")
+async def send_results(data: SendEmailRequest, background_tasks: BackgroundTasks, admin = Depends(get_current_admin)):
+    """Send results email to selected or all participants"""
+    background_tasks.add_task(send_results_email, data.participant_ids)
+    return {"message": "E-Mails werden gesendet..."}
+
+@admin_router.put("/admin/design")
+async def update_design_settings(settings: DesignSettingsUpdate, admin = Depends(get_current_admin)):
+    # Only changed fields are written; edits within SETTINGS_COALESCE_MS share one write and one cache bump
+    await design_writer.update(settings.model_dump(exclude_none=True))
+    return {"message": "Design gespeichert"}
+
+@admin_router.post("/admin/laps", response_model=LapEntryResponse)
+async def create_lap_entry(entry: LapEntryCreate, admin = Depends(get_current_admin)):
+    try:
+        lap_time_ms = parse_lap_time(entry.lap_time_display)
+        sectors = parse_sector_times(entry.sector_times, lap_time_ms) if entry.sector_times else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    lap_entry = LapEntry(driver_name=entry.driver_name, team=entry.team, email=entry.email, lap_time_ms=lap_time_ms,
+        lap_time_display=entry.lap_time_display, track_id=await current_track_id(), sectors=sectors)
+    created = await insert_lap(lap_entry)
+    return annotate_sectors([created], await load_sector_bests(), await load_personal_sector_bests([created]))[0]
+
+@admin_router.put("/admin/laps/{lap_id}")
+async def update_lap_entry(lap_id: str, update: LapEntryUpdate, admin = Depends(get_current_admin)):
+    entry = await db.lap_entries.find_one({"id": lap_id}, {"_id": 0})
+    if not entry:
+        raise HTTPException(status_code=404, detail="Nicht gefunden")
+    
+    update_data = {}
+    if update.driver_name is not None:
+        update_data['driver_name'] = update.driver_name
+    if update.team is not None:
+        update_data['team'] = update.team
+    if update.email is not None:
+        update_data['email'] = update.email if update.email else None
+    if update.lap_time_display is not None:
+        try:
+            update_data['lap_time_ms'] = parse_lap_time(update.lap_time_display)
+            update_data['lap_time_display'] = update.lap_time_display
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    lap_time_ms = update_data.get('lap_time_ms', entry['lap_time_ms'])
+    if update.sector_times:
+        try:
+            update_data['sectors'] = parse_sector_times(update.sector_times, lap_time_ms)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif update.sector_times == [] or (entry.get('sectors') and sum(unpack_sectors(entry['sectors'])) != lap_time_ms):
+        # Sectors that no longer add up to the lap time are dropped
+        update_data['sectors'] = None
+    
+    if update_data:
+        await update_lap(entry, update_data)
+    return {"message": "Aktualisiert"}
+
+@admin_router.delete("/admin/laps/{lap_id}")
+async def delete_lap_entry(lap_id: str, admin = Depends(get_current_admin)):
+    async with rankings_lock:
+        leader_before = await get_leader_time()
+        entry = await db.lap_entries.find_one_and_delete({"id": lap_id}, {"_id": 0})
+        if entry:
+            await update_rankings(leader_before, start_ms=entry['lap_time_ms'])
+            await record_lap_stats(entry, -1)
+            await record_sector_bests(entry, -1)
+    await bump_version("leaderboard")
+    await asyncio.to_thread(delete_trace, lap_id)
+    return {"message": "Gelöscht"}
+
+@admin_router.delete("/admin/laps")
+async def delete_all_laps(admin = Depends(get_current_admin)):
+    async with rankings_lock:
+        await db.lap_entries.delete_many({})
+        await db.lap_stats.delete_many({})
+        await db.sector_bests.delete_many({})
+        await db.driver_sector_bests.delete_many({})
+    await bump_version("leaderboard")
+    await asyncio.to_thread(delete_all_traces)
+    return {"message": "Alle gelöscht"}
+
+@admin_router.post("/admin/tracks")
+async def create_track(track: TrackCreate, admin = Depends(get_current_admin)):
+    track_obj = Track(name=track.name, country=track.country, image_url=track.image_url, length_km=track.length_km)
+    await db.tracks.insert_one(track_obj.model_dump())
+    await bump_version("settings")
+    return {"id": track_obj.id, "name": track_obj.name, "country": track_obj.country, "image_url": track_obj.image_url}
+
+@admin_router.put("/admin/tracks/{track_id}")
+async def update_track(track_id: str, track: TrackCreate, admin = Depends(get_current_admin)):
+    await db.tracks.update_one({"id": track_id}, {"$set": {"name": track.name, "country": track.country, "image_url": track.image_url, "length_km": track.length_km}})
+    await bump_version("settings")
+    return {"message": "Aktualisiert"}
+
+@admin_router.get("/admin/tracks/{track_id}/cut-zones")
+async def get_cut_zones(track_id: str, admin = Depends(get_current_admin)):
+    track = await db.tracks.find_one({"id": track_id}, {"_id": 0, "cut_zones": 1})
+    if not track:
+        raise HTTPException(status_code=404, detail="Nicht gefunden")
+    return track.get('cut_zones', [])
+
+@admin_router.put("/admin/tracks/{track_id}/cut-zones")
+async def update_cut_zones(track_id: str, zones: List[CutZone], admin = Depends(get_current_admin)):
+    """Areas beside the track; captured laps driving into one are held back for review"""
+    result = await db.tracks.update_one({"id": track_id}, {"$set": {"cut_zones": [zone.model_dump() for zone in zones]}})
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="Nicht gefunden")
+    await bump_version("settings")
+    return {"message": "Aktualisiert"}
+
+@admin_router.delete("/admin/tracks/{track_id}")
+async def delete_track(track_id: str, admin = Depends(get_current_admin)):
+    await db.tracks.delete_one({"id": track_id})
+    await bump_version("settings")
+    return {"message": "Gelöscht"}
+
+@admin_router.put("/admin/event")
+async def update_event(event: EventUpdate, background_tasks: BackgroundTasks, admin = Depends(get_current_admin)):
+    current = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0})
+    old_status = current.get('status') if current else 'inactive'
+    
+    doc = {
+        "id": "current_event",
+        "status": event.status,
+        "scheduled_time": event.scheduled_time,
+        "scheduled_date": event.scheduled_date,
+        "track_id": event.track_id,
+        "timer_enabled": event.timer_enabled if event.timer_enabled is not None else (current.get('timer_enabled', False) if current else False),
+        "timer_duration_minutes": event.timer_duration_minutes if event.timer_duration_minutes is not None else (current.get('timer_duration_minutes', 60) if current else 60),
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+    
+    # Start timer if status changed to active and timer is enabled
+    if event.status == 'active' and doc['timer_enabled']:
+        duration = doc['timer_duration_minutes']
+        start_time = datetime.now(timezone.utc)
+        end_time = start_time + timedelta(minutes=duration)
+        doc['timer_start_time'] = start_time.isoformat()
+        doc['timer_end_time'] = end_time.isoformat()
+    elif event.status != 'active':
+        doc['timer_start_time'] = None
+        doc['timer_end_time'] = None
+    
+    await db.event_settings.update_one({"id": "current_event"}, {"$set": doc}, upsert=True)
+    await bump_version("settings")
+    
+    # Send emails if status changed to finished and auto-send is enabled
+    if event.status == 'finished' and old_status != 'finished':
+        email_tpl = await db.email_template.find_one({"id": "email_template"}, {"_id": 0})
+        if email_tpl and email_tpl.get('send_on_finish', True):
+            background_tasks.add_task(send_results_email, None)
+    
+    return {"message": "Event aktualisiert"}
+
+@admin_router.get("/admin/export/csv")
+async def export_csv(include_teams: bool = False, admin = Depends(get_current_admin)):
+    entries = await db.lap_entries.find({}, {"_id": 0}).sort("rank", 1).to_list(1000)
+    design = await db.design_settings.find_one({"id": "design_settings"}, {"_id": 0})
+    event = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0})
+    
+    title = f"{design.get('title_line1', 'F1')} {design.get('title_line2', 'FAST LAP')} {design.get('title_line3', 'CHALLENGE')}" if design else "F1 FAST LAP CHALLENGE"
+    
+    track_name = ""
+    if event and event.get('track_id'):
+        track = await db.tracks.find_one({"id": event['track_id']}, {"_id": 0})
+        if track:
+            track_name = f"{track['name']}, {track['country']}"
+    
+    import csv
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow([title, track_name])
+    writer.writerow([])
+    writer.writerow(['Platz', 'Fahrer', 'Team', 'Rundenzeit', 'Abstand'])
+    
+    for entry in entries:
+        writer.writerow([entry['rank'], entry['driver_name'], entry.get('team', ''), entry['lap_time_display'], entry['gap']])
+    
+    if include_teams:
+        writer.writerow([])
+        writer.writerow(['Teamwertung'])
+        writer.writerow(['Platz', 'Team', 'Beste Runde', f'Schnitt Top {TEAM_TOP_N}', 'Fahrer', 'Abstand'])
+        for team in await get_cached_team_standings():
+            writer.writerow([team['rank'], team['team'], team['best_display'], team['top_avg_display'], team['member_count'], team['gap']])
+    
+    output.seek(0)
+    return StreamingResponse(io.BytesIO(output.getvalue().encode('utf-8')), media_type="text/csv", headers={"Content-Disposition": "attachment; filename=lap_times.csv"})
+
+@admin_router.get("/admin/metrics", response_class=PlainTextResponse)
+async def get_metrics(admin = Depends(get_current_admin)):
+    """Request and Mongo metrics in Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@admin_router.get("/admin/profile", response_class=PlainTextResponse)
+async def profile_process(seconds: float = Query(5, gt=0, le=PROFILE_MAX_SECONDS), interval_ms: float = Query(5, ge=1, le=1000),
+        include_idle: bool = False, admin = Depends(get_current_admin)):
+    """Sample the event loop thread for N seconds and return collapsed stacks"""
+    loop_thread = threading.get_ident()
+    stacks = await asyncio.to_thread(sample_thread, loop_thread, seconds, interval_ms / 1000, include_idle)
+    return PlainTextResponse(render_collapsed(stacks))
+
+@admin_router.get("/admin/profile/rolling", response_class=PlainTextResponse)
+async def rolling_profile(handler: str, admin = Depends(get_current_admin)):
+    """Collapsed stacks of one continuously profiled handler (ROLLING_PROFILE_HANDLERS)"""
+    if handler not in rolling_profiler.handlers:
+        raise HTTPException(status_code=404, detail=f"Handler '{handler}' wird nicht profiliert")
+    return PlainTextResponse(render_collapsed(rolling_profiler.snapshot(handler)))
+
+@admin_router.delete("/admin/reset-admin")
+async def reset_admin(admin = Depends(get_current_admin)):
+    """Delete current admin and all data for fresh setup"""
+    await db.admins.delete_many({})
+    return {"message": "Admin gelöscht - Neues Setup erforderlich"}
+
+@admin_router.get("/admin/export/pdf")
+async def export_pdf_data(include_teams: bool = False, admin = Depends(get_current_admin)):
+    entries = await db.lap_entries.find({}, {"_id": 0}).sort("rank", 1).to_list(1000)
+    design = await db.design_settings.find_one({"id": "design_settings"}, {"_id": 0})
+    event = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0})
+    
+    track_info = None
+    if event and event.get('track_id'):
+        track = await db.tracks.find_one({"id": event['track_id']}, {"_id": 0})
+        if track:
+            track_info = {"name": track['name'], "country": track['country'], "image_url": track.get('image_url')}
+    
+    result = [{"rank": entry['rank'], "driver_name": entry['driver_name'], "team": entry.get('team', ''),
+        "lap_time_display": entry['lap_time_display'], "gap": entry['gap']} for entry in entries]
+    
+    data = {"entries": result, "exported_at": datetime.now(timezone.utc).isoformat(), "track": track_info, "design": design}
+    if include_teams:
+        data["teams"] = await get_cached_team_standings()
+    return data
+
+# ============== RIG ROUTES ==============
+# Rigs register themselves with their first telemetry packet
+
+@admin_router.get("/admin/rigs")
+async def get_rigs(admin = Depends(get_current_admin)):
+    return await db.rigs.find({}, {"_id": 0}).sort("name", 1).to_list(100)
+
+@admin_router.put("/admin/rigs/{rig_id}")
+async def update_rig(rig_id: str, update: RigUpdate, admin = Depends(get_current_admin)):
+    rig = await db.rigs.find_one({"id": rig_id}, {"_id": 0})
+    if not rig:
+        raise HTTPException(status_code=404, detail="Nicht gefunden")
+    
+    update_data = {}
+    if update.name is not None:
+        update_data['name'] = update.name
+    if update.driver_name is not None:
+        update_data['driver_name'] = update.driver_name or None
+        if update_data['driver_name'] != rig.get('driver_name'):
+            # Next driver starts with a leaderboard entry of their own
+            update_data['lap_id'] = None
+    if update.team is not None:
+        update_data['team'] = update.team or None
+    if update.email is not None:
+        update_data['email'] = update.email or None
+    
+    if update_data:
+        await db.rigs.update_one({"id": rig_id}, {"$set": update_data})
+    return {"message": "Aktualisiert"}
+
+@admin_router.delete("/admin/rigs/{rig_id}")
+async def delete_rig(rig_id: str, admin = Depends(get_current_admin)):
+    await db.rigs.delete_one({"id": rig_id})
+    return {"message": "Gelöscht"}
+
+# ============== REJECTED LAP ROUTES ==============
+# Captured laps the game flagged invalid or that broke a track limit rule wait here instead of the leaderboard
+
+@admin_router.get("/admin/rejected-laps")
+async def get_rejected_laps(admin = Depends(get_current_admin)):
+    return await db.rejected_laps.find({}, {"_id": 0}).sort("created_at", -1).to_list(500)
+
+@admin_router.post("/admin/rejected-laps/{lap_id}/approve")
+async def approve_rejected_lap(lap_id: str, admin = Depends(get_current_admin)):
+    rejected = await db.rejected_laps.find_one({"id": lap_id}, {"_id": 0})
+    if not rejected:
+        raise HTTPException(status_code=404, detail="Nicht gefunden")
+    lap_entry_id = rejected.get('lap_entry_id')
+    if not lap_entry_id:
+        # The driver may have got an entry since the lap was held back
+        rig = await db.rigs.find_one({"id": rejected['rig_id']}, {"_id": 0})
+        if rig and rig.get('driver_name') == rejected['driver_name']:
+            lap_entry_id = rig.get('lap_id')
+    trace = await asyncio.to_thread(open_trace, lap_id)
+    rig = {"id": rejected['rig_id'], "name": rejected['rig_name'], "driver_name": rejected['driver_name'],
+           "team": rejected.get('team'), "email": rejected.get('email'), "lap_id": lap_entry_id}
+    await enter_lap(rig, rejected['lap_time_ms'], rejected.get('sectors'), rejected.get('track_id'),
+                    list(trace) if trace is not None else None)
+    await db.rejected_laps.delete_one({"id": lap_id})
+    await asyncio.to_thread(delete_trace, lap_id)
+    return {"message": "Runde freigegeben"}
+
+@admin_router.delete("/admin/rejected-laps/{lap_id}")
+async def delete_rejected_lap(lap_id: str, admin = Depends(get_current_admin)):
+    result = await db.rejected_laps.delete_one({"id": lap_id})
+    if not result.deleted_count:
+        raise HTTPException(status_code=404, detail="Nicht gefunden")
+    await asyncio.to_thread(delete_trace, lap_id)
+    return {"message": "Gelöscht"}
+
+# ============== FILE UPLOAD ==============
+def save_upload(source, file_path: Path):
+    import shutil
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
+@admin_router.post("/upload")
+async def upload_file(file: UploadFile = File(...), admin = Depends(get_current_admin)):
+    """Upload image file and return URL"""
+    allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/svg+xml']
+    if file.content_type not in allowed_types:
+        raise HTTPException(status_code=400, detail="Nur Bilder erlaubt (JPG, PNG, GIF, WebP, SVG)")
+    
+    # Generate unique filename
+    ext = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
+    filename = f"{uuid.uuid4()}.{ext}"
+    file_path = UPLOAD_DIR / filename
+    
+    # Save file
+    await asyncio.to_thread(save_upload, file.file, file_path)
+    
+    return {"filename": filename, "url": f"/api/uploads/{filename}"}
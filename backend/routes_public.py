@@ -0,0 +1,147 @@
+"""Public read endpoints polled by spectators and kiosk displays"""
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, ORJSONResponse
+from typing import List, Optional
+from datetime import datetime, timezone
+import asyncio
+import orjson
+
+from config import TRACE_MAX_POINTS, UPLOAD_DIR
+from database import check_ready, db, startup_state
+from models import LapEntryResponse
+from traces import compare_traces, read_trace
+from cache import cached, encode_json, encoded_json_response
+from leaderboard import (
+    KIOSK_DEFAULT_LIMIT, STATS_BUCKET_MS, TEAM_TOP_N, annotate_sectors, build_event_status, build_kiosk_payload,
+    build_sector_response, build_stats_response, event_timer, get_cached_team_standings, load_design_settings,
+    load_event_settings, load_personal_sector_bests, load_sector_bests
+)
+
+public_router = APIRouter(prefix="/api")
+
+# ============== PUBLIC ROUTES ==============
+
+@public_router.get("/")
+async def root():
+    return {"message": "F1 Fast Lap Challenge API"}
+
+@public_router.get("/health/live")
+async def health_live():
+    return {"status": "ok"}
+
+@public_router.get("/health/ready")
+async def health_ready():
+    state = await check_ready()
+    if not state["ok"]:
+        return ORJSONResponse({"status": "unavailable", "database": state["error"]}, status_code=503)
+    return {"status": "ok", "database": "ok", "startup": "done" if startup_state["done"] else "pending"}
+
+
+
+@public_router.get("/design")
+async def get_design_settings(request: Request):
+    """Get design settings (public)"""
+    async def produce():
+        return encode_json(await load_design_settings())
+    return encoded_json_response(request, await cached("design", ("settings",), produce))
+
+@public_router.get("/event/status")
+async def get_event_status():
+    """Get current event status with timer info"""
+    settings, track = await load_event_settings()
+    return ORJSONResponse(build_event_status(settings, track))
+
+@public_router.get("/laps", response_model=List[LapEntryResponse])
+async def get_all_laps(request: Request):
+    # Stored documents already have the response shape, skip re-validating every row
+    async def produce():
+        entries = await db.lap_entries.find({}, {"_id": 0}).sort("rank", 1).to_list(1000)
+        return encode_json(annotate_sectors(entries, await load_sector_bests(), await load_personal_sector_bests(entries)))
+    return encoded_json_response(request, await cached("laps", ("leaderboard",), produce))
+
+@public_router.get("/laps/{lap_id}/trace")
+async def get_lap_trace(lap_id: str, channels: Optional[str] = None, from_m: Optional[float] = None,
+                        to_m: Optional[float] = None, points: int = Query(TRACE_MAX_POINTS, ge=10, le=TRACE_MAX_POINTS)):
+    """Telemetry trace of a lap (speed, throttle, brake, ... over distance), thinned out to `points` samples"""
+    names = [c.strip() for c in channels.split(",") if c.strip()] if channels else None
+    if names and "distance" not in names:
+        names.insert(0, "distance")
+    try:
+        trace = await asyncio.to_thread(read_trace, lap_id, names, from_m, to_m, points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Keine Telemetrie für diese Runde")
+    return Response(orjson.dumps({"lap_id": lap_id, **trace}, option=orjson.OPT_SERIALIZE_NUMPY), media_type="application/json")
+
+@public_router.get("/laps/{lap_id}/compare/{reference_id}")
+async def compare_laps(lap_id: str, reference_id: str, points: int = Query(1000, ge=10, le=TRACE_MAX_POINTS)):
+    """Time delta of a lap to a reference lap over distance. reference_id "leader"
+    compares with the fastest lap that has a trace."""
+    if reference_id == "leader":
+        leader = await db.lap_entries.find_one({"trace_samples": {"$gt": 1}}, {"_id": 0, "id": 1}, sort=[("lap_time_ms", 1)])
+        if not leader:
+            raise HTTPException(status_code=404, detail="Keine Runde mit Telemetrie vorhanden")
+        reference_id = leader['id']
+    comparison = await asyncio.to_thread(compare_traces, lap_id, reference_id, points)
+    if comparison is None:
+        raise HTTPException(status_code=404, detail="Keine Telemetrie für diese Runden")
+    return Response(orjson.dumps(comparison, option=orjson.OPT_SERIALIZE_NUMPY), media_type="application/json")
+
+@public_router.get("/kiosk")
+async def get_kiosk(request: Request, limit: int = Query(KIOSK_DEFAULT_LIMIT, ge=1, le=1000)):
+    """Design, event status and top-N leaderboard in one response for wall displays"""
+    body, etag, settings = await cached(f"kiosk:{limit}", ("leaderboard", "settings"), lambda: build_kiosk_payload(limit))
+    # The clock and countdown change every second, so they are headers: a 304 for the
+    # unchanged body still carries them, and they never take part in the ETag
+    timer_remaining, _ = event_timer(settings)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Server-Time": datetime.now(timezone.utc).isoformat()}
+    if timer_remaining is not None:
+        headers["X-Timer-Remaining-Seconds"] = str(timer_remaining)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@public_router.get("/stats")
+async def get_stats(track_id: Optional[str] = None, bucket_ms: int = STATS_BUCKET_MS):
+    """Lap time statistics from the incrementally maintained aggregates"""
+    scope = f"track:{track_id}" if track_id else "global"
+    stats = await db.lap_stats.find_one({"id": scope}, {"_id": 0})
+    return ORJSONResponse(build_stats_response(stats or {}, bucket_ms))
+
+@public_router.get("/sectors")
+async def get_sector_bests(track_id: Optional[str] = None):
+    """Best time per sector with its holder, and the theoretical best lap"""
+    scope = f"track:{track_id}" if track_id else "global"
+    bests = await db.sector_bests.find_one({"id": scope}, {"_id": 0})
+    return ORJSONResponse(build_sector_response(bests or {}))
+
+@public_router.get("/teams")
+async def get_teams(request: Request, top_n: int = Query(TEAM_TOP_N, ge=1, le=10)):
+    """Team standings: best lap, average of the top_n laps and member count"""
+    async def produce():
+        return encode_json(await get_cached_team_standings(top_n))
+    return encoded_json_response(request, await cached(f"teams-json:{top_n}", ("leaderboard",), produce))
+
+@public_router.get("/tracks")
+async def get_tracks(request: Request):
+    async def produce():
+        return encode_json(await db.tracks.find({}, {"_id": 0, "cut_zones": 0}).to_list(100))
+    return encoded_json_response(request, await cached("tracks", ("settings",), produce))
+
+@public_router.get("/uploads/{filename}")
+async def get_uploaded_file(filename: str):
+    """Serve uploaded file"""
+    file_path = UPLOAD_DIR / filename
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="Datei nicht gefunden")
+    
+    # Determine content type
+    ext = filename.split('.')[-1].lower()
+    content_types = {
+        'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png',
+        'gif': 'image/gif', 'webp': 'image/webp', 'svg': 'image/svg+xml'
+    }
+    content_type = content_types.get(ext, 'application/octet-stream')
+    
+    return FileResponse(file_path, media_type=content_type)
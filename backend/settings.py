@@ -0,0 +1,78 @@
+"""Singleton settings documents (design, SMTP, email template): reads and coalesced partial writes"""
+from pydantic import BaseModel
+from typing import Dict, Optional, Type
+import asyncio
+
+from config import SETTINGS_COALESCE_MS
+from database import db
+from models import DesignSettings, EmailTemplate, SmtpSettings
+from cache import bump_version, cache_versions
+
+async def load_settings(collection: str, doc_id: str, model: Type[BaseModel]) -> dict:
+    """Stored values over the model defaults, so documents written partially are complete"""
+    stored = await db[collection].find_one({"id": doc_id}, {"_id": 0})
+    return {**model().model_dump(), **(stored or {})}
+
+class SettingsWriter:
+    """Coalesces partial updates of one settings document.
+
+    Changed fields are merged into a pending $set. The first update of a burst
+    schedules a single flush after SETTINGS_COALESCE_MS and every caller of the
+    burst waits for it, so a colour picker drag becomes one update_one and one
+    version bump. Defaults are only written on insert ($setOnInsert), so no
+    read is needed before the write.
+
+    Fields equal to what this process last wrote are skipped. That snapshot is
+    only trusted while the cache version is unchanged, i.e. nobody else (another
+    route or worker) wrote settings in between.
+    """
+
+    def __init__(self, collection: str, doc_id: str, model: Type[BaseModel], version: Optional[str] = None):
+        self.collection = collection
+        self.doc_id = doc_id
+        self.model = model
+        self.version = version
+        self.pending: Dict[str, object] = {}
+        self.flush: Optional[asyncio.Future] = None
+        self.written: Dict[str, object] = {}
+        self.written_at = None
+
+    def unchanged(self, key: str, value) -> bool:
+        if self.version is None or self.written_at != cache_versions[self.version]:
+            return False
+        return key in self.written and self.written[key] == value
+
+    async def update(self, fields: dict):
+        # A pending field is always replaced, even by the value last written (A -> B -> A)
+        changed = {k: v for k, v in fields.items() if k in self.pending or not self.unchanged(k, v)}
+        if not changed:
+            return
+        self.pending.update(changed)
+        if self.flush is None:
+            self.flush = asyncio.get_running_loop().create_future()
+            asyncio.get_running_loop().create_task(self.write_after_window(self.flush))
+        await asyncio.shield(self.flush)
+
+    async def write_after_window(self, done: asyncio.Future):
+        await asyncio.sleep(SETTINGS_COALESCE_MS / 1000)
+        fields, self.pending, self.flush = self.pending, {}, None
+        try:
+            defaults = {k: v for k, v in self.model().model_dump().items() if k not in fields and k != "id"}
+            await db[self.collection].update_one(
+                {"id": self.doc_id}, {"$set": fields, "$setOnInsert": defaults}, upsert=True
+            )
+            if self.version is not None:
+                if self.written_at != cache_versions[self.version]:
+                    self.written = {}
+                await bump_version(self.version)
+                self.written_at = cache_versions[self.version]
+                self.written.update(fields)
+            done.set_result(None)
+        except Exception as e:
+            done.set_exception(e)
+            # Waiters still get the exception; this only avoids "exception never retrieved"
+            done.exception()
+
+design_writer = SettingsWriter("design_settings", "design_settings", DesignSettings, version="settings")
+smtp_writer = SettingsWriter("smtp_settings", "smtp_settings", SmtpSettings)
+email_template_writer = SettingsWriter("email_template", "email_template", EmailTemplate)
@@ -0,0 +1,30 @@
+"""
+Storage backends behind database.db.
+
+Routes and helpers talk to collections (db.lap_entries, db.tracks, the
+settings documents, db.admins, db.participants, ...) through the Motor API
+subset they already use. Each backend provides that API:
+
+- mongo:  MongoDB through Motor (default, needed for several workers)
+- sqlite: one local file, no database server; for single-laptop events
+- memory: nothing stored, gone on restart; for tests, benchmarks and demos
+"""
+from pathlib import Path
+
+BACKENDS = ("mongo", "sqlite", "memory")
+
+def open_storage(backend: str, sqlite_path: str = "") -> tuple:
+    """(client, database) for the backend; client.close() releases it"""
+    if backend == "mongo":
+        from storage.mongo import open_mongo
+        return open_mongo()
+    if backend == "sqlite":
+        from storage.sqlite import SqliteDatabase
+        Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+        database = SqliteDatabase(sqlite_path)
+        return database, database
+    if backend == "memory":
+        from storage.memory import MemoryDatabase
+        database = MemoryDatabase()
+        return database, database
+    raise ValueError(f"Unbekanntes DATABASE_BACKEND '{backend}' (erlaubt: {', '.join(BACKENDS)})")
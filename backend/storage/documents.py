@@ -0,0 +1,286 @@
+"""Mongo query, update, projection, sort and aggregation semantics on plain dicts.
+
+Embedded backends keep documents as dicts (or JSON) and evaluate the part of
+the Mongo language the app uses with these functions, so route code is the
+same for every backend. Anything outside that subset raises
+NotImplementedError instead of silently matching wrong documents.
+"""
+from datetime import datetime
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+COLLECTION_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Marks a field that is not in the document (unlike a stored None)
+MISSING = object()
+
+SortSpec = List[Tuple[str, int]]
+
+def get_path(doc: dict, path: str):
+    value = doc
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+def set_path(doc: dict, path: str, value):
+    *parents, last = path.split('.')
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+def unset_path(doc: dict, path: str):
+    *parents, last = path.split('.')
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+# ============== COMPARISON ==============
+# Values of different BSON types never compare equal or greater/less in
+# queries; in sorts they are ordered by type first.
+
+def type_rank(value) -> int:
+    if value is MISSING or value is None:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, (list, tuple)):
+        return 5
+    if isinstance(value, datetime):
+        return 9
+    return 7
+
+def sort_value(value) -> tuple:
+    rank = type_rank(value)
+    return (rank, value) if rank in (2, 3, 8, 9) else (rank, 0)
+
+def equals(value, target) -> bool:
+    if target is None:
+        return value is MISSING or value is None
+    if isinstance(value, list) and not isinstance(target, list):
+        return any(equals(item, target) for item in value)
+    return type_rank(value) == type_rank(target) and value == target
+
+def compare(value, op: str, target) -> bool:
+    if value is MISSING or type_rank(value) != type_rank(target):
+        return False
+    if op == "$gt":
+        return value > target
+    if op == "$gte":
+        return value >= target
+    if op == "$lt":
+        return value < target
+    return value <= target
+
+def match_condition(value, condition) -> bool:
+    if not (isinstance(condition, dict) and condition and all(key.startswith('$') for key in condition)):
+        return equals(value, condition)
+    for op, target in condition.items():
+        if op == "$eq":
+            ok = equals(value, target)
+        elif op == "$ne":
+            ok = not equals(value, target)
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            ok = compare(value, op, target)
+        elif op == "$in":
+            ok = any(equals(value, item) for item in target)
+        elif op == "$nin":
+            ok = not any(equals(value, item) for item in target)
+        elif op == "$exists":
+            ok = (value is not MISSING) == bool(target)
+        else:
+            raise NotImplementedError(f"Query operator {op} is not supported")
+        if not ok:
+            return False
+    return True
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, sub) for sub in condition):
+                return False
+        elif key.startswith('$'):
+            raise NotImplementedError(f"Query operator {key} is not supported")
+        elif not match_condition(get_path(doc, key), condition):
+            return False
+    return True
+
+# ============== PROJECTION AND SORT ==============
+
+def project(doc: dict, projection: dict = None) -> dict:
+    """Copy of the top-level fields a find projection selects"""
+    if not projection:
+        return dict(doc)
+    included = {key for key, flag in projection.items() if flag and key != "_id"}
+    if included:
+        keep_id = bool(projection.get("_id", 1))
+        return {key: value for key, value in doc.items() if key in included or (key == "_id" and keep_id)}
+    return {key: value for key, value in doc.items() if key not in projection}
+
+def sort_spec(key_or_list: Union[str, Sequence, Dict[str, int]], direction: int = None) -> SortSpec:
+    """Normalize the sort arguments Motor accepts: "field", ("field", -1), [(field, dir), ...] or a dict"""
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [(key, dir_) for key, dir_ in key_or_list]
+
+def sort_documents(docs: List[dict], spec: SortSpec):
+    """Sort in place, stable, so equal keys keep their stored order"""
+    for key, direction in reversed(spec):
+        if key == "$natural":
+            if direction < 0:
+                docs.reverse()
+            continue
+        docs.sort(key=lambda doc: sort_value(get_path(doc, key)), reverse=direction < 0)
+
+# ============== UPDATES ==============
+
+def is_replacement(update: dict) -> bool:
+    return not any(key.startswith('$') for key in update)
+
+def apply_update(doc: dict, update: dict, inserting: bool = False) -> dict:
+    """Apply an update document in place (or replace all fields but _id) and return the document"""
+    if is_replacement(update):
+        doc_id = doc.get("_id", MISSING)
+        doc.clear()
+        doc.update(update)
+        if doc_id is not MISSING:
+            doc["_id"] = doc_id
+        return doc
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            current = get_path(doc, path)
+            if op in ("$set", "$setOnInsert"):
+                set_path(doc, path, value)
+            elif op == "$unset":
+                unset_path(doc, path)
+            elif op == "$inc":
+                set_path(doc, path, (0 if current is MISSING else current) + value)
+            elif op == "$min":
+                if current is MISSING or sort_value(value) < sort_value(current):
+                    set_path(doc, path, value)
+            elif op == "$max":
+                if current is MISSING or sort_value(value) > sort_value(current):
+                    set_path(doc, path, value)
+            elif op == "$push":
+                set_path(doc, path, ([] if current is MISSING else list(current)) + [value])
+            elif op == "$addToSet":
+                items = [] if current is MISSING else list(current)
+                if value not in items:
+                    items.append(value)
+                set_path(doc, path, items)
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported")
+    return doc
+
+def upsert_document(query: dict, update: dict) -> dict:
+    """New document for an upsert: the query's equality fields plus the update"""
+    doc = {}
+    if not is_replacement(update):
+        for key, condition in query.items():
+            if key.startswith('$'):
+                continue
+            if isinstance(condition, dict) and any(op.startswith('$') for op in condition):
+                if "$eq" in condition:
+                    set_path(doc, key, condition["$eq"])
+                continue
+            set_path(doc, key, condition)
+    return apply_update(doc, update, inserting=True)
+
+# ============== AGGREGATION ==============
+
+def evaluate(doc: dict, expression):
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = get_path(doc, expression[1:])
+        return None if value is MISSING else value
+    if isinstance(expression, dict) and len(expression) == 1:
+        (op, argument), = expression.items()
+        if op == "$size":
+            return len(evaluate(doc, argument))
+        if op == "$slice":
+            values, count = evaluate(doc, argument[0]), argument[1]
+            return values[:count] if count >= 0 else values[count:]
+        if op.startswith('$'):
+            raise NotImplementedError(f"Expression operator {op} is not supported")
+    return expression
+
+def group(docs: Iterable[dict], spec: dict) -> List[dict]:
+    groups: Dict[Any, dict] = {}
+    for doc in docs:
+        key = evaluate(doc, spec["_id"])
+        out = groups.get(key)
+        first = out is None
+        if first:
+            out = groups[key] = {"_id": key}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, expression), = accumulator.items()
+            value = evaluate(doc, expression)
+            if op == "$first":
+                if first:
+                    out[field] = value
+            elif op == "$last":
+                out[field] = value
+            elif op == "$push":
+                out.setdefault(field, []).append(value)
+            elif op == "$addToSet":
+                items = out.setdefault(field, [])
+                if value not in items:
+                    items.append(value)
+            elif op == "$sum":
+                out[field] = out.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+            elif op in ("$min", "$max"):
+                if value is not None and (field not in out or (value < out[field] if op == "$min" else value > out[field])):
+                    out[field] = value
+            else:
+                raise NotImplementedError(f"Accumulator {op} is not supported")
+    return list(groups.values())
+
+def project_stage(doc: dict, spec: dict) -> dict:
+    out = {}
+    for field, expression in {"_id": 1, **spec}.items():
+        if expression is True or expression == 1:
+            value = get_path(doc, field)
+            if value is not MISSING:
+                out[field] = value
+        elif expression is not False and expression != 0:
+            out[field] = evaluate(doc, expression)
+    return out
+
+def aggregate(docs: List[dict], pipeline: Sequence[dict]) -> List[dict]:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [doc for doc in docs if matches(doc, spec)]
+        elif name == "$sort":
+            sort_documents(docs, sort_spec(spec))
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$group":
+            docs = group(docs, spec)
+        elif name == "$project":
+            docs = [project_stage(doc, spec) for doc in docs]
+        else:
+            raise NotImplementedError(f"Pipeline stage {name} is not supported")
+    return docs
@@ -0,0 +1,231 @@
+"""In-memory backend with the Motor collection API the app uses.
+
+Documents live in dicts for as long as the process runs - for tests,
+benchmarks and demos without MongoDB. Filters, updates, sorts and pipelines use
+the shared Mongo semantics from storage.documents. Documents are copied on the
+way in and out like a round trip through a database, so handlers cannot change
+stored data by mutating what they got back.
+"""
+from copy import deepcopy
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+from storage.documents import (
+    COLLECTION_NAME, MISSING, aggregate, apply_update, get_path, is_replacement, matches, project, sort_documents,
+    sort_spec, upsert_document
+)
+
+def index_key(doc: dict, spec: List[Tuple[str, int]]) -> list:
+    # A missing field counts as null, as in a Mongo unique index
+    return [None if value is MISSING else value for value in (get_path(doc, field) for field, _ in spec)]
+
+class MemoryCursor:
+    """find() and aggregate() result; runs when it is awaited or iterated"""
+
+    def __init__(self, collection: "MemoryCollection", query: dict, projection: Optional[dict] = None,
+                 pipeline: Optional[Sequence[dict]] = None):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self.pipeline = pipeline
+        self.spec = None
+        self.skip_count = 0
+        self.limit_count = 0
+
+    def sort(self, key_or_list, direction: int = None):
+        self.spec = sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, count: int):
+        self.skip_count = count
+        return self
+
+    def limit(self, count: int):
+        self.limit_count = count
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        limit = self.limit_count
+        if length:
+            limit = min(limit, length) if limit else length
+        if self.pipeline is not None:
+            docs = aggregate(self.collection.select({}), self.pipeline)
+            return docs[:limit] if limit else docs
+        return self.collection.select(self.query, self.projection, self.spec, self.skip_count, limit)
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for doc in await self.to_list():
+            yield doc
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        # _id -> document, in insertion order like a collection scan
+        self.docs: Dict[object, dict] = {}
+        self.unique: Dict[str, List[Tuple[str, int]]] = {}
+
+    def targets(self, query: dict, spec=None, skip: int = 0, limit: int = 0) -> List[dict]:
+        docs = [doc for doc in self.docs.values() if matches(doc, query)]
+        if spec:
+            sort_documents(docs, spec)
+        return docs[skip:skip + limit] if limit else docs[skip:]
+
+    def select(self, query: dict, projection: Optional[dict] = None, spec=None, skip: int = 0, limit: int = 0) -> List[dict]:
+        return [deepcopy(project(doc, projection)) for doc in self.targets(query, spec, skip, limit)]
+
+    def check_unique(self, doc: dict):
+        for name, spec in self.unique.items():
+            key = index_key(doc, spec)
+            if any(other["_id"] != doc["_id"] and index_key(other, spec) == key for other in self.docs.values()):
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name}")
+
+    def store(self, doc: dict):
+        self.check_unique(doc)
+        self.docs[doc["_id"]] = doc
+
+    def insert(self, doc: dict):
+        # Motor adds the _id to the caller's document as well
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+        self.store(deepcopy(doc))
+        return doc["_id"]
+
+    def update(self, query: dict, update: dict, upsert: bool = False, many: bool = False) -> dict:
+        targets = self.targets(query, limit=0 if many else 1)
+        for doc in targets:
+            self.store(apply_update(deepcopy(doc), deepcopy(update)))
+        if not targets and upsert:
+            doc = upsert_document(query, deepcopy(update))
+            return {"n": 1, "nModified": 0, "upserted": self.insert(doc)}
+        return {"n": len(targets), "nModified": len(targets)}
+
+    def delete(self, query: dict, many: bool = False) -> int:
+        targets = self.targets(query, limit=0 if many else 1)
+        for doc in targets:
+            del self.docs[doc["_id"]]
+        return len(targets)
+
+    # ---- Motor API ----
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> MemoryCursor:
+        cursor = MemoryCursor(self, query or {}, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        return cursor
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None, sort=None) -> Optional[dict]:
+        docs = self.select(query or {}, projection, sort_spec(sort) if sort else None, 0, 1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, query: dict) -> int:
+        return len(self.targets(query))
+
+    def aggregate(self, pipeline: Sequence[dict]) -> MemoryCursor:
+        return MemoryCursor(self, {}, pipeline=pipeline)
+
+    async def insert_one(self, doc: dict) -> InsertOneResult:
+        return InsertOneResult(self.insert(doc), True)
+
+    async def insert_many(self, docs: Sequence[dict], ordered: bool = True) -> InsertManyResult:
+        return InsertManyResult([self.insert(doc) for doc in docs], True)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        if is_replacement(update):
+            raise ValueError("update only works with $ operators")
+        return UpdateResult(self.update(query, update, upsert), True)
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return UpdateResult(self.update(query, update, upsert, True), True)
+
+    async def replace_one(self, query: dict, replacement: dict, upsert: bool = False) -> UpdateResult:
+        if not is_replacement(replacement):
+            raise ValueError("replacement must not contain update operators")
+        return UpdateResult(self.update(query, replacement, upsert), True)
+
+    async def delete_one(self, query: dict) -> DeleteResult:
+        return DeleteResult({"n": self.delete(query)}, True)
+
+    async def delete_many(self, query: dict) -> DeleteResult:
+        return DeleteResult({"n": self.delete(query, True)}, True)
+
+    async def find_one_and_delete(self, query: dict, projection: Optional[dict] = None, sort=None) -> Optional[dict]:
+        targets = self.targets(query, sort_spec(sort) if sort else None, limit=1)
+        if not targets:
+            return None
+        del self.docs[targets[0]["_id"]]
+        return project(targets[0], projection)
+
+    async def bulk_write(self, requests: Sequence, ordered: bool = True) -> BulkWriteResult:
+        result = {"writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+                  "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        for idx, request in enumerate(requests):
+            if isinstance(request, InsertOne):
+                self.insert(request._doc)
+                result["nInserted"] += 1
+            elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                outcome = self.update(request._filter, request._doc, request._upsert, isinstance(request, UpdateMany))
+                if "upserted" in outcome:
+                    result["nUpserted"] += 1
+                    result["upserted"].append({"index": idx, "_id": outcome["upserted"]})
+                else:
+                    result["nMatched"] += outcome["n"]
+                    result["nModified"] += outcome["nModified"]
+            elif isinstance(request, DeleteOne):
+                result["nRemoved"] += self.delete(request._filter)
+            else:
+                raise NotImplementedError(f"{type(request).__name__} is not supported")
+        return BulkWriteResult(result, True)
+
+    async def create_index(self, keys, unique: bool = False, **kwargs) -> str:
+        spec = sort_spec(keys)
+        name = "_".join(f"{field}_{direction}" for field, direction in spec)
+        if unique and name not in self.unique:
+            self.unique[name] = spec
+            try:
+                for doc in self.docs.values():
+                    self.check_unique(doc)
+            except DuplicateKeyError:
+                del self.unique[name]
+                raise
+        return name
+
+class MemoryDatabase:
+    """Stands in for a Motor database; collections are attributes like db.lap_entries"""
+
+    def __init__(self):
+        self.collections: Dict[str, MemoryCollection] = {}
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_") or not COLLECTION_NAME.match(name):
+            raise AttributeError(name)
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = MemoryCollection(name)
+        return collection
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return getattr(self, name)
+
+    async def command(self, name: str, *args, **kwargs) -> dict:
+        if name != "ping":
+            raise NotImplementedError(f"Command {name} is not supported")
+        return {"ok": 1.0}
+
+    async def create_collection(self, name: str, **options):
+        if name in self.collections:
+            raise CollectionInvalid(f"collection {name} already exists")
+        return getattr(self, name)
+
+    async def list_collection_names(self) -> List[str]:
+        return list(self.collections)
+
+    def close(self):
+        pass
@@ -0,0 +1,25 @@
+"""MongoDB backend: the Motor client configured from MONGO_URL"""
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+
+from config import (
+    MONGO_MIN_POOL_SIZE, MONGO_MAX_POOL_SIZE, MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS
+)
+from observability import mongo_listener
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+
+def open_mongo() -> tuple:
+    """Motor client and database"""
+    client = AsyncIOMotorClient(
+        mongo_url,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[mongo_listener]
+    )
+    return client, client[os.environ.get('DB_NAME', 'f1_fast_lap_challenge')]
@@ -0,0 +1,364 @@
+"""Embedded SQLite backend with the Motor collection API the app uses.
+
+One table per collection holds the documents as JSON. Every statement runs on
+a single executor thread that owns the connection, so the event loop never
+blocks on disk and SQLite never sees two writers. The database is in WAL mode,
+so reads are not blocked by a commit in progress.
+
+Filters, sorts and limits are translated to SQL where they map one to one
+(equality and range conditions on plain fields). create_index builds an index
+on the same json_extract() expression, so leaderboard reads by lap_time_ms or
+rank are index scans. Everything else is checked in Python with the shared Mongo
+semantics from storage.documents.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import re
+import sqlite3
+
+import orjson
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+from storage.documents import (
+    COLLECTION_NAME, aggregate, apply_update, is_replacement, matches, project, sort_spec, upsert_document
+)
+
+FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+RANGE_OPERATORS = {"$eq": "=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+def sql_field(field: str) -> str:
+    # Must match the index expression exactly, or SQLite will not use the index
+    return "_id" if field == "_id" else f"json_extract(doc, '$.{field}')"
+
+def sql_scalar(value) -> bool:
+    # Booleans are stored as JSON true/false but bind as 0/1, so they are matched in Python
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+def translate_filter(query: dict) -> Tuple[str, list, bool]:
+    """SQL condition for the parts of a filter SQL can evaluate, and whether that was all of it"""
+    clauses, params, complete = [], [], True
+    for field, condition in query.items():
+        if not FIELD.match(field):
+            complete = False
+        elif sql_scalar(condition):
+            clauses.append(f"{sql_field(field)} = ?")
+            params.append(condition)
+        elif (isinstance(condition, dict) and condition and all(op in RANGE_OPERATORS for op in condition)
+              and all(sql_scalar(value) for value in condition.values())):
+            for op, value in condition.items():
+                clauses.append(f"{sql_field(field)} {RANGE_OPERATORS[op]} ?")
+                params.append(value)
+        else:
+            complete = False
+    return " AND ".join(clauses), params, complete
+
+def translate_sort(spec: Optional[List[Tuple[str, int]]]) -> str:
+    terms = []
+    for field, direction in spec or ():
+        if field != "$natural" and not FIELD.match(field):
+            raise NotImplementedError(f"Sort on {field} is not supported")
+        column = "rowid" if field == "$natural" else sql_field(field)
+        terms.append(f"{column} {'DESC' if direction < 0 else 'ASC'}")
+    # Ties keep the insertion order, like a collection scan
+    return ", ".join(terms + ["rowid"])
+
+def encode(doc: dict) -> str:
+    return orjson.dumps(doc, default=str).decode()
+
+class SqliteCursor:
+    """find() and aggregate() result; runs when it is awaited or iterated"""
+
+    def __init__(self, collection: "SqliteCollection", query: dict, projection: Optional[dict] = None,
+                 pipeline: Optional[Sequence[dict]] = None):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self.pipeline = pipeline
+        self.spec = None
+        self.skip_count = 0
+        self.limit_count = 0
+
+    def sort(self, key_or_list, direction: int = None):
+        self.spec = sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, count: int):
+        self.skip_count = count
+        return self
+
+    def limit(self, count: int):
+        self.limit_count = count
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        limit = self.limit_count
+        if length:
+            limit = min(limit, length) if limit else length
+        if self.pipeline is not None:
+            docs = await self.collection.database.run(self.collection.select_aggregate, self.pipeline)
+            return docs[:limit] if limit else docs
+        return await self.collection.database.run(
+            self.collection.select, self.query, self.projection, self.spec, self.skip_count, limit)
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for doc in await self.to_list():
+            yield doc
+
+class SqliteCollection:
+    def __init__(self, database: "SqliteDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.table = f'"{name}"'
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self.database.connection_for(self.name)
+
+    # ---- executor thread ----
+
+    def select(self, query: dict, projection: Optional[dict] = None, spec=None, skip: int = 0,
+               limit: int = 0, with_ids: bool = False) -> List[Any]:
+        where, params, complete = translate_filter(query or {})
+        sql = f"SELECT _id, doc FROM {self.table}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {translate_sort(spec)}"
+        if complete and (limit or skip):
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limit or -1, skip]
+        docs = [(row[0], orjson.loads(row[1])) for row in self.connection.execute(sql, params)]
+        if not complete:
+            docs = [(doc_id, doc) for doc_id, doc in docs if matches(doc, query)]
+            docs = docs[skip:skip + limit] if limit else docs[skip:]
+        if with_ids:
+            return docs
+        return [project(doc, projection) for _, doc in docs]
+
+    def select_aggregate(self, pipeline: Sequence[dict]) -> List[dict]:
+        query = pipeline[0]["$match"] if pipeline and "$match" in pipeline[0] else {}
+        return aggregate(self.select(query), pipeline[1:] if query else pipeline)
+
+    def insert(self, docs: Sequence[dict]) -> List[Any]:
+        ids = []
+        for doc in docs:
+            doc.setdefault("_id", str(ObjectId()))
+            try:
+                self.connection.execute(f"INSERT INTO {self.table} (_id, doc) VALUES (?, ?)", (doc["_id"], encode(doc)))
+            except sqlite3.IntegrityError as e:
+                raise DuplicateKeyError(str(e))
+            ids.append(doc["_id"])
+        return ids
+
+    def write(self, doc_id, doc: dict):
+        try:
+            self.connection.execute(f"UPDATE {self.table} SET doc = ? WHERE _id = ?", (encode(doc), doc_id))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(str(e))
+
+    def update(self, query: dict, update: dict, upsert: bool = False, many: bool = False) -> dict:
+        targets = self.select(query, spec=None, limit=0 if many else 1, with_ids=True)
+        for doc_id, doc in targets:
+            self.write(doc_id, apply_update(doc, update))
+        if not targets and upsert:
+            doc = upsert_document(query, update)
+            self.insert([doc])
+            return {"n": 1, "nModified": 0, "upserted": doc["_id"]}
+        return {"n": len(targets), "nModified": len(targets)}
+
+    def delete(self, query: dict, many: bool = False) -> int:
+        targets = self.select(query, limit=0 if many else 1, with_ids=True)
+        self.connection.executemany(f"DELETE FROM {self.table} WHERE _id = ?", [(doc_id,) for doc_id, _ in targets])
+        return len(targets)
+
+    def count(self, query: dict) -> int:
+        where, params, complete = translate_filter(query)
+        if not complete:
+            return len(self.select(query, with_ids=True))
+        sql = f"SELECT COUNT(*) FROM {self.table}" + (f" WHERE {where}" if where else "")
+        return self.connection.execute(sql, params).fetchone()[0]
+
+    def find_and_delete(self, query: dict, projection: Optional[dict], spec) -> Optional[dict]:
+        targets = self.select(query, spec=spec, limit=1, with_ids=True)
+        if not targets:
+            return None
+        doc_id, doc = targets[0]
+        self.connection.execute(f"DELETE FROM {self.table} WHERE _id = ?", (doc_id,))
+        return project(doc, projection)
+
+    def bulk(self, requests: Sequence) -> dict:
+        result = {"writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+                  "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        with self.database.transaction(self.name):
+            for idx, request in enumerate(requests):
+                if isinstance(request, InsertOne):
+                    self.insert([request._doc])
+                    result["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                    if isinstance(request, ReplaceOne) and not is_replacement(request._doc):
+                        raise ValueError("replacement must not contain update operators")
+                    outcome = self.update(request._filter, request._doc, request._upsert, isinstance(request, UpdateMany))
+                    if "upserted" in outcome:
+                        result["nUpserted"] += 1
+                        result["upserted"].append({"index": idx, "_id": outcome["upserted"]})
+                    else:
+                        result["nMatched"] += outcome["n"]
+                        result["nModified"] += outcome["nModified"]
+                elif isinstance(request, DeleteOne):
+                    result["nRemoved"] += self.delete(request._filter)
+                else:
+                    raise NotImplementedError(f"{type(request).__name__} is not supported")
+        return result
+
+    def index(self, spec: List[Tuple[str, int]], unique: bool) -> str:
+        name = "_".join(f"{field}_{direction}" for field, direction in spec)
+        columns = ", ".join(f"{sql_field(field)}{' DESC' if direction < 0 else ''}" for field, direction in spec)
+        sql_name = f'"ix_{self.name}_{name.replace(".", "_")}"'
+        self.connection.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {sql_name} ON {self.table} ({columns})")
+        return name
+
+    # ---- Motor API ----
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> SqliteCursor:
+        cursor = SqliteCursor(self, query or {}, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        return cursor
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None, sort=None) -> Optional[dict]:
+        spec = sort_spec(sort) if sort else None
+        docs = await self.database.run(self.select, query or {}, projection, spec, 0, 1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, query: dict) -> int:
+        return await self.database.run(self.count, query)
+
+    def aggregate(self, pipeline: Sequence[dict]) -> SqliteCursor:
+        return SqliteCursor(self, {}, pipeline=pipeline)
+
+    async def insert_one(self, doc: dict) -> InsertOneResult:
+        ids = await self.database.run(self.insert, [doc])
+        return InsertOneResult(ids[0], True)
+
+    async def insert_many(self, docs: Sequence[dict], ordered: bool = True) -> InsertManyResult:
+        def insert_all():
+            with self.database.transaction(self.name):
+                return self.insert(docs)
+        return InsertManyResult(await self.database.run(insert_all), True)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        if is_replacement(update):
+            raise ValueError("update only works with $ operators")
+        return UpdateResult(await self.database.run(self.update, query, update, upsert), True)
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return UpdateResult(await self.database.run(self.update, query, update, upsert, True), True)
+
+    async def replace_one(self, query: dict, replacement: dict, upsert: bool = False) -> UpdateResult:
+        if not is_replacement(replacement):
+            raise ValueError("replacement must not contain update operators")
+        return UpdateResult(await self.database.run(self.update, query, replacement, upsert), True)
+
+    async def delete_one(self, query: dict) -> DeleteResult:
+        return DeleteResult({"n": await self.database.run(self.delete, query)}, True)
+
+    async def delete_many(self, query: dict) -> DeleteResult:
+        return DeleteResult({"n": await self.database.run(self.delete, query, True)}, True)
+
+    async def find_one_and_delete(self, query: dict, projection: Optional[dict] = None, sort=None) -> Optional[dict]:
+        return await self.database.run(self.find_and_delete, query, projection, sort_spec(sort) if sort else None)
+
+    async def bulk_write(self, requests: Sequence, ordered: bool = True) -> BulkWriteResult:
+        return BulkWriteResult(await self.database.run(self.bulk, requests), True)
+
+    async def create_index(self, keys, unique: bool = False, **kwargs) -> str:
+        return await self.database.run(self.index, sort_spec(keys), unique)
+
+class SqliteDatabase:
+    """Stands in for a Motor database; collections are attributes like db.lap_entries"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.connection: Optional[sqlite3.Connection] = None
+        self.tables = set()
+        self.collections: Dict[str, SqliteCollection] = {}
+
+    def __getattr__(self, name: str) -> SqliteCollection:
+        if name.startswith("_") or not COLLECTION_NAME.match(name):
+            raise AttributeError(name)
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = SqliteCollection(self, name)
+        return collection
+
+    def __getitem__(self, name: str) -> SqliteCollection:
+        return getattr(self, name)
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    # ---- executor thread ----
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            # Autocommit; bulk writes open their own transaction
+            self.connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+        return self.connection
+
+    def connection_for(self, name: str) -> sqlite3.Connection:
+        connection = self.connect()
+        if name not in self.tables:
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{name}" (_id TEXT PRIMARY KEY, doc TEXT NOT NULL)')
+            self.tables.add(name)
+        return connection
+
+    def transaction(self, name: str):
+        return Transaction(self.connection_for(name))
+
+    # ---- Motor API ----
+
+    async def command(self, name: str, *args, **kwargs) -> dict:
+        if name != "ping":
+            raise NotImplementedError(f"Command {name} is not supported")
+        await self.run(lambda: self.connect().execute("SELECT 1").fetchone())
+        return {"ok": 1.0}
+
+    async def create_collection(self, name: str, **options):
+        def create():
+            exists = self.connect().execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+            if exists:
+                raise CollectionInvalid(f"collection {name} already exists")
+            self.connection_for(name)
+        await self.run(create)
+        return getattr(self, name)
+
+    async def list_collection_names(self) -> List[str]:
+        rows = await self.run(lambda: self.connect().execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall())
+        return [row[0] for row in rows]
+
+    def close(self):
+        def close_connection():
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+        self.executor.submit(close_connection).result()
+        self.executor.shutdown(wait=True)
+
+class Transaction:
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,11 @@
+"""
+Automatic lap capture from the UDP telemetry of the official F1 game (F1 24 format).
+
+packets  - packet layouts and decoding
+capture  - per-rig lap tracking (detects completed laps)
+ingest   - asyncio UDP service that writes captured laps to the leaderboard
+
+Run it inside the backend (TELEMETRY_UDP_PORT, single worker) or on its own:
+
+    python -m telemetry
+"""
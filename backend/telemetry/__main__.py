@@ -0,0 +1,37 @@
+"""
+Runs the telemetry ingest as its own process, e.g. next to a multi-worker backend:
+
+    cd backend && CACHE_BUS_ENABLED=1 TELEMETRY_UDP_PORT=20777 python -m telemetry
+
+With CACHE_BUS_ENABLED=1 (set it on the backend too) the backend workers drop
+their cached leaderboard when a captured lap is written, and this process picks
+up cut zones edited in the admin area.
+"""
+import asyncio
+import logging
+
+from config import CACHE_BUS_ENABLED, TELEMETRY_UDP_PORT
+from cache import start_cache_bus
+from database import connect_database, close_database
+from telemetry.ingest import telemetry_ingest
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+async def main():
+    connect_database()
+    try:
+        if CACHE_BUS_ENABLED:
+            await start_cache_bus()
+        else:
+            logging.warning("CACHE_BUS_ENABLED=1 fehlt - das Backend zeigt erfasste Runden erst nach einem Neustart an")
+        await telemetry_ingest.start(port=TELEMETRY_UDP_PORT or 20777)
+        await asyncio.Event().wait()
+    finally:
+        telemetry_ingest.close()
+        close_database()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,126 @@
+"""Detects completed laps in the lap data stream of one rig and samples their traces"""
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from telemetry.packets import DRIVER_IN_GARAGE, DRIVER_IN_LAP, DRIVER_OUT_LAP, CarInputs, CarMotion, LapData
+from traces import CHANNELS
+
+# Laps that started or ended in these states are no hot laps
+NON_TIMED_DRIVER_STATUS = (DRIVER_IN_GARAGE, DRIVER_IN_LAP, DRIVER_OUT_LAP)
+
+@dataclass
+class CompletedLap:
+    session_uid: int
+    lap_number: int
+    lap_time_ms: int
+    sector1_ms: int
+    sector2_ms: int
+    sector3_ms: int
+    valid: bool
+    track_id: Optional[int] = None
+    # Only the game's invalid flag (track limits) speaks against the lap, an admin may still approve it
+    flagged_invalid: bool = False
+
+class LapTracker:
+    """Follows the player car of one rig. The game only reports the previous lap
+    time once the next lap has started, so a lap is complete when the lap number
+    goes up and m_lastLapTimeInMS is set. Invalid, pit and in/out flags are
+    collected over the whole lap because the game resets them at the line."""
+
+    def __init__(self):
+        self.session_uid: Optional[int] = None
+        self.track_id: Optional[int] = None
+        self.reset()
+
+    def reset(self):
+        self.lap_number: Optional[int] = None
+        self.invalid = False
+        self.pitted = False
+        self.untimed = False
+        self.sector1_ms = 0
+        self.sector2_ms = 0
+
+    def on_session(self, session_uid: int, track_id: int):
+        if session_uid != self.session_uid:
+            self.session_uid = session_uid
+            self.reset()
+        self.track_id = track_id
+
+    def on_lap_data(self, session_uid: int, lap: LapData) -> Optional[CompletedLap]:
+        if session_uid != self.session_uid:
+            # New session (restart, flashback into a new one, track change)
+            self.session_uid = session_uid
+            self.track_id = None
+            self.reset()
+
+        completed = None
+        if self.lap_number is not None and lap.current_lap_num == self.lap_number + 1 and lap.last_lap_time_ms > 0:
+            sector3_ms = lap.last_lap_time_ms - self.sector1_ms - self.sector2_ms
+            timed = not (self.pitted or self.untimed) and self.sector1_ms > 0 and self.sector2_ms > 0 and sector3_ms > 0
+            completed = CompletedLap(
+                session_uid=session_uid,
+                lap_number=self.lap_number,
+                lap_time_ms=lap.last_lap_time_ms,
+                sector1_ms=self.sector1_ms,
+                sector2_ms=self.sector2_ms,
+                sector3_ms=sector3_ms,
+                valid=timed and not self.invalid,
+                track_id=self.track_id,
+                flagged_invalid=timed and self.invalid,
+            )
+            self.reset()
+        elif self.lap_number is not None and lap.current_lap_num != self.lap_number:
+            # Restarted lap, flashback or a skipped packet range: nothing to score
+            self.reset()
+
+        if self.lap_number is None:
+            self.lap_number = lap.current_lap_num
+            # Joining mid-lap: the part we missed could hide a cut or a pit stop
+            self.untimed = completed is None and lap.current_lap_time_ms > 1000
+        self.invalid = self.invalid or bool(lap.current_lap_invalid)
+        self.pitted = self.pitted or lap.pit_status != 0
+        self.untimed = self.untimed or lap.driver_status in NON_TIMED_DRIVER_STATUS
+        if lap.sector1_ms:
+            self.sector1_ms = lap.sector1_ms
+        if lap.sector2_ms:
+            self.sector2_ms = lap.sector2_ms
+        return completed
+
+class TraceBuffer:
+    """Collects one trace sample per lap data packet of the running lap, combined
+    with the latest car inputs and position (they arrive in their own packets)."""
+
+    def __init__(self):
+        self.lap_number: Optional[int] = None
+        self.inputs: Optional[CarInputs] = None
+        self.motion: Optional[CarMotion] = None
+        self.columns = self.new_columns()
+
+    @staticmethod
+    def new_columns() -> List[array]:
+        return [array('f') for _ in CHANNELS]
+
+    def on_inputs(self, inputs: CarInputs):
+        self.inputs = inputs
+
+    def on_motion(self, motion: CarMotion):
+        self.motion = motion
+
+    def on_lap_data(self, lap: LapData) -> Optional[Tuple[int, List[array]]]:
+        """Returns (lap number, columns) of the previous lap once a new one starts"""
+        finished = None
+        if lap.current_lap_num != self.lap_number:
+            if self.lap_number is not None and len(self.columns[0]):
+                finished = (self.lap_number, self.columns)
+            self.lap_number = lap.current_lap_num
+            self.columns = self.new_columns()
+        # Before the first crossing of the line the distance is negative
+        if self.inputs is None or self.motion is None or lap.lap_distance < 0:
+            return finished
+        inputs, motion = self.inputs, self.motion
+        sample = (lap.lap_distance, lap.current_lap_time_ms, inputs.speed_kmh, inputs.throttle, inputs.brake,
+            inputs.steer, inputs.gear, motion.world_position_x, motion.world_position_z)
+        for column, value in zip(self.columns, sample):
+            column.append(value)
+        return finished
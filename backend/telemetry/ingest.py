@@ -0,0 +1,205 @@
+"""asyncio UDP service: decodes the game telemetry of every rig and writes completed laps to the leaderboard"""
+from datetime import datetime, timezone
+from array import array
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from config import (
+    TELEMETRY_BIND_ADDRESS, TELEMETRY_QUEUE_SIZE, TELEMETRY_RECORD_FILE, TELEMETRY_UDP_PORT, WEB_CONCURRENCY
+)
+from database import db
+from lap_rules import check_trace, load_cut_zones
+from models import LapEntry, RejectedLap, Rig
+from leaderboard import current_track_id, format_lap_time, insert_lap, pack_sectors, update_lap
+from telemetry.capture import CompletedLap, LapTracker, TraceBuffer
+from telemetry.live import live_feed
+from telemetry.packets import (
+    CAR_TELEMETRY, LAP_DATA, MOTION, PACKET_ID_OFFSET, SESSION, TRACK_NAMES, decode_packet
+)
+from telemetry.recording import CaptureWriter
+from traces import delete_trace, save_trace
+
+# last_seen of a rig is written at most this often
+LAST_SEEN_INTERVAL_SECONDS = 5
+# Packet types the consumer handles, everything else is dropped on arrival
+INGESTED_PACKETS = frozenset((LAP_DATA, SESSION, MOTION, CAR_TELEMETRY))
+RECORD_FLUSH_SECONDS = 1
+GAME_INVALID_REASON = "Vom Spiel als ungültig markiert"
+
+class TelemetryProtocol(asyncio.DatagramProtocol):
+    """Only queues the packets lap capture needs; decoding happens in the consumer task"""
+
+    def __init__(self, queue: asyncio.Queue, recorder: Optional[CaptureWriter] = None):
+        self.queue = queue
+        self.recorder = recorder
+        self.dropped = 0
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]):
+        if self.recorder:
+            self.recorder.write(data, address=addr)
+        # Packet id is the 7th byte of the header
+        if len(data) <= PACKET_ID_OFFSET or data[PACKET_ID_OFFSET] not in INGESTED_PACKETS:
+            return
+        try:
+            self.queue.put_nowait((addr[0], data))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+class TelemetryIngest:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+        self.trackers: Dict[str, LapTracker] = {}
+        self.traces: Dict[str, TraceBuffer] = {}
+        self.last_seen: Dict[str, float] = {}
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.protocol: Optional[TelemetryProtocol] = None
+        self.recorder: Optional[CaptureWriter] = None
+
+    async def start(self, host: str = TELEMETRY_BIND_ADDRESS, port: int = TELEMETRY_UDP_PORT,
+                    record_file: str = TELEMETRY_RECORD_FILE):
+        await db.rigs.create_index("address", unique=True)
+        loop = asyncio.get_running_loop()
+        if record_file:
+            self.recorder = CaptureWriter(record_file)
+            loop.create_task(self.flush_recording())
+            logging.info(f"Telemetrie wird aufgezeichnet: {record_file}")
+        self.transport, self.protocol = await loop.create_datagram_endpoint(
+            lambda: TelemetryProtocol(self.queue, self.recorder), local_addr=(host, port))
+        loop.create_task(self.consume())
+        logging.info(f"Telemetrie-Empfang auf UDP {host}:{port}")
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
+        if self.recorder:
+            self.recorder.close()
+
+    async def flush_recording(self):
+        while True:
+            await asyncio.sleep(RECORD_FLUSH_SECONDS)
+            self.recorder.flush()
+
+    async def consume(self):
+        while True:
+            address, data = await self.queue.get()
+            try:
+                await self.handle_packet(address, data)
+            except Exception:
+                logging.exception(f"Telemetrie-Paket von {address} konnte nicht verarbeitet werden")
+
+    async def handle_packet(self, address: str, data: bytes):
+        packet = decode_packet(data)
+        if packet is None:
+            return
+        header, payload = packet
+        await self.touch_rig(address)
+        tracker = self.trackers.setdefault(address, LapTracker())
+        trace = self.traces.setdefault(address, TraceBuffer())
+        if header.packet_id == MOTION:
+            trace.on_motion(payload)
+            live_feed.on_motion(address, payload)
+        elif header.packet_id == CAR_TELEMETRY:
+            trace.on_inputs(payload)
+        elif header.packet_id == SESSION:
+            tracker.on_session(header.session_uid, payload.track_id)
+        elif header.packet_id == LAP_DATA:
+            completed = tracker.on_lap_data(header.session_uid, payload)
+            finished = trace.on_lap_data(payload)
+            if completed:
+                columns = finished[1] if finished and finished[0] == completed.lap_number else None
+                await self.record_lap(address, completed, columns)
+
+    async def touch_rig(self, address: str):
+        now = time.monotonic()
+        if now - self.last_seen.get(address, 0) < LAST_SEEN_INTERVAL_SECONDS:
+            return
+        self.last_seen[address] = now
+        rig = Rig(address=address, name=address).model_dump(exclude={"last_seen"})
+        rig['created_at'] = rig['created_at'].isoformat()
+        seen = datetime.now(timezone.utc).isoformat()
+        await db.rigs.update_one({"address": address}, {"$set": {"last_seen": seen}, "$setOnInsert": rig}, upsert=True)
+
+    async def record_lap(self, address: str, lap: CompletedLap, trace: Optional[List[array]] = None):
+        """Best valid lap of the rig's current driver goes to the leaderboard with its trace, unless the
+        game flagged it invalid or it breaks a track limit rule of the event track (then it waits in
+        rejected_laps for an admin)"""
+        track = TRACK_NAMES.get(lap.track_id, "unbekannte Strecke")
+        if not lap.valid and not lap.flagged_invalid:
+            logging.info(f"Rig {address}: ungültige Runde {lap.lap_number} ({format_lap_time(lap.lap_time_ms)}, {track}) verworfen")
+            return
+        rig = await db.rigs.find_one({"address": address}, {"_id": 0})
+        if not rig or not rig.get('driver_name'):
+            logging.info(f"Rig {address}: Runde {format_lap_time(lap.lap_time_ms)} ohne zugewiesenen Fahrer verworfen")
+            return
+        event = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0, "status": 1})
+        if not event or event.get('status') != 'active':
+            return
+
+        track_id = await current_track_id()
+        sectors = pack_sectors((lap.sector1_ms, lap.sector2_ms, lap.sector3_ms))
+        if lap.flagged_invalid:
+            reason = GAME_INVALID_REASON
+        else:
+            zones = await load_cut_zones(track_id)
+            reason = await asyncio.to_thread(check_trace, zones, trace) if zones else None
+        if reason:
+            await reject_lap(rig, lap.lap_time_ms, sectors, track_id, reason, trace)
+            return
+        await enter_lap(rig, lap.lap_time_ms, sectors, track_id, trace)
+
+async def enter_lap(rig: dict, lap_time_ms: int, sectors: Optional[int], track_id: Optional[str],
+                    trace: Optional[List[array]] = None):
+    """Insert the lap for the rig's driver, or improve the driver's entry (rig['lap_id']) if it is faster"""
+    lap_time_display = format_lap_time(lap_time_ms)
+    existing = None
+    if rig.get('lap_id'):
+        existing = await db.lap_entries.find_one({"id": rig['lap_id']}, {"_id": 0})
+    if existing:
+        if lap_time_ms < existing['lap_time_ms']:
+            trace_samples = await store_trace(existing['id'], trace)
+            await update_lap(existing, {"lap_time_ms": lap_time_ms, "lap_time_display": lap_time_display,
+                "sectors": sectors, "trace_samples": trace_samples})
+            logging.info(f"Rig {rig['name']}: neue Bestzeit {lap_time_display} für {rig['driver_name']}")
+        return
+
+    lap_entry = LapEntry(driver_name=rig['driver_name'], team=rig.get('team'), email=rig.get('email'),
+        lap_time_ms=lap_time_ms, lap_time_display=lap_time_display, track_id=track_id, sectors=sectors)
+    lap_entry.trace_samples = await store_trace(lap_entry.id, trace)
+    await insert_lap(lap_entry)
+    # Only while the same driver is still seated
+    await db.rigs.update_one({"id": rig['id'], "driver_name": rig['driver_name']}, {"$set": {"lap_id": lap_entry.id}})
+    logging.info(f"Rig {rig['name']}: Runde {lap_time_display} für {rig['driver_name']} eingetragen")
+
+async def reject_lap(rig: dict, lap_time_ms: int, sectors: Optional[int], track_id: Optional[str], reason: str,
+                     trace: Optional[List[array]] = None):
+    """Hold a lap back from the leaderboard until an admin approves it"""
+    rejected = RejectedLap(rig_id=rig['id'], rig_name=rig['name'], driver_name=rig['driver_name'], team=rig.get('team'),
+        email=rig.get('email'), lap_time_ms=lap_time_ms, lap_time_display=format_lap_time(lap_time_ms), sectors=sectors,
+        track_id=track_id, reason=reason, lap_entry_id=rig.get('lap_id'))
+    rejected.trace_samples = await store_trace(rejected.id, trace)
+    doc = rejected.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    await db.rejected_laps.insert_one(doc)
+    logging.warning(f"Rig {rig['name']}: Runde {rejected.lap_time_display} von {rig['driver_name']} zurückgehalten - {reason}")
+
+async def store_trace(lap_id: str, columns: Optional[List[array]]) -> Optional[int]:
+    """Write the trace file of a lap (off the event loop), replacing an older one"""
+    if not columns:
+        await asyncio.to_thread(delete_trace, lap_id)
+        return None
+    return await asyncio.to_thread(save_trace, lap_id, columns)
+
+telemetry_ingest = TelemetryIngest()
+
+# ============== STARTUP TASKS ==============
+
+async def start_telemetry_ingest():
+    if not TELEMETRY_UDP_PORT:
+        return
+    if WEB_CONCURRENCY > 1:
+        # Every worker would try to bind the same port
+        logging.warning("Telemetrie-Empfang mit mehreren Workern bitte separat starten: python -m telemetry")
+        return
+    await telemetry_ingest.start()
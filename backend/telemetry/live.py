@@ -0,0 +1,206 @@
+"""
+Live car positions for the track map.
+
+The ingest only stores the latest motion sample per rig. A single broadcast
+task turns them into one binary frame per tick (LIVE_POSITION_HZ) and hands
+the same bytes to every subscriber, so the work per tick does not depend on
+how many spectators are watching or how fast the games send packets.
+
+Frame layout (little endian): FRAME_HEADER (version, car count, sequence),
+then FRAME_CAR per car: rig slot, x and z in decimetres, yaw scaled to int16.
+Which rig a slot belongs to is sent as a JSON text message ("rigs") on connect
+and whenever rigs or the event status change.
+"""
+from dataclasses import dataclass, field
+from struct import Struct
+from typing import Dict, Optional, Set
+import asyncio
+import logging
+import math
+import time
+
+import orjson
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from config import LIVE_POSITION_HZ
+from database import db
+from telemetry.packets import CarMotion
+
+FRAME_VERSION = 1
+FRAME_HEADER = Struct("<BBH")
+FRAME_CAR = Struct("<Bhhh")
+# Decimetres keep ±3.2 km in an int16, more than any track needs
+POSITION_SCALE = 10
+YAW_SCALE = 32767 / math.pi
+INT16_MAX = 32767
+# Rigs that sent no motion packet for this long disappear from the map
+STALE_SECONDS = 3
+# Rig names and the event status are reloaded this often while someone watches
+META_REFRESH_SECONDS = 2
+
+def quantize(value: float, scale: float) -> int:
+    return max(-INT16_MAX, min(INT16_MAX, round(value * scale)))
+
+def encode_frame(sequence: int, cars: Dict[int, CarMotion]) -> bytes:
+    """One position frame for all cars (slot -> latest motion)"""
+    frame = bytearray(FRAME_HEADER.size + len(cars) * FRAME_CAR.size)
+    FRAME_HEADER.pack_into(frame, 0, FRAME_VERSION, len(cars), sequence & 0xFFFF)
+    offset = FRAME_HEADER.size
+    for slot, motion in cars.items():
+        FRAME_CAR.pack_into(frame, offset, slot, quantize(motion.world_position_x, POSITION_SCALE),
+            quantize(motion.world_position_z, POSITION_SCALE), quantize(motion.yaw, YAW_SCALE))
+        offset += FRAME_CAR.size
+    return bytes(frame)
+
+def decode_frame(frame: bytes) -> dict:
+    """Counterpart of encode_frame, for tests and tools"""
+    version, count, sequence = FRAME_HEADER.unpack_from(frame)
+    cars = {}
+    for slot, x, z, yaw in FRAME_CAR.iter_unpack(memoryview(frame)[FRAME_HEADER.size:FRAME_HEADER.size + count * FRAME_CAR.size]):
+        cars[slot] = (x / POSITION_SCALE, z / POSITION_SCALE, yaw / YAW_SCALE)
+    return {"version": version, "sequence": sequence, "cars": cars}
+
+@dataclass(eq=False)
+class Subscriber:
+    """Latest unsent messages of one connection; a slow client skips frames instead of queueing them"""
+    frame: Optional[bytes] = None
+    meta: Optional[bytes] = None
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def offer(self, frame: Optional[bytes] = None, meta: Optional[bytes] = None):
+        if frame is not None:
+            self.frame = frame
+        if meta is not None:
+            self.meta = meta
+        self.ready.set()
+
+class LiveFeed:
+    def __init__(self, hz: float = LIVE_POSITION_HZ):
+        self.interval = 1 / hz
+        self.slots: Dict[str, int] = {}
+        self.positions: Dict[str, CarMotion] = {}
+        self.updated: Dict[str, float] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self.active = False
+        self.meta: Optional[bytes] = None
+        self.sequence = 0
+        self.dirty = False
+        self.sent_cars = 0
+        self.next_meta = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def on_motion(self, address: str, motion: CarMotion):
+        """Called by the ingest for every motion packet; only keeps the latest sample"""
+        if address not in self.slots:
+            self.slots[address] = len(self.slots)
+            # Name the new slot with the next tick
+            self.next_meta = 0.0
+        self.positions[address] = motion
+        self.updated[address] = time.monotonic()
+        self.dirty = True
+
+    def current_cars(self) -> Dict[int, CarMotion]:
+        cutoff = time.monotonic() - STALE_SECONDS
+        return {self.slots[address]: motion for address, motion in self.positions.items()
+                if self.updated[address] >= cutoff}
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        if self.meta is not None:
+            subscriber.offer(meta=self.meta)
+        self.subscribers.add(subscriber)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def broadcast(self, frame: Optional[bytes] = None, meta: Optional[bytes] = None):
+        for subscriber in self.subscribers:
+            subscriber.offer(frame, meta)
+
+    def tick(self) -> Optional[bytes]:
+        """Frame for this tick, None if nothing moved or the event is not running"""
+        if not self.active or not self.subscribers:
+            return None
+        cars = self.current_cars()
+        # A rig going stale sends no packet, only the shrinking car count shows it
+        if not self.dirty and len(cars) == self.sent_cars:
+            return None
+        self.dirty = False
+        self.sent_cars = len(cars)
+        self.sequence += 1
+        frame = encode_frame(self.sequence, cars)
+        self.broadcast(frame=frame)
+        return frame
+
+    async def refresh_meta(self):
+        event = await db.event_settings.find_one({"id": "current_event"}, {"_id": 0, "status": 1})
+        self.active = bool(event) and event.get('status') == 'active'
+        names = {}
+        async for rig in db.rigs.find({"address": {"$in": list(self.slots)}}, {"_id": 0, "address": 1, "name": 1, "driver_name": 1}):
+            names[rig['address']] = rig
+        meta = orjson.dumps({
+            "type": "rigs",
+            "active": self.active,
+            "hz": 1 / self.interval,
+            "position_scale": POSITION_SCALE,
+            "rigs": [{"slot": slot, "name": names.get(address, {}).get('name', address),
+                      "driver_name": names.get(address, {}).get('driver_name')}
+                     for address, slot in self.slots.items()],
+        })
+        if meta != self.meta:
+            self.meta = meta
+            self.dirty = True
+            self.broadcast(meta=meta)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.next_meta = 0.0
+        while self.subscribers:
+            started = loop.time()
+            try:
+                if started >= self.next_meta:
+                    self.next_meta = started + META_REFRESH_SECONDS
+                    await self.refresh_meta()
+                self.tick()
+            except Exception:
+                logging.exception("Live-Positionen konnten nicht gesendet werden")
+            await asyncio.sleep(max(0, self.interval - (loop.time() - started)))
+
+live_feed = LiveFeed()
+
+# ============== LIVE ROUTES ==============
+
+live_router = APIRouter(prefix="/api")
+
+async def wait_closed(websocket: WebSocket):
+    # Clients only listen; whatever they send is ignored
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@live_router.websocket("/live/positions")
+async def live_positions(websocket: WebSocket):
+    await websocket.accept()
+    subscriber = live_feed.subscribe()
+    closed = asyncio.get_running_loop().create_task(wait_closed(websocket))
+    try:
+        while not closed.done():
+            ready = asyncio.get_running_loop().create_task(subscriber.ready.wait())
+            await asyncio.wait({ready, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed.done():
+                ready.cancel()
+                break
+            subscriber.ready.clear()
+            if subscriber.meta is not None:
+                meta, subscriber.meta = subscriber.meta, None
+                await websocket.send_text(meta.decode())
+            if subscriber.frame is not None:
+                frame, subscriber.frame = subscriber.frame, None
+                await websocket.send_bytes(frame)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        live_feed.unsubscribe(subscriber)
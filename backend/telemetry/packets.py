@@ -0,0 +1,213 @@
+"""
+F1 24 UDP packet layouts (little endian, packed) and decoding.
+
+Layouts are precompiled struct.Struct objects. Decoding unpacks straight from
+the received buffer (bytes or memoryview) at the player car's offset, so a
+packet is parsed without slicing or copying it and without touching the other
+21 cars.
+"""
+from struct import Struct
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+PACKET_FORMAT = 2024
+NUM_CARS = 22
+
+# Packet ids
+MOTION = 0
+SESSION = 1
+LAP_DATA = 2
+CAR_TELEMETRY = 6
+
+HEADER = Struct("<HBBBBBQfIIBB")
+HEADER_SIZE = HEADER.size  # 29
+# packetFormat, gameYear, gameMajorVersion, gameMinorVersion and packetVersion come before packetId
+PACKET_ID_OFFSET = Struct(HEADER.format[:6]).size  # 6
+
+LAP_DATA_CAR = Struct("<IIHBHBHBHBfffBBBBBBBBBBBBBBBHHBfB")
+LAP_DATA_SIZE = LAP_DATA_CAR.size  # 57
+LAP_DATA_PACKET_SIZE = HEADER_SIZE + NUM_CARS * LAP_DATA_SIZE + 2  # 1285
+
+MOTION_CAR = Struct("<ffffffhhhhhhffffff")
+MOTION_SIZE = MOTION_CAR.size  # 60
+MOTION_PACKET_SIZE = HEADER_SIZE + NUM_CARS * MOTION_SIZE  # 1349
+
+# Car telemetry entries are 60 bytes; only the leading driver inputs are decoded
+CAR_TELEMETRY_SIZE = 60
+CAR_TELEMETRY_INPUTS = Struct("<HfffBbH")
+CAR_TELEMETRY_PACKET_SIZE = HEADER_SIZE + NUM_CARS * CAR_TELEMETRY_SIZE + 3  # 1352
+
+# First fields of the session packet: weather, track/air temperature, total laps,
+# track length, session type, track id
+SESSION_START = Struct("<BbbBHBb")
+
+# Kept for callers that build packets (tests, replay tools)
+HEADER_FORMAT = HEADER.format
+LAP_DATA_FORMAT = LAP_DATA_CAR.format
+MOTION_FORMAT = MOTION_CAR.format
+SESSION_FORMAT = SESSION_START.format
+
+# m_driverStatus
+DRIVER_IN_GARAGE = 0
+DRIVER_FLYING_LAP = 1
+DRIVER_IN_LAP = 2
+DRIVER_OUT_LAP = 3
+DRIVER_ON_TRACK = 4
+
+class PacketHeader(NamedTuple):
+    packet_format: int
+    game_year: int
+    game_major_version: int
+    game_minor_version: int
+    packet_version: int
+    packet_id: int
+    session_uid: int
+    session_time: float
+    frame_identifier: int
+    overall_frame_identifier: int
+    player_car_index: int
+    secondary_player_car_index: int
+
+class LapData(NamedTuple):
+    last_lap_time_ms: int
+    current_lap_time_ms: int
+    sector1_ms_part: int
+    sector1_minutes_part: int
+    sector2_ms_part: int
+    sector2_minutes_part: int
+    delta_to_car_in_front_ms_part: int
+    delta_to_car_in_front_minutes_part: int
+    delta_to_race_leader_ms_part: int
+    delta_to_race_leader_minutes_part: int
+    lap_distance: float
+    total_distance: float
+    safety_car_delta: float
+    car_position: int
+    current_lap_num: int
+    pit_status: int
+    num_pit_stops: int
+    sector: int
+    current_lap_invalid: int
+    penalties: int
+    total_warnings: int
+    corner_cutting_warnings: int
+    num_unserved_drive_through_pens: int
+    num_unserved_stop_go_pens: int
+    grid_position: int
+    driver_status: int
+    result_status: int
+    pit_lane_timer_active: int
+    pit_lane_time_in_lane_ms: int
+    pit_stop_timer_ms: int
+    pit_stop_should_serve_pen: int
+    speed_trap_fastest_speed: float
+    speed_trap_fastest_lap: int
+
+    @property
+    def sector1_ms(self) -> int:
+        return self.sector1_minutes_part * 60000 + self.sector1_ms_part
+
+    @property
+    def sector2_ms(self) -> int:
+        return self.sector2_minutes_part * 60000 + self.sector2_ms_part
+
+class CarMotion(NamedTuple):
+    world_position_x: float
+    world_position_y: float
+    world_position_z: float
+    world_velocity_x: float
+    world_velocity_y: float
+    world_velocity_z: float
+    world_forward_dir_x: int
+    world_forward_dir_y: int
+    world_forward_dir_z: int
+    world_right_dir_x: int
+    world_right_dir_y: int
+    world_right_dir_z: int
+    g_force_lateral: float
+    g_force_longitudinal: float
+    g_force_vertical: float
+    yaw: float
+    pitch: float
+    roll: float
+
+class CarInputs(NamedTuple):
+    speed_kmh: int
+    throttle: float
+    steer: float
+    brake: float
+    clutch: int
+    gear: int
+    engine_rpm: int
+
+class SessionInfo(NamedTuple):
+    weather: int
+    track_temperature: int
+    air_temperature: int
+    total_laps: int
+    track_length: int
+    session_type: int
+    track_id: int
+
+def decode_header(data: Buffer) -> Optional[PacketHeader]:
+    """Header of an F1 24 packet, None for anything else"""
+    if len(data) < HEADER_SIZE:
+        return None
+    header = PacketHeader._make(HEADER.unpack_from(data))
+    if header.packet_format != PACKET_FORMAT:
+        return None
+    return header
+
+def check_size(data: Buffer, size: int):
+    if len(data) < size:
+        raise ValueError(f"Packet too short: {len(data)} < {size} bytes")
+
+def decode_lap_data(data: Buffer, car_index: int) -> LapData:
+    check_size(data, LAP_DATA_PACKET_SIZE)
+    return LapData._make(LAP_DATA_CAR.unpack_from(data, HEADER_SIZE + car_index * LAP_DATA_SIZE))
+
+def decode_motion(data: Buffer, car_index: int) -> CarMotion:
+    check_size(data, MOTION_PACKET_SIZE)
+    return CarMotion._make(MOTION_CAR.unpack_from(data, HEADER_SIZE + car_index * MOTION_SIZE))
+
+def decode_car_inputs(data: Buffer, car_index: int) -> CarInputs:
+    check_size(data, CAR_TELEMETRY_PACKET_SIZE)
+    return CarInputs._make(CAR_TELEMETRY_INPUTS.unpack_from(data, HEADER_SIZE + car_index * CAR_TELEMETRY_SIZE))
+
+def decode_session(data: Buffer, car_index: int = 0) -> SessionInfo:
+    check_size(data, HEADER_SIZE + SESSION_START.size)
+    return SessionInfo._make(SESSION_START.unpack_from(data, HEADER_SIZE))
+
+def iter_lap_data(data: Buffer) -> Iterator[LapData]:
+    """Lap data of all cars, unpacked from a view over the packet"""
+    check_size(data, LAP_DATA_PACKET_SIZE)
+    view = memoryview(data)[HEADER_SIZE:HEADER_SIZE + NUM_CARS * LAP_DATA_SIZE]
+    return map(LapData._make, LAP_DATA_CAR.iter_unpack(view))
+
+DECODERS: Dict[int, Callable[[Buffer, int], NamedTuple]] = {
+    MOTION: decode_motion,
+    SESSION: decode_session,
+    LAP_DATA: decode_lap_data,
+    CAR_TELEMETRY: decode_car_inputs,
+}
+
+def decode_packet(data: Buffer) -> Optional[Tuple[PacketHeader, NamedTuple]]:
+    """Header and player car payload of a supported packet, None for packets we don't use"""
+    header = decode_header(data)
+    if header is None:
+        return None
+    decoder = DECODERS.get(header.packet_id)
+    if decoder is None or header.player_car_index >= NUM_CARS:
+        return None
+    return header, decoder(data, header.player_car_index)
+
+# Game track ids, for logging and the rig overview
+TRACK_NAMES = {
+    0: "Melbourne", 1: "Paul Ricard", 2: "Shanghai", 3: "Sakhir", 4: "Catalunya", 5: "Monaco",
+    6: "Montreal", 7: "Silverstone", 8: "Hockenheim", 9: "Hungaroring", 10: "Spa", 11: "Monza",
+    12: "Singapore", 13: "Suzuka", 14: "Abu Dhabi", 15: "Texas", 16: "Brazil", 17: "Austria",
+    18: "Sochi", 19: "Mexico", 20: "Baku", 21: "Sakhir Short", 22: "Silverstone Short",
+    23: "Texas Short", 24: "Suzuka Short", 25: "Hanoi", 26: "Zandvoort", 27: "Imola",
+    28: "Portimão", 29: "Jeddah", 30: "Miami", 31: "Las Vegas", 32: "Losail",
+}
@@ -0,0 +1,43 @@
+"""
+Records the UDP telemetry of all rigs with their source addresses into a capture file without writing laps:
+
+    cd backend && python -m telemetry.record captures/event.f1cap [--port 20777]
+
+The running backend can record at the same time with TELEMETRY_RECORD_FILE.
+"""
+import argparse
+import socket
+import time
+
+from telemetry.recording import CaptureWriter
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="capture file, appended to if it exists")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=20777)
+    args = parser.parse_args()
+
+    writer = CaptureWriter(args.output)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((args.host, args.port))
+    sock.settimeout(1)
+    print(f"Aufnahme von UDP {args.host}:{args.port} nach {args.output} (Strg+C beendet)")
+    started = time.monotonic()
+    try:
+        while True:
+            try:
+                data, address = sock.recvfrom(2048)
+            except socket.timeout:
+                writer.flush()
+                continue
+            writer.write(data, address=address)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        sock.close()
+    print(f"{writer.records} Pakete in {time.monotonic() - started:.1f} s aufgenommen")
+
+if __name__ == "__main__":
+    main()
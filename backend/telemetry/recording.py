@@ -0,0 +1,109 @@
+"""
+Capture files: raw UDP datagrams with their arrival time and source address,
+appended one record after another. Files ending in .gz are read transparently.
+
+Version 2 files start with a <5sB header (F1CAP, version). Each record is a
+<d16sHI header (timestamp in seconds, source IP as 16 bytes with IPv4 mapped,
+source port, payload length) followed by the datagram. Files without the
+header are version 1: <dI records (timestamp, payload length) without sources.
+
+Record:  python -m telemetry.record capture.f1cap [--port 20777]
+Replay:  python -m telemetry.replay capture.f1cap [--speed 1 | --max]
+"""
+from ipaddress import IPv6Address, ip_address
+from pathlib import Path
+from struct import Struct
+from typing import Iterator, Optional, Tuple, Union
+import gzip
+import time
+
+MAGIC = b"F1CAP"
+VERSION = 2
+FILE_HEADER = Struct("<5sB")
+RECORD = Struct("<d16sHI")
+RECORD_V1 = Struct("<dI")
+NO_ADDRESS = bytes(16)
+
+Source = Optional[Tuple[str, int]]
+
+def pack_address(address: Source) -> Tuple[bytes, int]:
+    if not address:
+        return NO_ADDRESS, 0
+    host = ip_address(address[0])
+    if host.version == 4:
+        host = IPv6Address(f"::ffff:{host}")
+    return host.packed, address[1]
+
+def unpack_address(packed: bytes, port: int) -> Source:
+    if packed == NO_ADDRESS:
+        return None
+    host = IPv6Address(packed)
+    return str(host.ipv4_mapped or host), port
+
+def pack_record(timestamp: float, data: bytes, address: Source = None) -> bytes:
+    return RECORD.pack(timestamp, *pack_address(address), len(data)) + data
+
+def capture_version(buffer: Union[bytes, memoryview]) -> int:
+    if len(buffer) >= FILE_HEADER.size:
+        magic, version = FILE_HEADER.unpack_from(buffer)
+        if magic == MAGIC:
+            return version
+    return 1
+
+def read_capture(path: Union[str, Path]) -> bytes:
+    path = Path(path)
+    raw = path.read_bytes()
+    return gzip.decompress(raw) if path.suffix == ".gz" else raw
+
+def iter_records(buffer: Union[bytes, memoryview]) -> Iterator[Tuple[float, Source, memoryview]]:
+    """(timestamp, (host, port) or None, datagram) triples; datagrams are views into buffer, not copies"""
+    view = memoryview(buffer)
+    version = capture_version(view)
+    if version > VERSION:
+        raise ValueError(f"Unsupported capture version {version}")
+    offset = FILE_HEADER.size if version > 1 else 0
+    record = RECORD if version > 1 else RECORD_V1
+    end = len(view)
+    while offset + record.size <= end:
+        if version > 1:
+            timestamp, host, port, length = record.unpack_from(view, offset)
+            source = unpack_address(host, port)
+        else:
+            timestamp, length = record.unpack_from(view, offset)
+            source = None
+        offset += record.size
+        if offset + length > end:
+            raise ValueError(f"Truncated capture record at byte {offset - record.size}")
+        yield timestamp, source, view[offset:offset + length]
+        offset += length
+
+class CaptureWriter:
+    """Appends datagrams to a capture file. Records only go through a write
+    buffer, so it can run inside the receive callback; an interrupted
+    recording loses at most the unflushed tail."""
+
+    BUFFER_SIZE = 256 * 1024
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size:
+            with open(self.path, "rb") as existing:
+                version = capture_version(existing.read(FILE_HEADER.size))
+            if version != VERSION:
+                raise ValueError(f"{self.path} is a version {version} capture, record into a new file")
+        self.file = open(self.path, "ab", buffering=self.BUFFER_SIZE)
+        if not self.file.tell():
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.records = 0
+
+    def write(self, data: bytes, timestamp: Optional[float] = None, address: Source = None):
+        self.file.write(pack_record(time.time() if timestamp is None else timestamp, data, address))
+        self.records += 1
+
+    def flush(self):
+        if not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
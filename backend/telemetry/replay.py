@@ -0,0 +1,112 @@
+"""
+Sends a capture file to the telemetry port again, keeping the recorded timing:
+
+    cd backend && python -m telemetry.replay captures/event.f1cap               # Echtzeit
+    cd backend && python -m telemetry.replay captures/event.f1cap --speed 10    # 10x schneller
+    cd backend && python -m telemetry.replay captures/event.f1cap --max         # so schnell wie möglich
+
+The ingest tells rigs apart by IP, so every recorded source is sent from its
+own loopback address (127.0.0.2 and up) when a capture holds more than one.
+--copies N replays N copies of the event side by side, each copy from its own
+addresses, to load the ingest with more rigs. Version 1 captures have no
+sources and replay as one rig.
+"""
+import argparse
+import socket
+import time
+from ipaddress import IPv4Address, ip_address
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from telemetry.recording import Source, iter_records, read_capture
+
+FIRST_LOOPBACK = IPv4Address("127.0.0.2")
+
+def replay(records: Iterable[Tuple[float, Source, memoryview]], send: Callable[[Source, memoryview], int],
+           speed: float = 1.0, clock=time.perf_counter, sleep=time.sleep) -> dict:
+    """Hand every record to send(source, datagram), which returns the number of datagrams sent.
+    speed 0 means no pauses; otherwise record times relative to the first one are divided by speed."""
+    sent = 0
+    late_ms = 0.0
+    first = None
+    start = clock()
+    for timestamp, source, datagram in records:
+        if first is None:
+            first = timestamp
+        if speed:
+            due = start + (timestamp - first) / speed
+            wait = due - clock()
+            if wait > 0:
+                sleep(wait)
+            else:
+                late_ms = max(late_ms, -wait * 1000)
+        sent += send(source, datagram)
+    elapsed = clock() - start
+    return {"packets": sent, "seconds": elapsed, "packets_per_sec": sent / elapsed if elapsed else 0.0,
+            "max_late_ms": late_ms}
+
+class SourceSockets:
+    """One socket per recorded source IP and copy. With loopback set each is bound to its own
+    loopback address in order of first appearance, otherwise all send from the default address."""
+
+    def __init__(self, target: Tuple[str, int], copies: int = 1, loopback: bool = True):
+        self.target = target
+        self.copies = copies
+        self.loopback = loopback
+        self.sockets: Dict[Tuple[int, Optional[str]], socket.socket] = {}
+
+    def socket_for(self, copy: int, host: Optional[str]) -> socket.socket:
+        sock = self.sockets.get((copy, host))
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if self.loopback:
+                sock.bind((str(FIRST_LOOPBACK + len(self.sockets)), 0))
+            self.sockets[(copy, host)] = sock
+        return sock
+
+    def send(self, source: Source, datagram: memoryview) -> int:
+        host = source[0] if source else None
+        for copy in range(self.copies):
+            # Unconnected sockets, so a receiver that is not up yet does not abort the replay
+            self.socket_for(copy, host).sendto(datagram, self.target)
+        return self.copies
+
+    def addresses(self) -> Dict[Tuple[int, Optional[str]], str]:
+        return {key: sock.getsockname()[0] for key, sock in self.sockets.items()}
+
+    def close(self):
+        for sock in self.sockets.values():
+            sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="capture file (.f1cap or .f1cap.gz)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=20777)
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor, 1 = recorded timing")
+    parser.add_argument("--max", action="store_true", help="send without pauses")
+    parser.add_argument("--copies", type=int, default=1, help="replay this many copies of the event in parallel")
+    parser.add_argument("--loop", type=int, default=1, help="repeat the capture this many times")
+    args = parser.parse_args()
+
+    buffer = read_capture(args.capture)
+    hosts = {source[0] if source else None for _, source, _ in iter_records(buffer)}
+    loopback = len(hosts) * args.copies > 1
+    if loopback and not ip_address(args.host).is_loopback:
+        parser.error("Mehrere Quellen lassen sich nur an eine Loopback-Adresse abspielen (--host 127.0.0.1)")
+    sockets = SourceSockets((args.host, args.port), args.copies, loopback)
+    speed = 0 if args.max else args.speed
+    try:
+        for run in range(args.loop):
+            stats = replay(iter_records(buffer), sockets.send, speed)
+            if run == 0 and loopback:
+                for (copy, host), address in sockets.addresses().items():
+                    print(f"Quelle {host or '-'} (Kopie {copy + 1}) sendet von {address}")
+            print(f"Durchlauf {run + 1}: {stats['packets']} Pakete in {stats['seconds']:.2f} s "
+                  f"({stats['packets_per_sec']:.0f} Pakete/s, max. {stats['max_late_ms']:.1f} ms verspätet)")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sockets.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Runs the API suites without a deployed backend.
+
+Without REACT_APP_BACKEND_URL the suites talk to the full app (server.py)
+served from a thread of the test process, on the in-memory storage backend
+with a fresh database per run - no network and no MongoDB needed. Set
+REACT_APP_BACKEND_URL to test a deployed backend instead.
+"""
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+in_process = {}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_backend(timeout: float = 30) -> str:
+    """Serve server.app in a background thread and wait until its startup tasks are done"""
+    # Must be set before config is imported by the app or a test module
+    os.environ.update({"DATABASE_BACKEND": "memory", "WEB_CONCURRENCY": "1", "CACHE_BUS_ENABLED": "0",
+                       "TELEMETRY_UDP_PORT": "0", "TRACE_DIR": tempfile.mkdtemp(prefix="f1-traces-")})
+    in_process["trace_dir"] = os.environ["TRACE_DIR"]
+    import uvicorn
+    import server
+
+    port = free_port()
+    app_server = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=app_server.run, name="backend", daemon=True)
+    thread.start()
+    in_process.update(server=app_server, thread=thread)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/api/health/ready", timeout=1) as response:
+                if b'"startup":"done"' in response.read().replace(b" ", b""):
+                    return url
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError("Backend im Testprozess nicht gestartet")
+
+
+def ensure_backend() -> str:
+    """REACT_APP_BACKEND_URL, set to a backend started in this process if it is unset"""
+    if not os.environ.get('REACT_APP_BACKEND_URL'):
+        os.environ['REACT_APP_BACKEND_URL'] = start_backend()
+    return os.environ['REACT_APP_BACKEND_URL']
+
+
+ensure_backend()
+
+
+def stop_backend():
+    if in_process:
+        in_process["server"].should_exit = True
+        in_process["thread"].join(timeout=10)
+        shutil.rmtree(in_process["trace_dir"], ignore_errors=True)
+        in_process.clear()
+
+
+def pytest_unconfigure(config):
+    stop_backend()
@@ -0,0 +1,86 @@
+"""
+Generates lap_capture.f1cap.gz: a synthetic F1 24 telemetry capture of one rig
+(192.168.1.21) driving laps on a 1 km circle at 10 Hz (motion, lap data and car
+telemetry every tick, a session packet every 2 s).
+
+Laps: 1 out lap (25.0 s), 2 valid (20.5 s), 3 cut (20.0 s, invalid),
+4 valid (19.8 s), then 2 s of lap 5.
+
+USAGE:
+    python backend/tests/fixtures/make_lap_capture.py
+"""
+import gzip
+import math
+import sys
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(FIXTURE_DIR.parent.parent))
+
+from telemetry.packets import (  # noqa: E402
+    CAR_TELEMETRY, CAR_TELEMETRY_INPUTS, CAR_TELEMETRY_SIZE, HEADER, LAP_DATA, LAP_DATA_CAR, LAP_DATA_SIZE,
+    MOTION, MOTION_CAR, MOTION_SIZE, NUM_CARS, PACKET_FORMAT, SESSION, SESSION_START
+)
+from telemetry.recording import FILE_HEADER, MAGIC, VERSION, pack_record  # noqa: E402
+
+OUT = FIXTURE_DIR / "lap_capture.f1cap.gz"
+SESSION_UID = 0x5EED0F1CA7
+TRACK_LENGTH = 1000.0
+TRACK_ID = 26  # Zandvoort
+RATE_HZ = 10
+START_TIME = 1760000000.0
+LAPS = [(25000, False), (20500, False), (20000, True), (19800, False), (20000, False)]  # (lap ms, cut)
+STOP_AFTER_MS = sum(ms for ms, _ in LAPS[:4]) + 2000
+SESSION_PACKET_SIZE = 753
+RIG_ADDRESS = ("192.168.1.21", 20777)
+
+def packet(packet_id: int, frame: int, session_time: float, car: bytes, car_size: int, trailer: int) -> bytes:
+    head = HEADER.pack(PACKET_FORMAT, 24, 1, 5, 1, packet_id, SESSION_UID, session_time, frame, frame, 0, 255)
+    return head + car.ljust(car_size, b"\0") + bytes(car_size * (NUM_CARS - 1) + trailer)
+
+def main():
+    radius = TRACK_LENGTH / (2 * math.pi)
+    records = []
+    lap_start_ms, lap_idx, last_lap_ms = 0, 0, 0
+    for frame in range(STOP_AFTER_MS * RATE_HZ // 1000 + 1):
+        now_ms = frame * 1000 // RATE_HZ
+        while now_ms - lap_start_ms >= LAPS[lap_idx][0]:
+            lap_start_ms += LAPS[lap_idx][0]
+            last_lap_ms = LAPS[lap_idx][0]
+            lap_idx += 1
+        lap_ms, cut = LAPS[lap_idx]
+        current_ms = now_ms - lap_start_ms
+        speed = TRACK_LENGTH / (lap_ms / 1000)
+        lap_distance = TRACK_LENGTH * current_ms / lap_ms
+        sector = min(int(3 * current_ms / lap_ms), 2)
+        s1 = lap_ms // 3 if sector >= 1 else 0
+        s2 = lap_ms // 3 if sector >= 2 else 0
+        invalid = 1 if cut and current_ms >= lap_ms // 2 else 0
+        angle = lap_distance / radius
+        session_time = now_ms / 1000
+        timestamp = START_TIME + session_time
+
+        if frame % (2 * RATE_HZ) == 0:
+            session = SESSION_START.pack(0, 32, 24, 0, int(TRACK_LENGTH), 18, TRACK_ID)
+            head = HEADER.pack(PACKET_FORMAT, 24, 1, 5, 1, SESSION, SESSION_UID, session_time, frame, frame, 0, 255)
+            records.append(pack_record(timestamp, (head + session).ljust(SESSION_PACKET_SIZE, b"\0"), RIG_ADDRESS))
+
+        motion = MOTION_CAR.pack(radius * math.cos(angle), 0.0, radius * math.sin(angle),
+            -speed * math.sin(angle), 0.0, speed * math.cos(angle), 0, 0, 32767, 32767, 0, 0,
+            speed * speed / radius / 9.81, 0.0, 1.0, angle, 0.0, 0.0)
+        records.append(pack_record(timestamp, packet(MOTION, frame, session_time, motion, MOTION_SIZE, 0), RIG_ADDRESS))
+
+        lap = LAP_DATA_CAR.pack(last_lap_ms, current_ms, s1, 0, s2, 0, 0, 0, 0, 0, lap_distance,
+            TRACK_LENGTH * lap_idx + lap_distance, 0.0, 1, lap_idx + 1, 0, 0, sector, invalid, 0, invalid,
+            invalid, 0, 0, 1, 3 if lap_idx == 0 else 1, 2, 0, 0, 0, 0, speed * 3.6, 1)
+        records.append(pack_record(timestamp, packet(LAP_DATA, frame, session_time, lap, LAP_DATA_SIZE, 2), RIG_ADDRESS))
+
+        inputs = CAR_TELEMETRY_INPUTS.pack(int(speed * 3.6), 1.0, 0.1, 0.0, 0, 7, 11000)
+        records.append(pack_record(timestamp, packet(CAR_TELEMETRY, frame, session_time, inputs, CAR_TELEMETRY_SIZE, 3),
+            RIG_ADDRESS))
+
+    OUT.write_bytes(gzip.compress(FILE_HEADER.pack(MAGIC, VERSION) + b"".join(records), mtime=0))
+    print(f"{len(records)} Pakete geschrieben: {OUT} ({OUT.stat().st_size} Bytes)")
+
+if __name__ == "__main__":
+    main()
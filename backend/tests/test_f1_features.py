@@ -165,6 +165,27 @@ class TestDesignSettings:
         assert data["favicon_url"] == new_favicon
         print(f"✅ Favicon URL updated successfully")
 
+    def test_burst_of_partial_updates(self, auth_token):
+        """Test rapid partial saves (colour picker drag) all end up in the stored design"""
+        from concurrent.futures import ThreadPoolExecutor
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        before = requests.get(f"{BASE_URL}/api/design").json()
+        updates = [{"accent_color": "#00F0F1"}, {"accent_color": "#00F0F2"}, {"text_secondary": "#A0A0A1"}]
+        with ThreadPoolExecutor(len(updates)) as pool:
+            responses = list(pool.map(lambda body: requests.put(f"{BASE_URL}/api/admin/design", json=body, headers=headers), updates))
+        assert all(r.status_code == 200 for r in responses)
+
+        data = requests.get(f"{BASE_URL}/api/design").json()
+        assert data["accent_color"] in ("#00F0F1", "#00F0F2")
+        assert data["text_secondary"] == "#A0A0A1"
+        assert data["title_line1"] == before["title_line1"]
+
+        # Restore
+        requests.put(f"{BASE_URL}/api/admin/design", json={
+            "accent_color": before["accent_color"], "text_secondary": before["text_secondary"]
+        }, headers=headers)
+        print(f"✅ Burst of partial design updates stored")
+
 
 class TestSMTPSettings:
     """Test SMTP Settings and improved error messages"""
@@ -0,0 +1,324 @@
+"""
+F1 Fast Lap Challenge - Leaderboard API Tests
+Tests for: Materialized Rank/Gap, Sector Times, Statistics, Team Standings, Kiosk Payload, Compression
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://fastlapapp.preview.emergentagent.com').rstrip('/')
+
+
+@pytest.fixture
+def auth_token():
+    """Get authentication token"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "username": "admin",
+        "password": "admin"
+    })
+    return response.json()["token"]
+
+
+class TestMaterializedRankings:
+    """Test rank and gap maintained on lap insert, edit and delete"""
+
+    def test_ranks_are_consecutive(self):
+        """Test /api/laps returns consecutive ranks sorted by lap time"""
+        response = requests.get(f"{BASE_URL}/api/laps")
+        assert response.status_code == 200
+        data = response.json()
+
+        assert [e["rank"] for e in data] == list(range(1, len(data) + 1))
+        assert [e["lap_time_ms"] for e in data] == sorted(e["lap_time_ms"] for e in data)
+        if data:
+            assert data[0]["gap"] == "-"
+        print(f"✅ {len(data)} entries with consecutive ranks")
+
+    def test_new_leader_updates_all_gaps(self, auth_token):
+        """Test that a new fastest lap shifts ranks and recomputes gaps"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(f"{BASE_URL}/api/admin/laps", json={
+            "driver_name": "TEST_Leader",
+            "lap_time_display": "0:30.000"
+        }, headers=headers)
+        assert response.status_code == 200
+        created = response.json()
+        assert created["rank"] == 1
+        assert created["gap"] == "-"
+
+        data = requests.get(f"{BASE_URL}/api/laps").json()
+        assert data[0]["id"] == created["id"]
+        for entry in data[1:]:
+            assert entry["gap"].startswith("+") or entry["lap_time_ms"] == created["lap_time_ms"]
+
+        # Moving the lap back down re-ranks only the affected range
+        requests.put(f"{BASE_URL}/api/admin/laps/{created['id']}",
+            json={"lap_time_display": "9:59.999"}, headers=headers)
+        data = requests.get(f"{BASE_URL}/api/laps").json()
+        assert data[-1]["id"] == created["id"]
+        assert [e["rank"] for e in data] == list(range(1, len(data) + 1))
+
+        # Cleanup
+        requests.delete(f"{BASE_URL}/api/admin/laps/{created['id']}", headers=headers)
+        data = requests.get(f"{BASE_URL}/api/laps").json()
+        assert all(e["id"] != created["id"] for e in data)
+        assert [e["rank"] for e in data] == list(range(1, len(data) + 1))
+        print("✅ Ranks and gaps follow insert, edit and delete")
+
+
+class TestSectorTimes:
+    """Test packed sector times, sector bests and deltas"""
+
+    def test_sectors_and_deltas(self, auth_token):
+        """Test a lap with sectors takes the sector bests and gets purple flags"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(f"{BASE_URL}/api/admin/laps", json={
+            "driver_name": "TEST_Sectors",
+            "lap_time_display": "0:30.000",
+            "sector_times": ["9.000", "11.000", "10.000"]
+        }, headers=headers)
+        assert response.status_code == 200
+        created = response.json()
+        assert created["sector_ms"] == [9000, 11000, 10000]
+
+        entry = next(e for e in requests.get(f"{BASE_URL}/api/laps").json() if e["id"] == created["id"])
+        assert entry["sector_ms"] == [9000, 11000, 10000]
+        assert len(entry["sector_deltas_ms"]) == 3
+        assert "sectors" not in entry
+
+        bests = requests.get(f"{BASE_URL}/api/sectors", params={"track_id": created["track_id"]} if created["track_id"] else {}).json()
+        assert [s["best_ms"] <= ms for s, ms in zip(bests["sectors"], entry["sector_ms"])] == [True] * 3
+        assert bests["theoretical_best_ms"] == sum(s["best_ms"] for s in bests["sectors"])
+
+        requests.delete(f"{BASE_URL}/api/admin/laps/{created['id']}", headers=headers)
+        bests = requests.get(f"{BASE_URL}/api/sectors").json()
+        assert all(s["lap_id"] != created["id"] for s in bests["sectors"])
+        print(f"✅ Sectors stored, theoretical best {bests['theoretical_best_display']}")
+
+    def test_personal_best_flags(self, auth_token):
+        """Test green flags follow the driver's stored bests, not the laps in the response"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        fast = requests.post(f"{BASE_URL}/api/admin/laps", json={
+            "driver_name": "TEST_Personal",
+            "lap_time_display": "0:30.000",
+            "sector_times": ["9.000", "11.000", "10.000"]
+        }, headers=headers).json()
+        slow = requests.post(f"{BASE_URL}/api/admin/laps", json={
+            "driver_name": "TEST_Personal",
+            "lap_time_display": "0:33.000",
+            "sector_times": ["10.000", "12.000", "11.000"]
+        }, headers=headers)
+        try:
+            assert slow.status_code == 200
+            slow = slow.json()
+            # The created lap is returned alone but is slower than the driver's best in every sector
+            assert slow["sector_flags"] == [None, None, None]
+            entry = next(e for e in requests.get(f"{BASE_URL}/api/laps").json() if e["id"] == slow["id"])
+            assert entry["sector_flags"] == [None, None, None]
+
+            requests.delete(f"{BASE_URL}/api/admin/laps/{fast['id']}", headers=headers)
+            entry = next(e for e in requests.get(f"{BASE_URL}/api/laps").json() if e["id"] == slow["id"])
+            assert all(flag in ("green", "purple") for flag in entry["sector_flags"])
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/laps/{fast['id']}", headers=headers)
+            requests.delete(f"{BASE_URL}/api/admin/laps/{slow['id']}", headers=headers)
+        print("✅ Personal bests read from the stored driver bests")
+
+    def test_sectors_must_add_up(self, auth_token):
+        """Test sectors that don't sum to the lap time are rejected"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(f"{BASE_URL}/api/admin/laps", json={
+            "driver_name": "TEST_BadSectors",
+            "lap_time_display": "1:00.000",
+            "sector_times": ["20.000", "20.000", "19.000"]
+        }, headers=headers)
+        assert response.status_code == 400
+        print("✅ Inconsistent sectors rejected with 400")
+
+
+class TestStatistics:
+    """Test /api/stats aggregates"""
+
+    def test_global_stats(self):
+        """Test global stats match the leaderboard"""
+        laps = requests.get(f"{BASE_URL}/api/laps").json()
+        response = requests.get(f"{BASE_URL}/api/stats")
+        assert response.status_code == 200
+        data = response.json()
+
+        for key in ["count", "best_ms", "median_ms", "percentiles", "histogram", "teams", "laps_per_hour"]:
+            assert key in data
+        assert data["count"] == len(laps)
+        assert sum(b["count"] for b in data["histogram"]) == len(laps)
+        if laps:
+            assert data["best_ms"] == laps[0]["lap_time_ms"]
+            assert data["percentiles"]["p25"] <= data["median_ms"] <= data["percentiles"]["p75"]
+        print(f"✅ Stats for {data['count']} laps - median: {data['median_ms']}")
+
+    def test_histogram_bucket_width(self):
+        """Test re-binning the histogram into wider buckets"""
+        response = requests.get(f"{BASE_URL}/api/stats", params={"bucket_ms": 1000})
+        assert response.status_code == 200
+        for bucket in response.json()["histogram"]:
+            assert bucket["to_ms"] - bucket["from_ms"] == 1000
+            assert bucket["from_ms"] % 1000 == 0
+        print("✅ Histogram re-binned to 1s buckets")
+
+    def test_stats_follow_lap_writes(self, auth_token):
+        """Test that inserting and deleting a lap updates the aggregates"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        before = requests.get(f"{BASE_URL}/api/stats").json()
+        created = requests.post(f"{BASE_URL}/api/admin/laps", json={
+            "driver_name": "TEST_Stats",
+            "team": "TEST_Team",
+            "lap_time_display": "0:20.000"
+        }, headers=headers).json()
+
+        during = requests.get(f"{BASE_URL}/api/stats").json()
+        assert during["count"] == before["count"] + 1
+        assert during["best_ms"] == 20000
+        assert any(t["team"] == "TEST_Team" for t in during["teams"])
+
+        requests.delete(f"{BASE_URL}/api/admin/laps/{created['id']}", headers=headers)
+        after = requests.get(f"{BASE_URL}/api/stats").json()
+        assert after["count"] == before["count"]
+        assert after["best_ms"] == before["best_ms"]
+        assert all(t["team"] != "TEST_Team" for t in after["teams"])
+        print("✅ Stats follow lap insert and delete")
+
+
+class TestTeamStandings:
+    """Test /api/teams leaderboard and the team export section"""
+
+    def test_team_standings(self):
+        """Test team standings are ranked and carry aggregates"""
+        response = requests.get(f"{BASE_URL}/api/teams", params={"top_n": 2})
+        assert response.status_code == 200
+        data = response.json()
+
+        assert [t["rank"] for t in data] == list(range(1, len(data) + 1))
+        for team in data:
+            for key in ["team", "best_ms", "top_avg_ms", "member_count", "lap_count", "gap"]:
+                assert key in team
+            assert team["best_ms"] <= team["top_avg_ms"]
+        print(f"✅ Team standings for {len(data)} teams")
+
+    def test_top_n_bounds(self):
+        """Test invalid top_n is rejected"""
+        response = requests.get(f"{BASE_URL}/api/teams", params={"top_n": 0})
+        assert response.status_code == 422
+        print("✅ top_n=0 rejected with 422")
+
+    def test_new_lap_refreshes_cached_standings(self, auth_token):
+        """Test that a lap write invalidates the cached standings"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        created = requests.post(f"{BASE_URL}/api/admin/laps", json={
+            "driver_name": "TEST_TeamDriver",
+            "team": "TEST_NewTeam",
+            "lap_time_display": "1:11.111"
+        }, headers=headers).json()
+
+        data = requests.get(f"{BASE_URL}/api/teams").json()
+        team = next(t for t in data if t["team"] == "TEST_NewTeam")
+        assert team["best_ms"] == 71111
+        assert team["member_count"] == 1
+
+        requests.delete(f"{BASE_URL}/api/admin/laps/{created['id']}", headers=headers)
+        data = requests.get(f"{BASE_URL}/api/teams").json()
+        assert all(t["team"] != "TEST_NewTeam" for t in data)
+        print("✅ Team standings follow lap writes")
+
+    def test_exports_include_teams(self, auth_token):
+        """Test optional team section in CSV and PDF export"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        csv_response = requests.get(f"{BASE_URL}/api/admin/export/csv", params={"include_teams": "true"}, headers=headers)
+        assert csv_response.status_code == 200
+        assert "Teamwertung" in csv_response.text
+
+        pdf_response = requests.get(f"{BASE_URL}/api/admin/export/pdf", params={"include_teams": "true"}, headers=headers)
+        assert pdf_response.status_code == 200
+        assert "teams" in pdf_response.json()
+
+        plain = requests.get(f"{BASE_URL}/api/admin/export/pdf", headers=headers).json()
+        assert "teams" not in plain
+        print("✅ Team section exported on request")
+
+
+class TestKiosk:
+    """Test combined /api/kiosk payload"""
+
+    def test_kiosk_payload(self):
+        """Test kiosk returns design, status and limited leaderboard in one call"""
+        response = requests.get(f"{BASE_URL}/api/kiosk", params={"limit": 3})
+        assert response.status_code == 200
+        data = response.json()
+
+        for key in ["design", "status", "track", "entries", "total_entries", "timer_end_time"]:
+            assert key in data
+        assert "server_time" not in data and "X-Server-Time" in response.headers
+        assert len(data["entries"]) <= 3
+        assert all("email" not in e for e in data["entries"])
+        assert data["design"]["id"] == "design_settings"
+
+        laps = requests.get(f"{BASE_URL}/api/laps").json()
+        assert [e["id"] for e in data["entries"]] == [e["id"] for e in laps[:3]]
+        print(f"✅ Kiosk payload with {len(data['entries'])}/{data['total_entries']} entries")
+
+    def test_kiosk_etag(self):
+        """Test unchanged kiosk data answers 304 Not Modified"""
+        response = requests.get(f"{BASE_URL}/api/kiosk")
+        etag = response.headers.get("ETag")
+        assert etag
+
+        cached = requests.get(f"{BASE_URL}/api/kiosk", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        print(f"✅ Kiosk ETag {etag} honoured")
+
+    def test_kiosk_timer_outside_etag(self, auth_token):
+        """Test a running timer reaches clients with unchanged entries, and a restarted timer changes the ETag"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        before = requests.get(f"{BASE_URL}/api/event/status").json()
+        try:
+            for minutes in (30, 45):
+                response = requests.put(f"{BASE_URL}/api/admin/event", headers=headers, json={
+                    "status": "active", "timer_enabled": True, "timer_duration_minutes": minutes})
+                assert response.status_code == 200
+                response = requests.get(f"{BASE_URL}/api/kiosk")
+                if minutes == 30:
+                    first = response
+                    continue
+                # Restarting the timer changes the body, entries alone would not
+                assert response.headers["ETag"] != first.headers["ETag"]
+                assert response.json()["timer_end_time"] != first.json()["timer_end_time"]
+
+            cached = requests.get(f"{BASE_URL}/api/kiosk", headers={"If-None-Match": response.headers["ETag"]})
+            assert cached.status_code == 304
+            assert 0 < int(cached.headers["X-Timer-Remaining-Seconds"]) <= 45 * 60
+            assert cached.headers["X-Server-Time"] >= response.headers["X-Server-Time"]
+            print(f"✅ 304 with live countdown {cached.headers['X-Timer-Remaining-Seconds']} s")
+        finally:
+            requests.put(f"{BASE_URL}/api/admin/event", headers=headers, json={
+                "status": before["status"], "track_id": (before.get("track") or {}).get("id"),
+                "timer_enabled": before["timer_enabled"], "timer_duration_minutes": before["timer_duration_minutes"],
+                "scheduled_date": before.get("scheduled_date"), "scheduled_time": before.get("scheduled_time")})
+
+
+class TestCompression:
+    """Test gzip responses on public read endpoints"""
+
+    def test_gzip_when_accepted(self):
+        """Test large public responses are gzip encoded on request"""
+        response = requests.get(f"{BASE_URL}/api/kiosk", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        if len(response.content) >= 1024:
+            assert response.headers.get("Content-Encoding") == "gzip"
+        assert "entries" in response.json()
+        print(f"✅ Kiosk response encoding: {response.headers.get('Content-Encoding')}")
+
+    def test_identity_without_accept_encoding(self):
+        """Test clients without gzip support get plain JSON"""
+        response = requests.get(f"{BASE_URL}/api/laps", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding") is None
+        assert isinstance(response.json(), list)
+        print("✅ Plain JSON for identity encoding")
@@ -0,0 +1,120 @@
+"""
+F1 Fast Lap Challenge - Observability Tests
+Tests for: Prometheus Metrics, Sampling Profiler, Event Loop Watchdog, Health Probes
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://fastlapapp.preview.emergentagent.com').rstrip('/')
+
+
+@pytest.fixture
+def auth_token():
+    """Get authentication token"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "username": "admin",
+        "password": "admin"
+    })
+    return response.json()["token"]
+
+
+class TestMetrics:
+    """Test /api/admin/metrics"""
+
+    def test_metrics_requires_auth(self):
+        """Test metrics are admin only"""
+        response = requests.get(f"{BASE_URL}/api/admin/metrics")
+        assert response.status_code == 401
+        print("✅ Metrics without token rejected with 401")
+
+    def test_metrics_prometheus_format(self, auth_token):
+        """Test route latency and Mongo counters in Prometheus text format"""
+        requests.get(f"{BASE_URL}/api/laps")
+        response = requests.get(f"{BASE_URL}/api/admin/metrics", headers={"Authorization": f"Bearer {auth_token}"})
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+
+        text = response.text
+        assert "# TYPE f1_http_request_duration_seconds histogram" in text
+        assert 'f1_http_request_duration_seconds_count{method="GET",route="/api/laps"}' in text
+        assert "f1_mongo_commands_per_request_bucket" in text
+        assert "f1_mongo_slow_commands_total" in text
+        print("✅ Metrics exported in Prometheus format")
+
+
+class TestProfiler:
+    """Test /api/admin/profile sampling profiler"""
+
+    def test_profile_requires_auth(self):
+        """Test profiler is admin only"""
+        response = requests.get(f"{BASE_URL}/api/admin/profile", params={"seconds": 1})
+        assert response.status_code == 401
+        print("✅ Profiler without token rejected with 401")
+
+    def test_profile_collapsed_stacks(self, auth_token):
+        """Test profile output is in collapsed stack format ("frame;frame count")"""
+        response = requests.get(f"{BASE_URL}/api/admin/profile",
+            params={"seconds": 1, "include_idle": "true"},
+            headers={"Authorization": f"Bearer {auth_token}"})
+        assert response.status_code == 200
+        lines = [l for l in response.text.splitlines() if l]
+        assert lines
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0
+            assert stack
+        print(f"✅ Profile with {len(lines)} distinct stacks")
+
+    def test_profile_seconds_limit(self, auth_token):
+        """Test overly long profiles are rejected"""
+        response = requests.get(f"{BASE_URL}/api/admin/profile", params={"seconds": 3600},
+            headers={"Authorization": f"Bearer {auth_token}"})
+        assert response.status_code == 422
+        print("✅ seconds=3600 rejected with 422")
+
+    def test_rolling_profile_unknown_handler(self, auth_token):
+        """Test rolling profile of a handler that is not profiled"""
+        response = requests.get(f"{BASE_URL}/api/admin/profile/rolling", params={"handler": "TEST_unknown"},
+            headers={"Authorization": f"Bearer {auth_token}"})
+        assert response.status_code == 404
+        print("✅ Unknown handler rejected with 404")
+
+
+class TestLoopWatchdog:
+    """Test event loop lag metrics"""
+
+    def test_loop_lag_exported(self, auth_token):
+        """Test loop lag histogram is part of the metrics output"""
+        response = requests.get(f"{BASE_URL}/api/admin/metrics", headers={"Authorization": f"Bearer {auth_token}"})
+        assert response.status_code == 200
+        assert "f1_event_loop_lag_seconds_bucket" in response.text
+        assert "# TYPE f1_event_loop_blocked_total counter" in response.text
+        print("✅ Event loop lag exported")
+
+    def test_login_does_not_stall_loop(self):
+        """Test concurrent reads still answer while bcrypt runs for a login"""
+        import threading
+        threading.Thread(target=requests.post, args=(f"{BASE_URL}/api/auth/login",),
+            kwargs={"json": {"username": "admin", "password": "wrong"}}).start()
+        response = requests.get(f"{BASE_URL}/api/laps")
+        assert response.status_code == 200
+        print("✅ Public read answered during login")
+
+
+class TestHealth:
+    """Test liveness and readiness probes"""
+
+    def test_live(self):
+        """Test liveness answers without auth"""
+        response = requests.get(f"{BASE_URL}/api/health/live")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+        print("✅ Liveness ok")
+
+    def test_ready(self):
+        """Test readiness reports the database connection"""
+        response = requests.get(f"{BASE_URL}/api/health/ready")
+        assert response.status_code == 200
+        assert response.json()["database"] == "ok"
+        print("✅ Readiness ok")
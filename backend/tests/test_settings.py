@@ -0,0 +1,51 @@
+"""
+F1 Fast Lap Challenge - Settings Tests
+Tests for: Coalesced Settings Writes
+"""
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import settings  # noqa: E402
+from models import DesignSettings  # noqa: E402
+from storage.memory import MemoryDatabase  # noqa: E402
+
+
+class TestSettingsWriter:
+    """Test SettingsWriter merges a burst of updates into one write"""
+
+    @pytest.fixture
+    def database(self, monkeypatch):
+        database = MemoryDatabase()
+        monkeypatch.setattr(settings, "db", database)
+        monkeypatch.setattr(settings, "SETTINGS_COALESCE_MS", 20)
+        return database
+
+    def test_burst_back_to_written_value(self, database):
+        """Test A -> B -> A within one window stores A although A was the last written value"""
+        writer = settings.SettingsWriter("TEST_design", "TEST_design", DesignSettings, version="settings")
+
+        async def scenario():
+            await writer.update({"primary_color": "#111111"})
+            await asyncio.gather(writer.update({"primary_color": "#222222"}), writer.update({"primary_color": "#111111"}))
+            return await database.TEST_design.find_one({"id": "TEST_design"}, {"_id": 0, "primary_color": 1})
+
+        assert asyncio.run(scenario()) == {"primary_color": "#111111"}
+        print("✅ Pending value reset to the written one")
+
+    def test_unchanged_value_skipped(self, database):
+        """Test a value equal to the last write causes no further write"""
+        writer = settings.SettingsWriter("TEST_design", "TEST_design", DesignSettings, version="settings")
+
+        async def scenario():
+            await writer.update({"primary_color": "#111111"})
+            version = settings.cache_versions["settings"]
+            await writer.update({"primary_color": "#111111"})
+            return version, settings.cache_versions["settings"]
+
+        before, after = asyncio.run(scenario())
+        assert before == after
+        print("✅ Unchanged value not written again")
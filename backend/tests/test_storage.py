@@ -0,0 +1,163 @@
+"""
+F1 Fast Lap Challenge - Storage Backend Tests
+Tests for: Mongo Query Semantics, SQLite and In-Memory Backends
+"""
+import asyncio
+import pytest
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymongo import UpdateOne  # noqa: E402
+from pymongo.errors import DuplicateKeyError  # noqa: E402
+
+from storage import documents  # noqa: E402
+from storage.memory import MemoryDatabase  # noqa: E402
+from storage.sqlite import SqliteDatabase  # noqa: E402
+
+LAPS = [
+    {"id": "a", "driver_name": "A", "team": "Red", "lap_time_ms": 90000, "rank": 3},
+    {"id": "b", "driver_name": "B", "team": "Blue", "lap_time_ms": 85500, "rank": 1, "email": "b@example.com"},
+    {"id": "c", "driver_name": "C", "team": None, "lap_time_ms": 85500, "rank": 2, "sectors": [28000, 30000, 27500]},
+]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestQuerySemantics:
+    """Test the Mongo subset shared by the embedded backends"""
+
+    def test_filters(self):
+        """Test equality, ranges, $in/$nin, $exists and $or on plain documents"""
+        def ids(query):
+            return [lap["id"] for lap in LAPS if documents.matches(lap, query)]
+
+        assert ids({"lap_time_ms": 85500}) == ["b", "c"]
+        assert ids({"lap_time_ms": {"$gt": 85500, "$lte": 90000}}) == ["a"]
+        assert ids({"team": {"$in": ["Red", "Blue"]}}) == ["a", "b"]
+        assert ids({"team": {"$nin": [None, ""]}}) == ["a", "b"]
+        assert ids({"email": {"$exists": True}}) == ["b"]
+        assert ids({"team": None}) == ["c"]
+        assert ids({"$or": [{"rank": 1}, {"driver_name": "A"}]}) == ["a", "b"]
+        assert ids({"sectors": 30000}) == ["c"]
+        assert ids({"lap_time_ms": {"$gt": "85500"}}) == []
+        with pytest.raises(NotImplementedError):
+            ids({"driver_name": {"$regex": "^A"}})
+        print("✅ Filters match like Mongo")
+
+    def test_updates(self):
+        """Test update operators, dotted paths and upserts"""
+        doc = {"_id": 1, "lap_time_ms": 90000, "laps": 1}
+        documents.apply_update(doc, {"$min": {"lap_time_ms": 85000}, "$inc": {"laps": 1}, "$set": {"best.s1": 28000},
+                                     "$setOnInsert": {"created": True}})
+        assert doc == {"_id": 1, "lap_time_ms": 85000, "laps": 2, "best": {"s1": 28000}}
+        documents.apply_update(doc, {"driver_name": "A"})
+        assert doc == {"_id": 1, "driver_name": "A"}
+        new = documents.upsert_document({"id": "x", "rank": {"$gt": 0}}, {"$set": {"a": 1}, "$setOnInsert": {"b": 2}})
+        assert new == {"id": "x", "a": 1, "b": 2}
+        print("✅ Updates applied like Mongo")
+
+    def test_sort_and_aggregate(self):
+        """Test stable multi-key sorts and the team standings pipeline stages"""
+        laps = [dict(lap) for lap in LAPS]
+        documents.sort_documents(laps, documents.sort_spec([("lap_time_ms", 1), ("rank", -1)]))
+        assert [lap["id"] for lap in laps] == ["c", "b", "a"]
+        result = documents.aggregate(laps, [
+            {"$match": {"team": {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$team", "best": {"$min": "$lap_time_ms"}, "drivers": {"$addToSet": "$driver_name"}}},
+            {"$project": {"best": 1, "count": {"$size": "$drivers"}}},
+            {"$sort": {"best": 1}},
+        ])
+        assert result == [{"_id": "Blue", "best": 85500, "count": 1}, {"_id": "Red", "best": 90000, "count": 1}]
+        print("✅ Sort and aggregation")
+
+
+class TestEmbeddedBackends:
+    """Test the SQLite and in-memory backends through the Motor API"""
+
+    @pytest.fixture(params=["sqlite", "memory"])
+    def database(self, request, tmp_path):
+        database = SqliteDatabase(str(tmp_path / "event.sqlite3")) if request.param == "sqlite" else MemoryDatabase()
+        yield database
+        database.close()
+
+    def test_leaderboard_reads(self, database):
+        """Test sorted, limited and projected reads (on SQLite through the lap time index)"""
+        async def scenario():
+            await database.lap_entries.create_index("lap_time_ms")
+            await database.lap_entries.insert_many([dict(lap) for lap in LAPS])
+            fastest = await database.lap_entries.find_one({}, {"_id": 0, "id": 1}, sort=[("lap_time_ms", 1)])
+            top = await database.lap_entries.find({"lap_time_ms": {"$lt": 90000}}, {"_id": 0, "driver_name": 1}) \
+                .sort("lap_time_ms", 1).limit(5).to_list(5)
+            teams = await database.lap_entries.count_documents({"team": {"$nin": [None, ""]}})
+            return fastest, top, teams
+
+        fastest, top, teams = run(scenario())
+        assert fastest == {"id": "b"}
+        assert top == [{"driver_name": "B"}, {"driver_name": "C"}]
+        assert teams == 2
+        if isinstance(database, MemoryDatabase):
+            return
+        plan = sqlite3.connect(database.path).execute(
+            "EXPLAIN QUERY PLAN SELECT doc FROM lap_entries ORDER BY json_extract(doc, '$.lap_time_ms'), rowid").fetchall()
+        assert "ix_lap_entries_lap_time_ms_1" in plan[0][3]
+        print(f"✅ Leaderboard read: {plan[0][3]}")
+
+    def test_writes(self, database):
+        """Test updates, upserts, bulk writes, deletes and unique indexes"""
+        async def scenario():
+            laps = database.lap_entries
+            await laps.insert_many([dict(lap) for lap in LAPS])
+            await laps.update_one({"id": "a"}, {"$set": {"lap_time_ms": 80000}})
+            result = await laps.update_one({"id": "d"}, {"$set": {"lap_time_ms": 99000}}, upsert=True)
+            assert result.upserted_id is not None
+            await laps.bulk_write([UpdateOne({"id": lap_id}, {"$set": {"rank": rank}})
+                                   for rank, lap_id in enumerate(["a", "b", "c", "d"], 1)])
+            ranked = [lap["id"] for lap in await laps.find({}, {"_id": 0}).sort("rank", 1).to_list(10)]
+            removed = await laps.find_one_and_delete({"rank": {"$gte": 3}}, sort=[("rank", -1)])
+            deleted = (await laps.delete_many({"team": None})).deleted_count
+
+            await database.admins.create_index("username", unique=True)
+            await database.admins.insert_one({"username": "admin"})
+            with pytest.raises(DuplicateKeyError):
+                await database.admins.insert_one({"username": "admin"})
+            return ranked, removed["id"], deleted, await laps.count_documents({})
+
+        ranked, removed, deleted, remaining = run(scenario())
+        assert ranked == ["a", "b", "c", "d"]
+        assert (removed, deleted, remaining) == ("d", 1, 2)
+        print("✅ Writes and unique index")
+
+    def test_documents_are_copies(self, database):
+        """Test changing a document read or written by a handler does not change the stored one"""
+        async def scenario():
+            lap = {"id": "a", "sectors": [28000, 30000, 27500]}
+            await database.lap_entries.insert_one(lap)
+            lap["sectors"].append(1)
+            read = await database.lap_entries.find_one({"id": "a"}, {"_id": 0})
+            read["sectors"].clear()
+            return await database.lap_entries.find_one({"id": "a"}, {"_id": 0})
+
+        assert run(scenario()) == {"id": "a", "sectors": [28000, 30000, 27500]}
+        print("✅ Stored documents isolated from callers")
+
+
+class TestSqliteBackend:
+    """Test the embedded SQLite backend on disk"""
+
+    def test_survives_reopen(self, tmp_path):
+        """Test documents are on disk after the database is closed"""
+        path = str(tmp_path / "event.sqlite3")
+        database = SqliteDatabase(path)
+        run(database.event_settings.update_one({"id": "current_event"}, {"$set": {"status": "active"}}, upsert=True))
+        database.close()
+
+        database = SqliteDatabase(path)
+        event = run(database.event_settings.find_one({"id": "current_event"}, {"_id": 0}))
+        database.close()
+        assert event == {"id": "current_event", "status": "active"}
+        print("✅ Data kept across restarts")
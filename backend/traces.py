@@ -0,0 +1,141 @@
+"""Lap telemetry traces stored as columnar .npy files next to the database"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+import os
+import threading
+import uuid
+
+from config import TRACE_DIR
+
+# ============== TRACES ==============
+# One float32 array of shape (channels, samples) per lap in TRACE_DIR/<lap id>.npy.
+# Every channel is one contiguous row, so reading a few channels of a memory
+# mapped file only touches their pages. Mongo keeps just trace_samples on the
+# lap. numpy is imported on first use to keep it out of the app import.
+
+CHANNELS = ("distance", "time_ms", "speed_kmh", "throttle", "brake", "steer", "gear", "x", "z")
+CHANNEL_INDEX = {name: idx for idx, name in enumerate(CHANNELS)}
+
+def trace_path(lap_id: str):
+    # Lap ids are uuid4 strings; anything else could escape TRACE_DIR
+    return TRACE_DIR / f"{uuid.UUID(lap_id)}.npy"
+
+def save_trace(lap_id: str, columns: Sequence[Sequence[float]]) -> int:
+    """Write a lap trace (one sequence per channel) and return its sample count.
+
+    Samples where the distance does not increase (flashbacks, standing still)
+    are dropped so that distance can be searched and interpolated.
+    """
+    import numpy as np
+    data = np.array(columns, dtype=np.float32)
+    if data.shape[0] != len(CHANNELS):
+        raise ValueError(f"Trace needs {len(CHANNELS)} channels, got {data.shape[0]}")
+    distance = data[CHANNEL_INDEX["distance"]]
+    if distance.size:
+        keep = np.concatenate(([True], distance[1:] > np.maximum.accumulate(distance)[:-1]))
+        data = data[:, keep]
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    path = trace_path(lap_id)
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, data)
+    os.replace(tmp, path)
+    return data.shape[1]
+
+def delete_trace(lap_id: str):
+    try:
+        trace_path(lap_id).unlink(missing_ok=True)
+    except ValueError:
+        pass
+
+def delete_all_traces():
+    for path in TRACE_DIR.glob("*.npy"):
+        path.unlink(missing_ok=True)
+
+def open_trace(lap_id: str):
+    """Memory mapped (channels, samples) array, None if the lap has no trace"""
+    import numpy as np
+    try:
+        return np.load(trace_path(lap_id), mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+
+def read_trace(lap_id: str, channels: Optional[List[str]] = None, from_m: Optional[float] = None,
+               to_m: Optional[float] = None, max_points: int = 2000) -> Optional[Dict]:
+    """Channels of a trace between two lap distances, thinned out to at most max_points"""
+    import numpy as np
+    trace = open_trace(lap_id)
+    if trace is None:
+        return None
+    channels = channels or list(CHANNELS)
+    unknown = [c for c in channels if c not in CHANNEL_INDEX]
+    if unknown:
+        raise ValueError(f"Unbekannte Kanäle: {', '.join(unknown)}")
+
+    distance = trace[CHANNEL_INDEX["distance"]]
+    start = int(np.searchsorted(distance, from_m, side="left")) if from_m is not None else 0
+    end = int(np.searchsorted(distance, to_m, side="right")) if to_m is not None else distance.shape[0]
+    step = max(1, -(-(end - start) // max(1, max_points)))
+    rows = [CHANNEL_INDEX[c] for c in channels]
+    sliced = np.asarray(trace[rows, start:end:step])
+    return {
+        "samples": int(trace.shape[1]),
+        "from_index": start,
+        "step": step,
+        "channels": {name: sliced[idx] for idx, name in enumerate(channels)},
+    }
+
+# ============== COMPARISON ==============
+# Delta of one lap to a reference lap over distance. Both traces are
+# interpolated onto the same distance grid, so the result only depends on the
+# two files; it is cached per pair and file version.
+
+COMPARE_CACHE_SIZE = 256
+compare_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+# Comparisons run in worker threads
+compare_cache_lock = threading.Lock()
+
+def trace_version(lap_id: str) -> Optional[int]:
+    try:
+        return trace_path(lap_id).stat().st_mtime_ns
+    except (FileNotFoundError, ValueError):
+        return None
+
+def compare_traces(lap_id: str, reference_id: str, points: int = 1000) -> Optional[Dict]:
+    """Time delta (ms, positive = slower than the reference) and both speeds over distance"""
+    key = (lap_id, reference_id, points, trace_version(lap_id), trace_version(reference_id))
+    if None in key:
+        return None
+    with compare_cache_lock:
+        hit = compare_cache.get(key)
+        if hit is not None:
+            compare_cache.move_to_end(key)
+            return hit
+
+    import numpy as np
+    lap, reference = open_trace(lap_id), open_trace(reference_id)
+    if lap is None or reference is None:
+        return None
+    rows = [CHANNEL_INDEX["distance"], CHANNEL_INDEX["time_ms"], CHANNEL_INDEX["speed_kmh"]]
+    lap_distance, lap_time, lap_speed = np.asarray(lap[rows], dtype=np.float64)
+    ref_distance, ref_time, ref_speed = np.asarray(reference[rows], dtype=np.float64)
+    if lap_distance.size < 2 or ref_distance.size < 2:
+        return None
+
+    start = max(lap_distance[0], ref_distance[0])
+    end = min(lap_distance[-1], ref_distance[-1])
+    grid = np.linspace(start, end, points)
+    delta = np.interp(grid, lap_distance, lap_time) - np.interp(grid, ref_distance, ref_time)
+    result = {
+        "lap_id": lap_id,
+        "reference_id": reference_id,
+        "distance": grid.astype(np.float32),
+        "delta_ms": delta.astype(np.float32),
+        "speed_kmh": np.interp(grid, lap_distance, lap_speed).astype(np.float32),
+        "reference_speed_kmh": np.interp(grid, ref_distance, ref_speed).astype(np.float32),
+        "final_delta_ms": float(delta[-1]),
+    }
+    with compare_cache_lock:
+        compare_cache[key] = result
+        if len(compare_cache) > COMPARE_CACHE_SIZE:
+            compare_cache.popitem(last=False)
+    return result
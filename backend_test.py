@@ -1,10 +1,21 @@
 import requests
+import os
 import sys
 import json
 from datetime import datetime
+from pathlib import Path
+
+def backend_url() -> str:
+    """REACT_APP_BACKEND_URL, or the app served in this process on the in-memory backend like the pytest suites"""
+    if os.environ.get('REACT_APP_BACKEND_URL'):
+        return os.environ['REACT_APP_BACKEND_URL'].rstrip('/')
+    sys.path.insert(0, str(Path(__file__).resolve().parent / "backend" / "tests"))
+    from conftest import ensure_backend
+    return ensure_backend().rstrip('/')
 
 class F1LapTimeAPITester:
-    def __init__(self, base_url="https://fastlapapp.preview.emergentagent.com/api"):
+    def __init__(self, base_url=None):
+        base_url = base_url or f"{backend_url()}/api"
         self.base_url = base_url
         self.tests_run = 0
         self.tests_passed = 0
@@ -572,4 +583,8 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    try:
+        sys.exit(main())
+    finally:
+        if 'conftest' in sys.modules:
+            sys.modules['conftest'].stop_backend()
\ No newline at end of file